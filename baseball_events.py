@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Baseball Play-by-Play Events
+Typed plate-appearance events from BaseballGame, buffered in compact
+column arrays and flushed in bulk to a columnar directory of raw
+little-endian arrays that can be memory-mapped for analysis.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import random
+import sys
+from array import array
+from collections import namedtuple
+
+from baseball_game import OUTCOME_NAMES, BaseballGame
+
+# One plate appearance. outs and bases (bitmask, 1 = 1st, 2 = 2nd,
+# 4 = 3rd) are the state before the pitch; half is 0 for the top of the
+# inning and 1 for the bottom; runs are the runs scored on the play.
+PlayEvent = namedtuple("PlayEvent", [
+    "game", "inning", "half", "outs", "bases", "outcome", "runs"
+])
+
+# Column names and array typecodes, in PlayEvent order
+COLUMNS = (
+    ("game", "I"),
+    ("inning", "B"),
+    ("half", "B"),
+    ("outs", "B"),
+    ("bases", "B"),
+    ("outcome", "B"),
+    ("runs", "B"),
+)
+
+SCHEMA_FILE = "schema.json"
+FORMAT_VERSION = 1
+
+
+class EventLog:
+    """Append-only play-by-play buffer with one array per column
+
+    Pass it to BaseballGame(events=...) to record every plate appearance.
+    With a writer the buffer is flushed to it in bulk every capacity
+    events; call flush() once more at the end.
+    """
+
+    def __init__(self, writer=None, capacity=1 << 16):
+        self.writer = writer
+        self.capacity = capacity
+        self.columns = {name: array(typecode) for name, typecode in COLUMNS}
+        self.games = 0
+
+    def new_game(self):
+        """Reserve the id for the next game recorded into this log"""
+        game = self.games
+        self.games += 1
+        return game
+
+    def record(self, game, inning, half, outs, bases, outcome, runs):
+        columns = self.columns
+        columns["game"].append(game)
+        columns["inning"].append(inning)
+        columns["half"].append(half)
+        columns["outs"].append(outs)
+        columns["bases"].append(bases)
+        columns["outcome"].append(outcome)
+        columns["runs"].append(runs)
+        if self.writer is not None and len(columns["game"]) >= self.capacity:
+            self.flush()
+
+    def flush(self):
+        """Hand the buffered events to the writer and empty the buffer"""
+        if self.writer is not None:
+            self.writer.write(self.columns)
+        self.clear()
+
+    def clear(self):
+        for column in self.columns.values():
+            del column[:]
+
+    def __len__(self):
+        return len(self.columns["game"])
+
+    def __getitem__(self, index):
+        return PlayEvent(*(self.columns[name][index] for name, _ in COLUMNS))
+
+    def __iter__(self):
+        return map(PlayEvent, *(self.columns[name] for name, _ in COLUMNS))
+
+
+class EventWriter:
+    """Append event columns to <directory>/<column>.bin files
+
+    The schema (column types and row count) is written by close(); a
+    directory without one is an unfinished export.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.files = {name: open(os.path.join(directory, name + ".bin"), "wb")
+                      for name, _ in COLUMNS}
+        self.rows = 0
+
+    def write(self, columns):
+        for name, _ in COLUMNS:
+            column = columns[name]
+            if sys.byteorder == "big":
+                column = array(column.typecode, column)
+                column.byteswap()
+            column.tofile(self.files[name])
+        self.rows += len(columns["game"])
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        schema = {
+            "version": FORMAT_VERSION,
+            "rows": self.rows,
+            "columns": [{"name": name, "type": typecode} for name, typecode in COLUMNS],
+        }
+        with open(os.path.join(self.directory, SCHEMA_FILE), "w") as f:
+            json.dump(schema, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class EventTable:
+    """Read-only, memory-mapped view of an exported event directory
+
+    Each column is a memoryview over its mapped file (see column()), so
+    opening a table costs nothing up front whatever its size.
+    """
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, SCHEMA_FILE)) as f:
+            schema = json.load(f)
+        if schema.get("version") != FORMAT_VERSION:
+            raise ValueError("Unsupported event table version")
+        if sys.byteorder == "big":
+            raise ValueError("Event tables are little-endian; this host is not")
+        self.rows = schema["rows"]
+        self.maps = {}
+        self.views = []  # every view over a map, released before it closes
+        self.columns = {}
+        for column in schema["columns"]:
+            name, typecode = column["name"], column["type"]
+            path = os.path.join(directory, name + ".bin")
+            if self.rows == 0:
+                self.columns[name] = memoryview(array(typecode))
+                continue
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.maps[name] = mapped
+            raw = memoryview(mapped)
+            view = raw.cast(typecode)
+            self.views += [raw, view]
+            if len(view) < self.rows:
+                self.close()
+                raise ValueError(f"Column {name} is shorter than the table")
+            self.columns[name] = view[:self.rows]
+            self.views.append(self.columns[name])
+
+    def column(self, name):
+        return self.columns[name]
+
+    def numpy(self, name):
+        """A zero-copy NumPy array over one column
+
+        The array holds the mapped file itself rather than a view of the
+        table, so it stays valid after the table is closed.
+        """
+        import numpy as np  # optional; only needed by callers that ask for it
+        column = self.columns[name]
+        if name not in self.maps:
+            return np.frombuffer(column, dtype=column.format)
+        return np.frombuffer(self.maps[name], dtype=column.format, count=self.rows)
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, index):
+        return PlayEvent(*(self.columns[name][index] for name, _ in COLUMNS))
+
+    def close(self):
+        for view in reversed(self.views):
+            view.release()
+        for mapped in self.maps.values():
+            try:
+                mapped.close()
+            except BufferError:
+                pass  # a numpy() array still uses it; unmapped when that goes
+        self.views = []
+        self.maps = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def record_games(directory, games, seed=0):
+    """Play games silently and export every plate appearance to directory"""
+    master = random.Random(seed)
+    with EventWriter(directory) as writer:
+        events = EventLog(writer)
+        for _ in range(games):
+            BaseballGame(interactive=False, rng=random.Random(master.getrandbits(64)),
+                         events=events).play_game()
+        events.flush()
+    return writer.rows
+
+
+def summarize(table):
+    """Outcome frequencies and total runs from an EventTable"""
+    outcomes = [0] * len(OUTCOME_NAMES)
+    for outcome in table.column("outcome"):
+        outcomes[outcome] += 1
+    runs = sum(table.column("runs"))
+    games = table.column("game")
+    game_count = games[-1] - games[0] + 1 if len(games) else 0
+    return {
+        "plate_appearances": len(table),
+        "games": game_count,
+        "outcomes": dict(zip(OUTCOME_NAMES, outcomes)),
+        "runs": runs,
+    }
+
+
+def main():
+    """Export simulated play-by-play or summarize an export"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="simulate games into an event directory")
+    record.add_argument("directory")
+    record.add_argument("--games", type=int, default=1000)
+    record.add_argument("--seed", type=int, default=0)
+
+    summary = commands.add_parser("summary", help="summarize an event directory")
+    summary.add_argument("directory")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        rows = record_games(args.directory, args.games, args.seed)
+        print(f"{args.directory}: {rows} plate appearances from {args.games} games")
+        return
+
+    with EventTable(args.directory) as table:
+        stats = summarize(table)
+    print(f"Games: {stats['games']}  Plate appearances: {stats['plate_appearances']}  "
+          f"Runs: {stats['runs']}")
+    for name, count in stats["outcomes"].items():
+        share = count / stats["plate_appearances"] if stats["plate_appearances"] else 0.0
+        print(f"  {name:<10} {count:>10} ({share:.3f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,104 +4,360 @@ Baseball Game Simulation
 A simple text-based baseball game where you can play against the computer.
 """
 
+import math
 import random
+import sys
 import time
+from array import array
+from collections import namedtuple
 
-class BaseballGame:
+# Plate appearance outcomes and their probabilities
+BATTING_OUTCOMES = [
+    ("Single", 0.3),
+    ("Double", 0.15),
+    ("Triple", 0.05),
+    ("Home Run", 0.1),
+    ("Walk", 0.15),
+    ("Strikeout", 0.15),
+    ("Groundout", 0.05),
+    ("Flyout", 0.05)
+]
+
+# Outcomes as small integers, in BATTING_OUTCOMES order
+SINGLE, DOUBLE, TRIPLE, HOME_RUN, WALK, STRIKEOUT, GROUNDOUT, FLYOUT = range(8)
+OUTCOME_NAMES = [name for name, _ in BATTING_OUTCOMES]
+OUTCOME_CODES = {name: code for code, name in enumerate(OUTCOME_NAMES)}
+
+# Base-out states: bases is a bitmask (1 = 1st, 2 = 2nd, 4 = 3rd) and the
+# state is outs * 8 + bases, so 0-23 cover 0-2 outs and END_OF_INNING (the
+# third out) is 24. state >> 3 is always the number of outs.
+BASE_OUT_STATES = 24
+END_OF_INNING = 24
+
+def advance(bases, bases_advanced):
+    """Move every runner ahead; return the new bases and the runs scored"""
+    runs = bin(bases >> (3 - bases_advanced)).count("1") if bases_advanced else 0
+    return (bases << bases_advanced) & 0b111, runs
+
+def build_transitions():
+    """Build the [state][outcome] next-state and runs-scored tables"""
+    # Base the batter reaches and bases the runners advance, per hit/walk
+    hits = {
+        SINGLE: (0b001, 1),
+        DOUBLE: (0b010, 2),
+        TRIPLE: (0b100, 3),
+        HOME_RUN: (0, 3),
+        WALK: (0b001, 1),
+    }
+    next_state = []
+    runs_scored = []
+    for state in range(BASE_OUT_STATES):
+        outs, bases = divmod(state, 8)
+        next_row = []
+        runs_row = []
+        for outcome in range(len(OUTCOME_NAMES)):
+            if outcome in hits:
+                batter, bases_advanced = hits[outcome]
+                new_bases, runs = advance(bases, bases_advanced)
+                if outcome == HOME_RUN:
+                    runs += 1  # Batter scores too
+                next_row.append(outs * 8 + (new_bases | batter))
+                runs_row.append(runs)
+            else:
+                next_row.append(END_OF_INNING if outs == 2 else state + 8)
+                runs_row.append(0)
+        next_state.append(next_row)
+        runs_scored.append(runs_row)
+    return next_state, runs_scored
+
+NEXT_STATE, RUNS_SCORED = build_transitions()
+
+class OutcomeSampler:
+    """Draws outcome codes from a fixed distribution in O(1)
+
+    Built once per distribution with Vose's alias method: one uniform draw
+    picks a column, and its fractional part picks between the column's own
+    outcome and its alias. weights are (name, weight) pairs like
+    BATTING_OUTCOMES, a {name: weight} dict, or weights indexed by outcome
+    code. They are normalised to sum to 1 unless normalize is False, in
+    which case they must already do so.
+    """
+    
+    BUCKETS = 1 << 13  # lookup slices per alias column for bulk NumPy draws
+    
+    def __init__(self, weights=BATTING_OUTCOMES, normalize=True):
+        if isinstance(weights, dict):
+            weights = list(weights.items())
+        probabilities = [0.0] * len(OUTCOME_NAMES)
+        for code, item in enumerate(weights):
+            if isinstance(item, tuple):
+                name, weight = item
+                if name not in OUTCOME_CODES:
+                    raise ValueError(f"Unknown outcome: {name!r}")
+                code = OUTCOME_CODES[name]
+            else:
+                weight = item
+                if code >= len(OUTCOME_NAMES):
+                    raise ValueError("More weights than outcomes")
+            weight = float(weight)
+            if not math.isfinite(weight) or weight < 0:
+                raise ValueError(f"Invalid weight for {OUTCOME_NAMES[code]}: {weight!r}")
+            probabilities[code] += weight
+        
+        total = math.fsum(probabilities)
+        if total <= 0:
+            raise ValueError("Outcome weights must not all be zero")
+        if not normalize and abs(total - 1.0) > 1e-9:
+            raise ValueError(f"Outcome probabilities add up to {total}, not 1")
+        self.probabilities = [weight / total for weight in probabilities]
+        self.size = len(self.probabilities)
+        self.accept, self.alias = self.build_tables(self.probabilities)
+        self._arrays = None
+    
+    @staticmethod
+    def build_tables(probabilities):
+        """Vose's alias tables: keep column i with probability accept[i], else alias[i]"""
+        n = len(probabilities)
+        scaled = [probability * n for probability in probabilities]
+        accept = [1.0] * n
+        alias = list(range(n))
+        small = [i for i, value in enumerate(scaled) if value < 1.0]
+        large = [i for i, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            accept[less] = scaled[less]
+            alias[less] = more
+            scaled[more] = (scaled[more] + scaled[less]) - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left over is 1 up to rounding and always kept
+        return accept, alias
+    
+    def bucket_tables(self, np):
+        """NumPy lookup tables for sample_many
+        
+        Each alias column is split into BUCKETS equal slices; a slice that
+        lies entirely on one side of the column's accept threshold maps
+        straight to an outcome, and only draws landing in the one slice
+        that straddles it (ambiguous) need the full comparison.
+        """
+        thresholds = np.arange(self.size) + np.array(self.accept)
+        alias = np.array(self.alias, dtype=np.intp)
+        
+        def pick(draws):
+            columns = np.minimum(draws.astype(np.intp), self.size - 1)
+            return np.where(draws < thresholds[columns], columns, alias[columns])
+        
+        edges = np.arange(self.size * self.BUCKETS + 1) / self.BUCKETS
+        first = pick(edges[:-1])
+        last = pick(np.nextafter(edges[1:], 0))
+        return first, first != last, thresholds, alias
+    
+    def sample(self, rng=random):
+        """Draw one outcome code using a single rng.random() call"""
+        u = rng.random() * self.size
+        column = int(u)
+        if u - column < self.accept[column]:
+            return column
+        return self.alias[column]
+    
+    def sample_many(self, count, rng=random):
+        """Draw count outcome codes in bulk
+        
+        With a numpy.random.Generator the draws are vectorized and come back
+        as a NumPy integer array; otherwise they fill an array("B").
+        """
+        if hasattr(rng, "integers"):
+            import numpy as np  # only reachable when the caller has NumPy
+            if self._arrays is None:
+                self._arrays = self.bucket_tables(np)
+            table, ambiguous, thresholds, alias = self._arrays
+            draws = rng.random(count) * self.size
+            buckets = (draws * self.BUCKETS).astype(np.intp)
+            outcome = table[buckets]
+            exact = ambiguous[buckets]
+            if exact.any():
+                draws = draws[exact]
+                columns = draws.astype(np.intp)
+                outcome[exact] = np.where(draws < thresholds[columns], columns, alias[columns])
+            return outcome
+        sample = self.sample
+        return array("B", [sample(rng) for _ in range(count)])
+
+DEFAULT_SAMPLER = OutcomeSampler(BATTING_OUTCOMES)
+
+def outcome_probabilities(outcomes=BATTING_OUTCOMES):
+    """Probability of each outcome code, normalised as OutcomeSampler draws them"""
+    return list(OutcomeSampler(outcomes).probabilities)
+
+def run_expectancy(probabilities=None):
+    """Expected runs to the end of the half inning from each base-out state
+
+    Treats the half inning as a Markov chain over NEXT_STATE/RUNS_SCORED and
+    solves E[s] = sum_o p_o * (runs(s, o) + E[next(s, o)]) exactly, with
+    E[END_OF_INNING] = 0. probabilities is indexed by outcome code and
+    defaults to outcome_probabilities().
+    """
+    if probabilities is None:
+        probabilities = outcome_probabilities()
+    n = BASE_OUT_STATES
+    # Augmented system (I - P) E = expected runs on the next plate appearance
+    matrix = [[0.0] * n + [0.0] for _ in range(n)]
+    for state in range(n):
+        matrix[state][state] += 1.0
+        for outcome, probability in enumerate(probabilities):
+            target = NEXT_STATE[state][outcome]
+            if target != END_OF_INNING:
+                matrix[state][target] -= probability
+            matrix[state][n] += probability * RUNS_SCORED[state][outcome]
+    
+    # Gauss-Jordan elimination with partial pivoting
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda row: abs(matrix[row][col]))
+        if abs(matrix[pivot][col]) < 1e-12:
+            raise ValueError("Half inning never ends with these probabilities")
+        matrix[col], matrix[pivot] = matrix[pivot], matrix[col]
+        scale = matrix[col][col]
+        matrix[col] = [value / scale for value in matrix[col]]
+        for row in range(n):
+            factor = matrix[row][col]
+            if row != col and factor:
+                matrix[row] = [a - factor * b for a, b in zip(matrix[row], matrix[col])]
+    return [matrix[state][n] for state in range(n)]
+
+# Final result of a game, returned by BaseballGame.play_game
+GameResult = namedtuple("GameResult", [
+    "away_score", "home_score", "winner", "away_innings", "home_innings",
+    "plate_appearances"
+])
+
+class StreamOutput:
+    """Output sink that writes game text to a stream (stdout by default)"""
+    
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stdout
+    
+    def write(self, text):
+        self.stream.write(text + "\n")
+
+class BufferedOutput:
+    """Output sink that keeps game text in memory"""
+    
     def __init__(self):
+        self.lines = []
+    
+    def write(self, text):
+        self.lines.append(text)
+    
+    def getvalue(self):
+        return "\n".join(self.lines)
+
+class SilentOutput:
+    """Output sink that discards everything; the game skips formatting text"""
+    
+    def write(self, text):
+        pass
+
+class BaseballGame:
+    def __init__(self, interactive=True, output=None, rng=None,
+                 away_lineup=None, home_lineup=None, events=None):
+        # Interactive games wait for Enter and pause after every at-bat.
+        # output is a sink with a write(text) method; it defaults to stdout
+        # for interactive games and to silence otherwise. rng is any object
+        # with a random() method, the random module by default. A lineup is
+        # a batting order of OutcomeSamplers, one per batter; without one
+        # every batter draws from BATTING_OUTCOMES. events is an optional
+        # baseball_events.EventLog that receives every plate appearance.
+        self.interactive = interactive
+        if output is None:
+            output = StreamOutput() if interactive else SilentOutput()
+        self.output = output
+        self.verbose = not isinstance(output, SilentOutput)
+        self.rng = rng if rng is not None else random
+        self.lineups = {
+            "Top": list(away_lineup or [DEFAULT_SAMPLER]),
+            "Bottom": list(home_lineup or [DEFAULT_SAMPLER]),
+        }
+        self.batting_order = {"Top": 0, "Bottom": 0}  # index of the next batter
+        self.events = events
+        self.game_id = events.new_game() if events is not None else None
+        self.away_innings = [0] * 9
+        self.home_innings = [0] * 9
+        self.plate_appearances = 0
         self.home_score = 0
         self.away_score = 0
         self.inning = 1
         self.top_bottom = "Top"  # Top = Away team bats, Bottom = Home team bats
-        self.outs = 0
-        self.bases = [False, False, False]  # [1st, 2nd, 3rd]
+        self.state = 0  # base-out state, see NEXT_STATE
         self.game_over = False
+    
+    @property
+    def outs(self):
+        return self.state >> 3
+    
+    @property
+    def bases(self):
+        """Occupied bases as [1st, 2nd, 3rd]"""
+        return [bool(self.state & 0b001), bool(self.state & 0b010), bool(self.state & 0b100)]
         
     def print_scoreboard(self):
         """Print the current scoreboard"""
-        print("\n" + "="*50)
-        print(f"INNING: {self.inning} {self.top_bottom}")
-        print(f"OUTS: {self.outs}")
-        print(f"SCORE: Away {self.away_score} - Home {self.home_score}")
-        print(f"BASES: 1st: {'X' if self.bases[0] else 'O'} 2nd: {'X' if self.bases[1] else 'O'} 3rd: {'X' if self.bases[2] else 'O'}")
-        print("="*50)
+        self.output.write("\n" + "="*50)
+        self.output.write(f"INNING: {self.inning} {self.top_bottom}")
+        self.output.write(f"OUTS: {self.outs}")
+        self.output.write(f"SCORE: Away {self.away_score} - Home {self.home_score}")
+        self.output.write(f"BASES: 1st: {'X' if self.bases[0] else 'O'} 2nd: {'X' if self.bases[1] else 'O'} 3rd: {'X' if self.bases[2] else 'O'}")
+        self.output.write("="*50)
+    
+    def current_batter(self):
+        """OutcomeSampler of the batter due up for the batting team"""
+        lineup = self.lineups[self.top_bottom]
+        return lineup[self.batting_order[self.top_bottom] % len(lineup)]
     
     def get_batting_result(self):
         """Simulate a batting result"""
-        outcomes = [
-            ("Single", 0.3),
-            ("Double", 0.15),
-            ("Triple", 0.05),
-            ("Home Run", 0.1),
-            ("Walk", 0.15),
-            ("Strikeout", 0.15),
-            ("Groundout", 0.05),
-            ("Flyout", 0.05)
-        ]
-        
-        rand = random.random()
-        cumulative = 0
-        for outcome, probability in outcomes:
-            cumulative += probability
-            if rand <= cumulative:
-                return outcome
-        return "Groundout"
+        return OUTCOME_NAMES[self.current_batter().sample(self.rng)]
     
     def advance_runners(self, bases_advanced):
         """Advance runners on the bases"""
-        runs_scored = 0
-        
-        # Move runners
-        for i in range(len(self.bases) - 1, -1, -1):
-            if self.bases[i]:
-                new_position = i + bases_advanced
-                if new_position >= 3:
-                    runs_scored += 1
-                else:
-                    self.bases[new_position] = True
-                self.bases[i] = False
-        
+        outs, bases = divmod(self.state, 8)
+        bases, runs_scored = advance(bases, bases_advanced)
+        self.state = outs * 8 + bases
         return runs_scored
     
     def handle_batting_result(self, result):
         """Handle the result of a batting attempt"""
-        print(f"Result: {result}")
-        
-        if result == "Strikeout" or result == "Groundout" or result == "Flyout":
-            self.outs += 1
-            if self.outs >= 3:
-                self.end_half_inning()
-        elif result == "Single":
-            runs = self.advance_runners(1)
-            self.bases[0] = True
-            self.add_runs(runs)
-        elif result == "Double":
-            runs = self.advance_runners(2)
-            self.bases[1] = True
-            self.add_runs(runs)
-        elif result == "Triple":
-            runs = self.advance_runners(3)
-            self.bases[2] = True
-            self.add_runs(runs)
-        elif result == "Home Run":
-            runs = self.advance_runners(3) + 1  # Batter scores too
-            self.add_runs(runs)
-        elif result == "Walk":
-            runs = self.advance_runners(1)
-            self.bases[0] = True
+        if self.verbose:
+            self.output.write(f"Result: {result}")
+        self.handle_outcome(OUTCOME_CODES[result])
+    
+    def handle_outcome(self, outcome):
+        """Apply an outcome code with one lookup in the transition tables"""
+        self.plate_appearances += 1
+        self.batting_order[self.top_bottom] += 1
+        state = self.state
+        runs = RUNS_SCORED[state][outcome]
+        self.state = NEXT_STATE[state][outcome]
+        if self.events is not None:
+            self.events.record(self.game_id, self.inning, self.top_bottom == "Bottom",
+                               state >> 3, state & 0b111, outcome, runs)
+        if runs:
             self.add_runs(runs)
+        if self.state == END_OF_INNING:
+            self.end_half_inning()
     
     def add_runs(self, runs):
         """Add runs to the current batting team"""
         if self.top_bottom == "Top":
             self.away_score += runs
+            self.away_innings[self.inning - 1] += runs
         else:
             self.home_score += runs
+            self.home_innings[self.inning - 1] += runs
     
     def end_half_inning(self):
         """End the current half inning"""
-        self.outs = 0
-        self.bases = [False, False, False]
+        self.state = 0
         
         if self.top_bottom == "Top":
             self.top_bottom = "Bottom"
@@ -116,44 +372,62 @@ class BaseballGame:
     def play_inning(self):
         """Play a half inning"""
         while self.outs < 3 and not self.game_over:
-            self.print_scoreboard()
-            
-            if self.top_bottom == "Top":
-                print("Away team is batting...")
-            else:
-                print("Home team is batting...")
+            if self.verbose:
+                self.print_scoreboard()
+                
+                if self.top_bottom == "Top":
+                    self.output.write("Away team is batting...")
+                else:
+                    self.output.write("Home team is batting...")
             
-            input("Press Enter to swing the bat...")
+            if self.interactive:
+                input("Press Enter to swing the bat...")
             
             result = self.get_batting_result()
             self.handle_batting_result(result)
             
-            time.sleep(1)
+            if self.interactive:
+                time.sleep(1)
     
     def play_game(self):
-        """Play the full baseball game"""
-        print("Welcome to Baseball Game!")
-        print("You are playing as the Home team.")
-        print("The Away team will bat first.")
+        """Play the full baseball game and return its GameResult"""
+        if self.verbose:
+            self.output.write("Welcome to Baseball Game!")
+            self.output.write("You are playing as the Home team.")
+            self.output.write("The Away team will bat first.")
         
         while not self.game_over:
             self.play_inning()
         
-        self.print_final_score()
+        if self.verbose:
+            self.print_final_score()
+        return self.result()
+    
+    def result(self):
+        """Build the structured result of the game so far"""
+        if self.home_score > self.away_score:
+            winner = "Home"
+        elif self.away_score > self.home_score:
+            winner = "Away"
+        else:
+            winner = None
+        return GameResult(self.away_score, self.home_score, winner,
+                          list(self.away_innings), list(self.home_innings),
+                          self.plate_appearances)
     
     def print_final_score(self):
         """Print the final score and winner"""
-        print("\n" + "="*50)
-        print("GAME OVER!")
-        print(f"FINAL SCORE: Away {self.away_score} - Home {self.home_score}")
+        self.output.write("\n" + "="*50)
+        self.output.write("GAME OVER!")
+        self.output.write(f"FINAL SCORE: Away {self.away_score} - Home {self.home_score}")
         
         if self.home_score > self.away_score:
-            print("🏆 HOME TEAM WINS! 🏆")
+            self.output.write("🏆 HOME TEAM WINS! 🏆")
         elif self.away_score > self.home_score:
-            print("🏆 AWAY TEAM WINS! 🏆")
+            self.output.write("🏆 AWAY TEAM WINS! 🏆")
         else:
-            print("🤝 TIE GAME! 🤝")
-        print("="*50)
+            self.output.write("🤝 TIE GAME! 🤝")
+        self.output.write("="*50)
 
 def main():
     """Main function to run the baseball game"""
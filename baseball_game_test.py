@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Baseball Game Tests
+Tests for the outcome sampler, the base-out transition tables and run
+expectancy in baseball_game.
+"""
+
+import random
+import unittest
+from collections import Counter
+
+from baseball_game import (
+    BASE_OUT_STATES, BATTING_OUTCOMES, END_OF_INNING, HOME_RUN, NEXT_STATE, OUTCOME_NAMES,
+    RUNS_SCORED, STRIKEOUT, WALK, OutcomeSampler, outcome_probabilities, run_expectancy
+)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HITS = {"Single": 1, "Double": 2, "Triple": 3, "Home Run": 4, "Walk": 1}
+
+
+class TestOutcomeSampler(unittest.TestCase):
+    """Test cases for drawing outcomes from a distribution."""
+
+    def assertFrequencies(self, draws, probabilities, tolerance: float):
+        """Assert the share of each outcome code in draws matches probabilities."""
+        counts = Counter(int(draw) for draw in draws)
+        self.assertLessEqual(set(counts), set(range(len(probabilities))))
+        for code, probability in enumerate(probabilities):
+            self.assertAlmostEqual(counts[code] / len(draws), probability, delta=tolerance,
+                                   msg=OUTCOME_NAMES[code])
+
+    def test_probabilities(self):
+        """Test weights in every accepted form are normalised the same way."""
+        expected = [weight for _, weight in BATTING_OUTCOMES]
+        forms = (BATTING_OUTCOMES, dict(BATTING_OUTCOMES), expected,
+                 [(name, 10 * weight) for name, weight in BATTING_OUTCOMES])
+        for weights in forms:
+            sampler = OutcomeSampler(weights)
+            for actual, wanted in zip(sampler.probabilities, expected):
+                self.assertAlmostEqual(actual, wanted)
+        self.assertEqual(outcome_probabilities(), OutcomeSampler().probabilities)
+        self.assertEqual(OutcomeSampler({"Walk": 1}).probabilities[WALK], 1.0)
+
+    def test_invalid_weights(self):
+        """Test unknown outcomes and bad weights are refused."""
+        for weights in ({"Bunt": 1}, {"Walk": -1}, {"Walk": float("nan")}, {"Walk": 0},
+                        [1] * 9):
+            with self.assertRaises(ValueError):
+                OutcomeSampler(weights)
+        with self.assertRaises(ValueError):
+            OutcomeSampler({"Walk": 0.5}, normalize=False)
+
+    def test_alias_tables(self):
+        """Test the alias tables give back exactly the probabilities."""
+        for weights in (BATTING_OUTCOMES, {"Walk": 1, "Strikeout": 3}, [1] * 8,
+                        {"Home Run": 1e-6, "Flyout": 1}):
+            sampler = OutcomeSampler(weights)
+            total = [0.0] * sampler.size
+            for column in range(sampler.size):
+                total[column] += sampler.accept[column] / sampler.size
+                total[sampler.alias[column]] += (1 - sampler.accept[column]) / sampler.size
+            for actual, wanted in zip(total, sampler.probabilities):
+                self.assertAlmostEqual(actual, wanted, places=12)
+
+    def test_sample_frequencies(self):
+        """Test single draws follow the weights."""
+        rng = random.Random(7)
+        sampler = OutcomeSampler()
+        self.assertFrequencies([sampler.sample(rng) for _ in range(100000)],
+                               sampler.probabilities, 0.006)
+        draws = sampler.sample_many(100000, random.Random(8))
+        self.assertEqual(draws.typecode, "B")
+        self.assertFrequencies(draws, sampler.probabilities, 0.006)
+
+    def test_zero_weights_never_drawn(self):
+        """Test outcomes without weight never come up."""
+        sampler = OutcomeSampler({"Walk": 1, "Strikeout": 3})
+        draws = sampler.sample_many(20000, random.Random(1))
+        self.assertEqual(set(draws), {WALK, STRIKEOUT})
+        self.assertFrequencies(draws, sampler.probabilities, 0.015)
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_sample_many_numpy(self):
+        """Test vectorized draws follow the weights, skewed ones included."""
+        for weights in (BATTING_OUTCOMES, {"Home Run": 0.001, "Walk": 0.3, "Flyout": 0.699}):
+            sampler = OutcomeSampler(weights)
+            draws = sampler.sample_many(1000000, np.random.default_rng(3))
+            self.assertEqual(draws.shape, (1000000,))
+            probabilities = sampler.probabilities
+            counts = np.bincount(draws, minlength=len(probabilities))
+            for code, probability in enumerate(probabilities):
+                self.assertAlmostEqual(counts[code] / len(draws), probability, delta=0.002)
+                if probability == 0:
+                    self.assertEqual(counts[code], 0)
+
+
+class TestTransitions(unittest.TestCase):
+    """Test cases for the base-out state tables."""
+
+    def test_runners_are_conserved(self):
+        """Test every runner either stays on base or scores, and outs add one."""
+        for state in range(BASE_OUT_STATES):
+            outs, bases = divmod(state, 8)
+            for code, name in enumerate(OUTCOME_NAMES):
+                target, runs = NEXT_STATE[state][code], RUNS_SCORED[state][code]
+                if name in HITS:
+                    new_outs, new_bases = divmod(target, 8)
+                    self.assertEqual(new_outs, outs)
+                    self.assertEqual(bin(bases).count("1") + 1,
+                                     bin(new_bases).count("1") + runs, (state, name))
+                else:
+                    self.assertEqual(runs, 0)
+                    self.assertEqual(target, END_OF_INNING if outs == 2 else state + 8)
+
+    def test_examples(self):
+        """Test a few transitions by hand."""
+        bases_loaded = 0b111
+        self.assertEqual(RUNS_SCORED[bases_loaded][HOME_RUN], 4)
+        self.assertEqual(NEXT_STATE[bases_loaded][HOME_RUN], 0)
+        self.assertEqual(RUNS_SCORED[bases_loaded][WALK], 1)
+        self.assertEqual(NEXT_STATE[bases_loaded][WALK], bases_loaded)
+        self.assertEqual(NEXT_STATE[8 + 0b010][OUTCOME_NAMES.index("Single")], 8 + 0b101)
+        self.assertEqual(NEXT_STATE[16][STRIKEOUT], END_OF_INNING)
+
+
+class TestRunExpectancy(unittest.TestCase):
+    """Test cases for solving the half inning Markov chain."""
+
+    def test_home_runs_only(self):
+        """Test a coin flip between home runs and strikeouts averages 3 runs."""
+        probabilities = OutcomeSampler({"Home Run": 1, "Strikeout": 1}).probabilities
+        expectancy = run_expectancy(probabilities)
+        for outs in range(3):
+            self.assertAlmostEqual(expectancy[outs * 8], 3 - outs)
+        # A runner on third scores on the next home run, before the third out
+        self.assertAlmostEqual(expectancy[0b100], 3 + 1 - 2 ** -3)
+
+    def test_bellman_equation(self):
+        """Test each state's value is the expected runs plus next state's value."""
+        probabilities = outcome_probabilities()
+        expectancy = run_expectancy()
+        values = expectancy + [0.0]
+        for state in range(BASE_OUT_STATES):
+            expected = sum(p * (RUNS_SCORED[state][code] + values[NEXT_STATE[state][code]])
+                           for code, p in enumerate(probabilities))
+            self.assertAlmostEqual(expectancy[state], expected)
+        # More outs never mean more runs
+        for bases in range(8):
+            self.assertGreater(expectancy[bases], expectancy[8 + bases])
+            self.assertGreater(expectancy[8 + bases], expectancy[16 + bases])
+
+    def test_never_ends(self):
+        """Test an inning without outs is an error."""
+        with self.assertRaises(ValueError):
+            run_expectancy(OutcomeSampler({"Walk": 1}).probabilities)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Baseball Season
+Schedules a round-robin league season, plays every BaseballGame across a
+process pool with standings updated as results stream back, and runs many
+season replicates to estimate each team's odds of finishing on top.
+"""
+
+import argparse
+import os
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from baseball_game import BATTING_OUTCOMES, BaseballGame, OutcomeSampler
+
+# A team is a name and a batting order of OutcomeSamplers (None for the
+# league-average BATTING_OUTCOMES batter in every slot)
+Team = namedtuple("Team", ["name", "lineup"])
+
+# One scheduled game; game_id is its index in the schedule and picks its seed
+ScheduledGame = namedtuple("ScheduledGame", ["game_id", "day", "away", "home"])
+
+# A finished game as sent back by the workers; away/home are team indexes
+GameRecord = namedtuple("GameRecord", [
+    "game_id", "day", "away", "home", "away_score", "home_score"
+])
+
+
+def make_league(count, seed=0, spread=0.25):
+    """Build count teams of nine batters with randomly varied talent
+
+    Every batter's outcome weights are BATTING_OUTCOMES scaled by a factor
+    drawn from [1 - spread, 1 + spread] per outcome.
+    """
+    rng = random.Random(seed)
+    teams = []
+    for number in range(1, count + 1):
+        lineup = [
+            OutcomeSampler([(name, weight * rng.uniform(1 - spread, 1 + spread))
+                            for name, weight in BATTING_OUTCOMES])
+            for _ in range(9)
+        ]
+        teams.append(Team(f"Team {number}", lineup))
+    return teams
+
+
+def round_robin(teams, rounds=1):
+    """Schedule every pair of teams rounds times with the circle method
+
+    Each day every team plays at most once (one team sits out per day when
+    the count is odd). Teams alternate home and away from day to day, with
+    the fewest possible breaks in the pattern, and every pairing swaps home
+    and away from one round to the next.
+    """
+    slots = list(range(teams))
+    if teams % 2:
+        slots.insert(0, None)  # the bye takes the fixed slot
+    n = len(slots)
+    schedule = []
+    day = 0
+    for round_number in range(rounds):
+        order = list(slots)
+        for day_of_round in range(n - 1):
+            for i in range(n // 2):
+                away, home = order[i], order[n - 1 - i]
+                if away is None or home is None:
+                    continue
+                # A rotating team moves one slot a day, so flipping every
+                # other pair alternates it; the fixed slot flips by day
+                if (round_number + (day_of_round if i == 0 else i)) % 2:
+                    away, home = home, away
+                schedule.append(ScheduledGame(len(schedule), day, away, home))
+            day += 1
+            # Keep the first slot fixed and rotate the rest
+            order.insert(1, order.pop())
+    return schedule
+
+
+def game_seeds(seed, games):
+    """Split a master seed into one independent seed per game"""
+    master = random.Random(seed)
+    return [master.getrandbits(64) for _ in range(games)]
+
+
+class Standings:
+    """Win-loss table updated one game result at a time"""
+
+    def __init__(self, teams):
+        self.names = [team.name for team in teams]
+        count = len(teams)
+        self.wins = [0] * count
+        self.losses = [0] * count
+        self.ties = [0] * count
+        self.runs_for = [0] * count
+        self.runs_against = [0] * count
+        self.games = 0
+
+    def record(self, game):
+        """Fold one GameRecord into the table"""
+        self.games += 1
+        away, home = game.away, game.home
+        self.runs_for[away] += game.away_score
+        self.runs_against[away] += game.home_score
+        self.runs_for[home] += game.home_score
+        self.runs_against[home] += game.away_score
+        if game.home_score > game.away_score:
+            self.wins[home] += 1
+            self.losses[away] += 1
+        elif game.away_score > game.home_score:
+            self.wins[away] += 1
+            self.losses[home] += 1
+        else:
+            self.ties[away] += 1
+            self.ties[home] += 1
+
+    def percentage(self, team):
+        """Winning percentage, counting a tie as half a win"""
+        played = self.wins[team] + self.losses[team] + self.ties[team]
+        return (self.wins[team] + self.ties[team] / 2) / played if played else 0.0
+
+    def order(self):
+        """Team indexes from first to last; run differential breaks ties"""
+        return sorted(range(len(self.names)), key=lambda team: (
+            -self.percentage(team),
+            self.runs_against[team] - self.runs_for[team],
+            team,
+        ))
+
+    def format(self):
+        """The table as printable lines"""
+        lines = [f"{'TEAM':<12}{'W':>5}{'L':>5}{'T':>4}{'PCT':>7}{'RS':>7}{'RA':>7}"]
+        for team in self.order():
+            lines.append(f"{self.names[team]:<12}{self.wins[team]:>5}{self.losses[team]:>5}"
+                         f"{self.ties[team]:>4}{self.percentage(team):>7.3f}"
+                         f"{self.runs_for[team]:>7}{self.runs_against[team]:>7}")
+        return lines
+
+
+# Worker processes receive the league once through the pool initializer
+# and afterwards only team indexes and seeds per task
+_league = None
+
+
+def _init_worker(teams):
+    global _league
+    _league = teams
+
+
+def play_scheduled_game(teams, game, seed):
+    """Play one scheduled game silently and return its GameRecord"""
+    result = BaseballGame(interactive=False, rng=random.Random(seed),
+                          away_lineup=teams[game.away].lineup,
+                          home_lineup=teams[game.home].lineup).play_game()
+    return GameRecord(game.game_id, game.day, game.away, game.home,
+                      result.away_score, result.home_score)
+
+
+def _play_day(games, seeds):
+    return [play_scheduled_game(_league, game, seed) for game, seed in zip(games, seeds)]
+
+
+def _play_season(schedule, seed):
+    standings = Standings(_league)
+    for game, game_seed in zip(schedule, game_seeds(seed, len(schedule))):
+        standings.record(play_scheduled_game(_league, game, game_seed))
+    return standings.order()
+
+
+def new_pool(teams, workers=None):
+    """Process pool whose workers already hold the league
+
+    The pool remembers its league (as pool.league), and play_season and
+    season_odds refuse to run a different one on it.
+    """
+    pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                               initializer=_init_worker, initargs=(teams,))
+    pool.league = list(teams)
+    return pool
+
+
+def _check_pool(pool, teams):
+    league = getattr(pool, "league", None)
+    if league is None:
+        raise ValueError("Pools must come from new_pool(teams)")
+    if league != list(teams):
+        raise ValueError("Pool was built for a different league")
+
+
+def play_season(teams, schedule, seed=0, pool=None):
+    """Play a season and yield (GameRecord, Standings) as games finish
+
+    Games are sent to the pool one schedule day at a time and streamed back
+    in completion order; the standings object is updated in place before
+    each yield. Game results depend only on the master seed and the game's
+    place in the schedule, so the final standings are reproducible whatever
+    the pool size. Without a pool the games run in-process in order; a
+    pool must come from new_pool() for the same teams.
+    """
+    seeds = game_seeds(seed, len(schedule))
+    standings = Standings(teams)
+    if pool is not None:
+        _check_pool(pool, teams)
+
+    if pool is None:
+        for game in schedule:
+            record = play_scheduled_game(teams, game, seeds[game.game_id])
+            standings.record(record)
+            yield record, standings
+        return
+
+    days = {}
+    for game in schedule:
+        days.setdefault(game.day, []).append(game)
+    futures = [pool.submit(_play_day, games, [seeds[game.game_id] for game in games])
+               for games in days.values()]
+    for future in as_completed(futures):
+        for record in future.result():
+            standings.record(record)
+            yield record, standings
+
+
+def season_odds(teams, schedule, replicates, seed=0, pool=None, playoff_spots=4):
+    """Play many season replicates and return per-team finishing odds
+
+    Each replicate is one task with its own seed split from the master
+    seed. Returns {"first": [...], "playoffs": [...]} with one probability
+    per team, where playoffs means finishing in the top playoff_spots.
+    A pool must come from new_pool() for the same teams.
+    """
+    if pool is not None:
+        _check_pool(pool, teams)
+    seeds = game_seeds(seed, replicates)
+    first = [0] * len(teams)
+    playoffs = [0] * len(teams)
+
+    def tally(order):
+        first[order[0]] += 1
+        for team in order[:playoff_spots]:
+            playoffs[team] += 1
+
+    if pool is None:
+        _init_worker(teams)
+        for replicate_seed in seeds:
+            tally(_play_season(schedule, replicate_seed))
+    else:
+        futures = [pool.submit(_play_season, schedule, replicate_seed)
+                   for replicate_seed in seeds]
+        for future in as_completed(futures):
+            tally(future.result())
+    return {
+        "first": [count / replicates for count in first],
+        "playoffs": [count / replicates for count in playoffs],
+    }
+
+
+def main():
+    """Play a season, or many replicates of one, from the command line"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--teams", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=4,
+                        help="times every pair of teams meets")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--league-seed", type=int, default=0,
+                        help="seed for the teams' batting talent")
+    parser.add_argument("--replicates", type=int, default=1)
+    parser.add_argument("--playoff-spots", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (1 plays in-process)")
+    args = parser.parse_args()
+    if args.teams < 2:
+        parser.error("--teams must be at least 2")
+    if args.rounds < 1:
+        parser.error("--rounds must be at least 1")
+    if args.replicates < 1:
+        parser.error("--replicates must be at least 1")
+
+    teams = make_league(args.teams, seed=args.league_seed)
+    schedule = round_robin(args.teams, args.rounds)
+    pool = None if args.workers == 1 else new_pool(teams, args.workers)
+
+    start = time.perf_counter()
+    try:
+        if args.replicates == 1:
+            for record, standings in play_season(teams, schedule, args.seed, pool):
+                pass
+            elapsed = time.perf_counter() - start
+            print(f"Season: {standings.games} games in {elapsed:.2f}s "
+                  f"({standings.games / elapsed:,.0f} games/s)")
+            for line in standings.format():
+                print(line)
+        else:
+            odds = season_odds(teams, schedule, args.replicates, args.seed, pool,
+                               args.playoff_spots)
+            elapsed = time.perf_counter() - start
+            games = args.replicates * len(schedule)
+            print(f"Replicates: {args.replicates} seasons, {games:,} games in "
+                  f"{elapsed:.2f}s ({games / elapsed:,.0f} games/s)")
+            print(f"{'TEAM':<12}{'FIRST':>8}{'PLAYOFFS':>10}")
+            for team in sorted(range(len(teams)), key=lambda team: -odds["playoffs"][team]):
+                print(f"{teams[team].name:<12}{odds['first'][team]:>8.3f}"
+                      f"{odds['playoffs'][team]:>10.3f}")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
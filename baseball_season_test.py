@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Baseball Season Tests
+Tests for the round-robin schedule in baseball_season.
+"""
+
+import unittest
+from collections import Counter
+from itertools import combinations
+
+from baseball_season import game_seeds, round_robin
+
+
+def home_pattern(schedule, team: int) -> list:
+    """True for each of a team's games at home, in schedule order."""
+    return [game.home == team for game in schedule if team in (game.away, game.home)]
+
+
+class TestRoundRobin(unittest.TestCase):
+    """Test cases for scheduling a league."""
+
+    def test_every_pair_once_per_round(self):
+        """Test each pair meets once per round, alternating home and away."""
+        for teams in (2, 3, 4, 7, 10):
+            for rounds in (1, 2, 3):
+                schedule = round_robin(teams, rounds)
+                pairs = Counter(frozenset((game.away, game.home)) for game in schedule)
+                self.assertEqual(set(pairs), {frozenset(pair)
+                                              for pair in combinations(range(teams), 2)})
+                self.assertEqual(set(pairs.values()), {rounds})
+                self.assertEqual([game.game_id for game in schedule], list(range(len(schedule))))
+                for a, b in combinations(range(teams), 2):
+                    homes = [game.home for game in schedule if {game.away, game.home} == {a, b}]
+                    self.assertTrue(all(x != y for x, y in zip(homes, homes[1:])), (a, b))
+
+    def test_one_game_per_team_per_day(self):
+        """Test no team plays twice on a day and odd leagues rotate the bye."""
+        for teams in (5, 8):
+            schedule = round_robin(teams, 2)
+            days = {}
+            for game in schedule:
+                days.setdefault(game.day, []).extend((game.away, game.home))
+            for players in days.values():
+                self.assertEqual(len(players), len(set(players)))
+                self.assertEqual(len(players), teams - teams % 2)
+
+    def test_home_and_away_alternate(self):
+        """Test every team alternates home and away with few breaks."""
+        for teams in (4, 5, 6, 9, 10, 16):
+            schedule = round_robin(teams, 1)
+            breaks = 0
+            for team in range(teams):
+                pattern = home_pattern(schedule, team)
+                self.assertLessEqual(abs(2 * sum(pattern) - len(pattern)), 1, (teams, team))
+                team_breaks = sum(x == y for x, y in zip(pattern, pattern[1:]))
+                self.assertLessEqual(team_breaks, 1, (teams, team))
+                breaks += team_breaks
+            # The least a single round robin allows: none with a bye, else n - 2
+            self.assertEqual(breaks, 0 if teams % 2 else teams - 2)
+
+    def test_balanced_over_two_rounds(self):
+        """Test a double round robin gives every team as many home as away games."""
+        for teams in (4, 5, 10):
+            schedule = round_robin(teams, 2)
+            for team in range(teams):
+                pattern = home_pattern(schedule, team)
+                self.assertEqual(2 * sum(pattern), len(pattern))
+
+    def test_game_seeds(self):
+        """Test per-game seeds are reproducible and distinct."""
+        self.assertEqual(game_seeds(3, 100), game_seeds(3, 100))
+        self.assertEqual(len(set(game_seeds(3, 100))), 100)
+        self.assertNotEqual(game_seeds(3, 10), game_seeds(4, 10))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Baseball Monte Carlo Simulator
+Plays millions of non-interactive BaseballGame-rules games at once with
+vectorized outcome sampling and base-state transitions, and reports score
+distributions and win probabilities.
+"""
+
+import argparse
+import random
+import time
+
+from baseball_game import (
+    BATTING_OUTCOMES, END_OF_INNING, NEXT_STATE, RUNS_SCORED, OutcomeSampler,
+    run_expectancy
+)
+
+try:
+    import numpy as np
+except ImportError:  # fall back to the pure Python engine
+    np = None
+
+INNINGS = 9
+
+
+class SimulationResult:
+    """Aggregated results of a batch of simulated games"""
+
+    def __init__(self):
+        self.games = 0
+        self.home_wins = 0
+        self.away_wins = 0
+        self.ties = 0
+        self.away_runs = {}  # runs -> number of games
+        self.home_runs = {}
+        self.margins = {}    # home minus away -> number of games
+
+    @property
+    def home_win_probability(self):
+        return self.home_wins / self.games if self.games else 0.0
+
+    @property
+    def away_win_probability(self):
+        return self.away_wins / self.games if self.games else 0.0
+
+    @property
+    def tie_probability(self):
+        return self.ties / self.games if self.games else 0.0
+
+    def mean_runs(self, side):
+        """Average runs per game for "home" or "away" """
+        counts = self.home_runs if side == "home" else self.away_runs
+        return sum(runs * n for runs, n in counts.items()) / self.games if self.games else 0.0
+
+    def add(self, away, home):
+        """Fold per-game away/home run totals (sequences or arrays) into the result"""
+        if np is not None and isinstance(away, np.ndarray):
+            margin = home.astype(np.int64) - away
+            self.games += len(away)
+            self.home_wins += int(np.count_nonzero(margin > 0))
+            self.away_wins += int(np.count_nonzero(margin < 0))
+            self.ties += int(np.count_nonzero(margin == 0))
+            for counts, values in ((self.away_runs, away), (self.home_runs, home),
+                                   (self.margins, margin)):
+                keys, n = np.unique(values, return_counts=True)
+                for key, count in zip(keys.tolist(), n.tolist()):
+                    counts[key] = counts.get(key, 0) + count
+            return
+
+        for away_score, home_score in zip(away, home):
+            margin = home_score - away_score
+            self.games += 1
+            if margin > 0:
+                self.home_wins += 1
+            elif margin < 0:
+                self.away_wins += 1
+            else:
+                self.ties += 1
+            self.away_runs[away_score] = self.away_runs.get(away_score, 0) + 1
+            self.home_runs[home_score] = self.home_runs.get(home_score, 0) + 1
+            self.margins[margin] = self.margins.get(margin, 0) + 1
+
+
+def simulate_half_innings_numpy(count, sampler, rng):
+    """Runs scored in count independent half innings, vectorized with NumPy"""
+    # Flattened transition tables indexed by state * 8 + outcome
+    next_state = np.array(NEXT_STATE, dtype=np.intp).ravel()
+    runs_scored = np.array(RUNS_SCORED, dtype=np.int16).ravel()
+
+    # Work on compact arrays of the unfinished half innings only; finished
+    # ones are written out and dropped after every plate appearance
+    results = np.zeros(count, dtype=np.int16)
+    index = np.arange(count)
+    runs = np.zeros(count, dtype=np.int16)
+    state = np.zeros(count, dtype=np.intp)
+
+    while index.size:
+        key = (state << 3) | sampler.sample_many(index.size, rng)
+        runs += runs_scored[key]
+        state = next_state[key]
+
+        done = state == END_OF_INNING
+        if done.any():
+            results[index[done]] = runs[done]
+            playing = ~done
+            index, runs, state = index[playing], runs[playing], state[playing]
+    return results
+
+
+def simulate_half_innings_python(count, sampler, rng):
+    """Runs scored in count independent half innings, one plate appearance at a time"""
+    sample = sampler.sample
+    results = []
+    for _ in range(count):
+        runs = state = 0
+        while state != END_OF_INNING:
+            outcome = sample(rng)
+            runs += RUNS_SCORED[state][outcome]
+            state = NEXT_STATE[state][outcome]
+        results.append(runs)
+    return results
+
+
+def simulate_games(games, outcomes=BATTING_OUTCOMES, seed=None, innings=INNINGS,
+                   batch_size=250000, use_numpy=True):
+    """Simulate full games and return a SimulationResult
+
+    Every game plays all of its innings (the bottom of the last inning is
+    played even when the home team leads, and ties stand) exactly as
+    BaseballGame does, so the half innings are independent and are
+    simulated in bulk, batch_size games at a time. outcomes is anything
+    OutcomeSampler accepts, or an OutcomeSampler.
+    """
+    sampler = outcomes if isinstance(outcomes, OutcomeSampler) else OutcomeSampler(outcomes)
+    result = SimulationResult()
+    vectorized = use_numpy and np is not None
+    rng = np.random.default_rng(seed) if vectorized else random.Random(seed)
+
+    remaining = games
+    while remaining > 0:
+        batch = min(batch_size, remaining)
+        remaining -= batch
+        halves = batch * innings * 2
+        if vectorized:
+            runs = simulate_half_innings_numpy(halves, sampler, rng)
+            # Half innings are laid out game by game, top then bottom
+            runs = runs.reshape(batch, innings, 2).sum(axis=1, dtype=np.int32)
+            result.add(runs[:, 0], runs[:, 1])
+        else:
+            runs = simulate_half_innings_python(halves, sampler, rng)
+            away = [sum(runs[i:i + innings * 2:2]) for i in range(0, halves, innings * 2)]
+            home = [sum(runs[i + 1:i + innings * 2:2]) for i in range(0, halves, innings * 2)]
+            result.add(away, home)
+    return result
+
+
+def main():
+    """Run a Monte Carlo batch from the command line"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--games", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--pure-python", action="store_true",
+                        help="use the pure Python engine even if NumPy is installed")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = simulate_games(args.games, seed=args.seed, use_numpy=not args.pure_python)
+    elapsed = time.perf_counter() - start
+
+    print("=" * 50)
+    print(f"GAMES: {result.games:,} in {elapsed:.2f}s ({result.games / elapsed:,.0f} games/s)")
+    print(f"HOME WIN: {result.home_win_probability:.4f}  "
+          f"AWAY WIN: {result.away_win_probability:.4f}  "
+          f"TIE: {result.tie_probability:.4f}")
+    print(f"MEAN RUNS: Away {result.mean_runs('away'):.3f} - Home {result.mean_runs('home'):.3f}")
+    print(f"EXACT MEAN RUNS (Markov chain): {run_expectancy()[0] * INNINGS:.3f}")
+    print("MOST COMMON MARGINS (home - away):")
+    for margin, count in sorted(result.margins.items(), key=lambda item: -item[1])[:5]:
+        print(f"  {margin:+d}: {count / result.games:.4f}")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
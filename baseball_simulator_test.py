@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Baseball Simulator Tests
+Tests that the Monte Carlo simulators agree with the exact run expectancy
+from baseball_game.
+"""
+
+import random
+import statistics
+import unittest
+
+from baseball_game import BaseballGame, OutcomeSampler, run_expectancy
+from baseball_simulator import (
+    INNINGS, SimulationResult, np, simulate_games, simulate_half_innings_numpy,
+    simulate_half_innings_python
+)
+
+SKEWED = {"Home Run": 1, "Single": 2, "Strikeout": 3, "Walk": 1}
+
+
+class TestHalfInnings(unittest.TestCase):
+    """Test cases for the mean runs of simulated half innings."""
+
+    def assertMeanRuns(self, runs, sampler: OutcomeSampler, sigmas: float = 5.0):
+        """Assert the mean of runs is within sigmas standard errors of run expectancy."""
+        expected = run_expectancy(sampler.probabilities)[0]
+        error = statistics.pstdev(runs) / len(runs) ** 0.5
+        self.assertAlmostEqual(statistics.fmean(runs), expected, delta=sigmas * error)
+
+    def test_python(self):
+        """Test the pure Python simulator."""
+        for weights in (None, SKEWED):
+            sampler = OutcomeSampler() if weights is None else OutcomeSampler(weights)
+            runs = simulate_half_innings_python(40000, sampler, random.Random(11))
+            self.assertEqual(len(runs), 40000)
+            self.assertGreaterEqual(min(runs), 0)
+            self.assertMeanRuns(runs, sampler)
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_numpy(self):
+        """Test the vectorized simulator."""
+        for weights in (None, SKEWED):
+            sampler = OutcomeSampler() if weights is None else OutcomeSampler(weights)
+            runs = simulate_half_innings_numpy(400000, sampler, np.random.default_rng(11))
+            self.assertEqual(runs.shape, (400000,))
+            self.assertGreaterEqual(runs.min(), 0)
+            self.assertMeanRuns(runs.tolist(), sampler)
+
+    def test_home_runs_only(self):
+        """Test a distribution whose run expectancy is known by hand."""
+        sampler = OutcomeSampler({"Home Run": 1, "Strikeout": 1})
+        runs = simulate_half_innings_python(20000, sampler, random.Random(5))
+        self.assertAlmostEqual(statistics.fmean(runs), 3.0, delta=0.1)
+
+
+class TestSimulateGames(unittest.TestCase):
+    """Test cases for whole simulated games."""
+
+    def check(self, result: SimulationResult, games: int):
+        """Assert totals add up and mean runs match nine innings of run expectancy."""
+        expected = INNINGS * run_expectancy()[0]
+        self.assertEqual(result.games, games)
+        self.assertEqual(result.home_wins + result.away_wins + result.ties, games)
+        self.assertEqual(sum(result.home_runs.values()), games)
+        self.assertAlmostEqual(result.home_win_probability + result.away_win_probability
+                               + result.tie_probability, 1.0)
+        for side, counts in (("home", result.home_runs), ("away", result.away_runs)):
+            runs = [value for value, n in counts.items() for _ in range(n)]
+            self.assertAlmostEqual(result.mean_runs(side), statistics.fmean(runs))
+            error = statistics.pstdev(runs) / games ** 0.5
+            self.assertAlmostEqual(statistics.fmean(runs), expected, delta=5 * error)
+
+    def test_python(self):
+        """Test games from the pure Python engine, in uneven batches."""
+        result = simulate_games(3000, seed=2, batch_size=700, use_numpy=False)
+        self.check(result, 3000)
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_numpy(self):
+        """Test games from the vectorized engine, in uneven batches."""
+        result = simulate_games(30000, seed=2, batch_size=7000)
+        self.check(result, 30000)
+        again = simulate_games(30000, seed=2, batch_size=7000)
+        self.assertEqual(again.margins, result.margins)
+
+    def test_baseball_game(self):
+        """Test BaseballGame itself scores like the simulators."""
+        rng = random.Random(4)
+        results = [BaseballGame(interactive=False, rng=rng).play_game() for _ in range(1500)]
+        expected = INNINGS * run_expectancy()[0]
+        for runs in ([game.away_score for game in results], [game.home_score for game in results]):
+            error = statistics.pstdev(runs) / len(runs) ** 0.5
+            self.assertAlmostEqual(statistics.fmean(runs), expected, delta=5 * error)
+
+    def test_empty(self):
+        """Test an empty result reports zeros."""
+        result = SimulationResult()
+        self.assertEqual((result.home_win_probability, result.mean_runs("home")), (0.0, 0.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Calculator Benchmark
+Measures operations per second and per-operation latency percentiles of
+every Calculator operation over the scalar, batch and cached paths with
+int, float and large-int inputs, writes the results as JSON and compares
+a run against a stored baseline to flag regressions. Also compares the
+throughput of the numeric backends.
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from array import array
+
+from calculator_test import BACKENDS, CachingCalculator, Calculator, ResultCache, np
+
+OPERATIONS = ("add", "subtract", "multiply", "divide", "power", "square_root")
+INPUTS = ("int", "float", "large-int")
+PATHS = ("scalar", "batch", "cached")
+
+# Distinct operand pairs the cached path cycles through, so that after the
+# first pass every call is a cache hit
+CACHED_OPERANDS = 64
+
+FORMAT_VERSION = 1
+
+
+def make_operands(kind, count, seed=0):
+    """Seeded (left, right, exponent) operand lists of one input kind
+
+    Operands are positive and non-zero so no operation raises, and
+    exponents stay small so no result overflows.
+    """
+    rng = random.Random(f"{kind}:{seed}")
+    if kind == "int":
+        left = [rng.randint(1, 10000) for _ in range(count)]
+        right = [rng.randint(1, 10000) for _ in range(count)]
+        exponents = [rng.randint(0, 5) for _ in range(count)]
+    elif kind == "float":
+        left = [rng.uniform(0.5, 100.0) for _ in range(count)]
+        right = [rng.uniform(0.5, 100.0) for _ in range(count)]
+        exponents = [rng.uniform(0.5, 3.0) for _ in range(count)]
+    elif kind == "large-int":
+        # About 250 digits: big enough for multi-limb arithmetic, small
+        # enough that square_root's float result does not overflow
+        left = [rng.getrandbits(830) | 1 for _ in range(count)]
+        right = [rng.getrandbits(830) | 1 for _ in range(count)]
+        exponents = [rng.randint(2, 4) for _ in range(count)]
+    else:
+        raise ValueError(f"Unknown input kind {kind!r}")
+    return left, right, exponents
+
+
+def operation_columns(name, operands):
+    """Argument columns for one operation"""
+    left, right, exponents = operands
+    if name == "square_root":
+        return (left,)
+    if name == "power":
+        return (left, exponents)
+    return (left, right)
+
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def time_samples(run, chunks, min_time, min_samples=20):
+    """Time run(chunk) over the chunks in turn; per-operation ns per sample"""
+    samples = []
+    start = time.perf_counter()
+    index = 0
+    while len(samples) < min_samples or time.perf_counter() - start < min_time:
+        chunk = chunks[index % len(chunks)]
+        index += 1
+        began = time.perf_counter_ns()
+        run(chunk)
+        samples.append((time.perf_counter_ns() - began) / chunk[1])
+    return samples
+
+
+def summarize_samples(samples):
+    """ops/sec and latency percentiles from per-operation sample times"""
+    ordered = sorted(samples)
+    mean = sum(ordered) / len(ordered)
+    return {
+        "ops_per_sec": 1e9 / mean if mean else 0.0,
+        "mean_ns": mean,
+        "p50_ns": percentile(ordered, 0.50),
+        "p90_ns": percentile(ordered, 0.90),
+        "p99_ns": percentile(ordered, 0.99),
+        "samples": len(ordered),
+    }
+
+
+def benchmark_case(path, name, kind, count=10000, group=100, seed=0, min_time=0.2):
+    """Measure one operation on one path and input kind
+
+    Each sample times a group of operations (one batch call of group
+    elements on the batch path) and records the time per operation, since
+    single calls are too short to time reliably; the percentiles are over
+    those samples.
+    """
+    if group < 1 or count < group:
+        raise ValueError("count must be at least group, and group at least 1")
+    operands = make_operands(kind, count, seed)
+    columns = operation_columns(name, operands)
+
+    if path == "scalar":
+        method = getattr(Calculator(), name)
+    elif path == "cached":
+        calc = CachingCalculator(ResultCache(), cached=OPERATIONS)
+        method = getattr(calc, name)
+        columns = [column[:CACHED_OPERANDS] * (count // CACHED_OPERANDS + 1)
+                   for column in columns]
+        for args in zip(*(column[:CACHED_OPERANDS] for column in columns)):
+            method(*args)  # warm the cache
+    elif path == "batch":
+        method = getattr(Calculator(), name + "_many")
+        if kind == "float":
+            columns = [array("d", column) for column in columns]
+    else:
+        raise ValueError(f"Unknown path {path!r}")
+
+    chunks = []
+    for start in range(0, count - group + 1, group):
+        chunk = [column[start:start + group] for column in columns]
+        chunks.append((chunk if path == "batch" else list(zip(*chunk)), group))
+
+    if path == "batch":
+        def run(chunk):
+            method(*chunk[0])
+    else:
+        def run(chunk):
+            for args in chunk[0]:
+                method(*args)
+
+    return summarize_samples(time_samples(run, chunks, min_time))
+
+
+def run_suite(paths=PATHS, inputs=INPUTS, operations=OPERATIONS, count=10000,
+              group=100, seed=0, min_time=0.1, rounds=3, progress=None):
+    """Benchmark every path/input/operation case and return a JSON-ready dict
+
+    The whole set of cases is measured rounds times over, interleaved so a
+    burst of noise on the machine hits different cases in different
+    rounds, and each case keeps its round with the lowest median latency.
+    """
+    cases = [(path, kind, name) for path in paths for kind in inputs for name in operations]
+    results = {}
+    for _ in range(rounds):
+        for path, kind, name in cases:
+            case = f"{path}/{kind}/{name}"
+            result = benchmark_case(path, name, kind, count, group, seed, min_time)
+            if case not in results or result["p50_ns"] < results[case]["p50_ns"]:
+                results[case] = result
+    if progress is not None:
+        for case, result in results.items():
+            progress(case, result)
+    return {
+        "version": FORMAT_VERSION,
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "numpy": np.__version__ if np is not None else None,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "count": count,
+            "group": group,
+            "seed": seed,
+            "rounds": rounds,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=0.10):
+    """Compare two suite results case by case
+
+    Throughput is judged from the median latency (1e9 / p50_ns), which is
+    far less sensitive to scheduler noise than the mean. Returns a list of
+    (case, baseline ops/sec, current ops/sec, change, status) where change
+    is the relative change in that throughput and status is "regression"
+    when it dropped by more than threshold, "improvement" when it rose by
+    more than threshold and "ok" otherwise. Cases missing from either run
+    are skipped.
+    """
+    rows = []
+    for case, before in baseline["results"].items():
+        after = current["results"].get(case)
+        if after is None:
+            continue
+        old, new = 1e9 / before["p50_ns"], 1e9 / after["p50_ns"]
+        change = (new - old) / old
+        if change < -threshold:
+            status = "regression"
+        elif change > threshold:
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append((case, old, new, change, status))
+    return rows
+
+
+def benchmark_backends(count=10000, seed=0, backends=tuple(BACKENDS), min_time=0.2):
+    """Return {backend: {operation: operations per second}} on float inputs"""
+    operands = make_operands("float", count, seed)
+    # Exact backends take floats at their repr; round so those stay short
+    operands = tuple([round(value, 6) for value in column] for column in operands)
+    results = {}
+    for backend in backends:
+        calc = Calculator(backend=backend)
+        results[backend] = {}
+        for name in OPERATIONS:
+            method = getattr(calc, name)
+            columns = operation_columns(name, operands)
+            calls = 0
+            start = time.perf_counter()
+            while True:
+                for args in zip(*columns):
+                    method(*args)
+                calls += count
+                elapsed = time.perf_counter() - start
+                if elapsed >= min_time:
+                    break
+            results[backend][name] = calls / elapsed
+    return results
+
+
+def main():
+    """Run the benchmark suite, compare two runs or compare backends"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the suite and write JSON results")
+    run.add_argument("--output", "-o", help="JSON file to write (default: stdout)")
+    run.add_argument("--path", action="append", choices=PATHS)
+    run.add_argument("--input", action="append", choices=INPUTS)
+    run.add_argument("--operation", action="append", choices=OPERATIONS)
+    run.add_argument("--count", type=int, default=10000, help="distinct operands per case")
+    run.add_argument("--group", type=int, default=100, help="operations per timed sample")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--min-time", type=float, default=0.1,
+                     help="seconds to sample each case for at least, per round")
+    run.add_argument("--rounds", type=int, default=3,
+                     help="interleaved rounds; the best round of each case is kept")
+
+    check = commands.add_parser("compare", help="flag regressions against a baseline")
+    check.add_argument("baseline")
+    check.add_argument("current")
+    check.add_argument("--threshold", type=float, default=0.10,
+                       help="relative throughput drop that counts as a regression")
+
+    backends = commands.add_parser("backends", help="compare numeric backends")
+    backends.add_argument("--count", type=int, default=10000)
+    backends.add_argument("--seed", type=int, default=0)
+    backends.add_argument("--min-time", type=float, default=0.2)
+    backends.add_argument("--backend", action="append", choices=sorted(BACKENDS))
+    args = parser.parse_args()
+
+    if args.command == "run":
+        if args.group < 1 or args.count < args.group:
+            parser.error("run needs --group >= 1 and --count >= --group")
+
+        def progress(case, result):
+            print(f"{case:<28} {result['ops_per_sec']:>14,.0f} ops/s  "
+                  f"p50 {result['p50_ns']:>9,.0f} ns  p99 {result['p99_ns']:>9,.0f} ns",
+                  file=sys.stderr)
+
+        suite = run_suite(args.path or PATHS, args.input or INPUTS,
+                          args.operation or OPERATIONS, args.count, args.group,
+                          args.seed, args.min_time, args.rounds, progress)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(suite, f, indent=2)
+        else:
+            json.dump(suite, sys.stdout, indent=2)
+            print()
+        return
+
+    if args.command == "compare":
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        rows = compare(baseline, current, args.threshold)
+        regressions = 0
+        for case, old, new, change, status in rows:
+            regressions += status == "regression"
+            flag = {"regression": "REGRESSION", "improvement": "faster"}.get(status, "")
+            print(f"{case:<28} {old:>14,.0f} -> {new:>14,.0f} ops/s  {change:>+7.1%}  {flag}")
+        print(f"{len(rows)} cases compared, {regressions} regressed "
+              f"by more than {args.threshold:.0%}")
+        sys.exit(1 if regressions else 0)
+
+    names = args.backend or list(BACKENDS)
+    results = benchmark_backends(args.count, args.seed, names, args.min_time)
+    print("Calculator Backends (operations per second)")
+    print("=" * (12 + 13 * len(names)))
+    print(f"{'':<12}" + "".join(f"{backend:>13}" for backend in names))
+    for name in OPERATIONS:
+        print(f"{name:<12}" + "".join(f"{results[backend][name]:>13,.0f}"
+                                      for backend in names))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Calculator Server
+A long-running calculator service: reads a newline-delimited stream of
+operations from stdin or a local socket, evaluates them with Calculator
+semantics and writes one JSON result line per request, in request order.
+
+Each line is either a JSON object
+
+    {"id": 1, "op": "divide", "args": [7, 3]}
+    {"id": 2, "expr": "(a + b) ^ 2 / sqrt(c)", "vars": {"a": 1, "b": 2, "c": 9}}
+
+or a reverse Polish expression such as "3 4 + 2 ^ sqrt". Responses echo the
+request id and carry either "result" or "error".
+
+Requests are pipelined: clients may send any number of lines without
+waiting, at most --max-pending of them are in flight at once, and reading
+pauses while the output is not being drained, so memory stays bounded.
+"""
+
+import argparse
+import asyncio
+import decimal
+import json
+import math
+import os
+import stat
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+from functools import partial
+
+from calculator_test import BACKENDS, Calculator, CompiledExpression
+
+OPERATIONS = {
+    "add": 2,
+    "subtract": 2,
+    "multiply": 2,
+    "divide": 2,
+    "power": 2,
+    "square_root": 1,
+    "sqrt": 1,
+}
+
+RPN_OPERATORS = {"+": "add", "-": "subtract", "*": "multiply", "/": "divide",
+                 "^": "power", "**": "power", "sqrt": "square_root"}
+
+MAX_LINE = 64 * 1024          # longest request line accepted, in bytes
+MAX_RESULT_BITS = 14000       # largest integer product or power computed, in bits;
+                              # about Python's 4300-digit int-to-str limit
+MAX_SAFE_INTEGER = 2 ** 53    # larger ints are sent as strings
+EXPRESSION_CACHE = 256        # compiled expressions kept per evaluator
+
+
+class Evaluator:
+    """Turns request lines into response dicts with one Calculator"""
+
+    def __init__(self, calculator=None, max_result_bits=MAX_RESULT_BITS):
+        self.calculator = calculator if calculator is not None else Calculator()
+        self.max_result_bits = max_result_bits
+        self.expressions = OrderedDict()  # text -> CompiledExpression, LRU
+
+    def handle(self, line):
+        """Evaluate one request line and return its response dict"""
+        request_id = None
+        try:
+            text = line.decode() if isinstance(line, bytes) else line
+            text = text.strip()
+            if text.startswith("{"):
+                request = json.loads(text)
+                request_id = request.get("id")
+                result = self.evaluate_request(request)
+            else:
+                result = self.evaluate_rpn(text)
+            response = {"result": encode_number(result)}
+        except RecursionError:
+            response = {"error": "Expression nested too deeply"}
+        except Exception as error:  # any bad request must not take the server down
+            response = {"error": str(error) or type(error).__name__}
+        if request_id is not None:
+            response = {"id": request_id, **response}
+        return response
+
+    def evaluate_request(self, request):
+        if "expr" in request:
+            text, bindings = request["expr"], request.get("vars") or {}
+            if not isinstance(text, str):
+                raise ValueError("expr must be a string")
+            if not isinstance(bindings, dict):
+                raise ValueError("vars must be an object")
+            for value in bindings.values():
+                check_number(value)
+            return self.expression(text).evaluate(bindings)
+        name = request.get("op")
+        args = request.get("args", [])
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation {name!r}")
+        if not isinstance(args, list) or len(args) != OPERATIONS[name]:
+            raise ValueError(f"{name} takes {OPERATIONS[name]} argument(s)")
+        return self.apply("square_root" if name == "sqrt" else name, args)
+
+    def evaluate_rpn(self, text):
+        stack = []
+        for token in text.split():
+            name = RPN_OPERATORS.get(token.lower())
+            if name is None:
+                stack.append(parse_number(token))
+                continue
+            arity = OPERATIONS[name]
+            if len(stack) < arity:
+                raise ValueError(f"Not enough operands for {token!r}")
+            args = stack[-arity:]
+            del stack[-arity:]
+            stack.append(self.apply(name, args))
+        if len(stack) != 1:
+            raise ValueError("RPN expression must leave exactly one value")
+        return stack[0]
+
+    def apply(self, name, args):
+        for arg in args:
+            check_number(arg)
+        # Refuse exact results that alone would blow the memory budget
+        if name == "power":
+            base, exponent = (self.exact(arg) for arg in args)
+            if (base is not None and exponent is not None and abs(exponent) > 1
+                    and exact_bits(base) * abs(exponent) > self.max_result_bits):
+                raise ValueError("Result too large")
+        elif name == "multiply":
+            left, right = (self.exact(arg) for arg in args)
+            if (left is not None and right is not None
+                    and exact_bits(left) + exact_bits(right) > self.max_result_bits):
+                raise ValueError("Result too large")
+        return getattr(self.calculator, name)(*args)
+
+    def exact(self, value):
+        """value as the backend will compute with it, if that is exact
+        (int or Fraction), else None"""
+        convert = getattr(self.calculator.backend, "convert", None)
+        if convert is not None:
+            # Exact backends turn every operand, floats included, into a Fraction
+            value = convert(value)
+            return value if isinstance(value, Fraction) else None
+        return value if isinstance(value, int) else None
+
+    def call(self, name, *args):
+        return self.apply(name, args)
+
+    def expression(self, text):
+        compiled = self.expressions.get(text)
+        if compiled is None:
+            compiled = CompiledExpression(text, self.calculator,
+                                          lambda name: partial(self.call, name))
+            self.expressions[text] = compiled
+            if len(self.expressions) > EXPRESSION_CACHE:
+                self.expressions.popitem(last=False)
+        else:
+            self.expressions.move_to_end(text)
+        return compiled
+
+
+def check_number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float, decimal.Decimal, Fraction)):
+        raise ValueError(f"Not a number: {value!r}")
+
+
+def exact_bits(value):
+    """Size in bits of an int or Fraction"""
+    return max(value.numerator.bit_length(), value.denominator.bit_length())
+
+
+def parse_number(token):
+    try:
+        return int(token)
+    except ValueError:
+        pass
+    try:
+        return float(token)
+    except ValueError:
+        raise ValueError(f"Not a number or operator: {token!r}") from None
+
+
+def encode_number(value):
+    """JSON-friendly form of a result
+
+    Exact backend values and ints beyond what JSON clients hold exactly
+    become strings; non-finite and complex results are errors.
+    """
+    if isinstance(value, complex):
+        raise ValueError("Result is complex")
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise ValueError("Result is not finite")
+        return value
+    if isinstance(value, decimal.Decimal) and not value.is_finite():
+        raise ValueError("Result is not finite")
+    if isinstance(value, (decimal.Decimal, Fraction)):
+        return str(value)
+    if isinstance(value, int) and abs(value) > MAX_SAFE_INTEGER:
+        return str(value)  # ValueError past the int-to-str digit limit
+    return value
+
+
+def encode_response(response):
+    try:
+        text = json.dumps(response, separators=(",", ":"), allow_nan=False)
+    except (ValueError, TypeError) as error:
+        text = json.dumps({"error": f"Unencodable response: {error}"})
+    return (text + "\n").encode()
+
+
+# Worker processes evaluate with their own Evaluator built by the initializer
+_worker = None
+
+
+def _init_worker(backend, max_result_bits):
+    global _worker
+    _worker = Evaluator(Calculator(backend=backend), max_result_bits)
+
+
+def _handle_in_worker(line):
+    return _worker.handle(line)
+
+
+async def serve_stream(reader, writer, evaluator, max_pending=1024, executor=None):
+    """Answer every request line from reader on writer, in order
+
+    Responses are queued in request order; the queue holds at most
+    max_pending entries, so reading stops while the writer falls behind.
+    With an executor each request is evaluated there and several can be
+    in flight at once.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(max_pending)
+
+    async def write_responses():
+        while True:
+            # Take everything queued so far and write it with a single drain
+            items = [await queue.get()]
+            while not queue.empty():
+                items.append(queue.get_nowait())
+            chunk = []
+            for item in items:
+                if item is None:
+                    writer.write(b"".join(chunk))
+                    return
+                if isinstance(item, asyncio.Future):
+                    if chunk and not item.done():
+                        # Send what is ready before waiting on a slow request
+                        writer.write(b"".join(chunk))
+                        chunk = []
+                        await writer.drain()
+                    item = await item
+                chunk.append(encode_response(item))
+            writer.write(b"".join(chunk))
+            await writer.drain()
+
+    writing = asyncio.create_task(write_responses())
+    try:
+        while True:
+            try:
+                line = await reader.readuntil(b"\n")
+            except asyncio.IncompleteReadError as error:
+                line = error.partial  # last line without a newline, or EOF
+            except asyncio.LimitOverrunError:
+                # Longer than the reader's limit: drop the rest of it too, so
+                # the tail is not taken for a request of its own
+                await skip_line(reader)
+                await queue.put({"error": "Line too long"})
+                continue
+            if not line:
+                break
+            if not line.strip():
+                continue
+            if executor is None:
+                await queue.put(evaluator.handle(line))
+            else:
+                await queue.put(loop.run_in_executor(executor, _handle_in_worker, line))
+            if writing.done():
+                break  # the writer failed, e.g. the peer went away
+    finally:
+        if not writing.done():
+            await queue.put(None)
+        await writing
+
+
+async def skip_line(reader):
+    """Discard input up to and including the next newline"""
+    while True:
+        try:
+            await reader.readuntil(b"\n")
+            return
+        except asyncio.IncompleteReadError:
+            return
+        except asyncio.LimitOverrunError as error:
+            # error.consumed bytes are known to hold no newline
+            await reader.readexactly(error.consumed)
+
+
+class FileWriter:
+    """StreamWriter stand-in for outputs asyncio cannot watch (regular files)"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, data):
+        self.stream.write(data)
+
+    async def drain(self):
+        self.stream.flush()
+
+    def close(self):
+        self.stream.flush()
+
+
+def feed_from_thread(reader, stream, loop):
+    """Feed a StreamReader from a blocking file in a background thread"""
+    def pump():
+        while True:
+            chunk = stream.read1(MAX_LINE) if hasattr(stream, "read1") else stream.read(MAX_LINE)
+            if not chunk:
+                break
+            loop.call_soon_threadsafe(reader.feed_data, chunk)
+        loop.call_soon_threadsafe(reader.feed_eof)
+    threading.Thread(target=pump, daemon=True).start()
+
+
+async def serve_stdio(evaluator, max_pending, executor):
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=MAX_LINE)
+    try:
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    except (ValueError, OSError):  # a regular file; epoll cannot watch it
+        feed_from_thread(reader, sys.stdin.buffer, loop)
+    try:
+        transport, protocol = await loop.connect_write_pipe(
+            asyncio.streams.FlowControlMixin, sys.stdout)
+        writer = asyncio.StreamWriter(transport, protocol, None, loop)
+    except (ValueError, OSError):
+        writer = FileWriter(sys.stdout.buffer)
+    try:
+        await serve_stream(reader, writer, evaluator, max_pending, executor)
+    except ConnectionError:  # stdout was closed by the consumer
+        return
+    writer.close()
+
+
+async def serve_socket(evaluator, max_pending, executor, path=None, port=None):
+    async def client(reader, writer):
+        try:
+            await serve_stream(reader, writer, evaluator, max_pending, executor)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    if path is not None:
+        server = await asyncio.start_unix_server(client, path, limit=MAX_LINE)
+    else:
+        server = await asyncio.start_server(client, "127.0.0.1", port, limit=MAX_LINE)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    """Serve calculations on stdin/stdout or a local socket"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    where = parser.add_mutually_exclusive_group()
+    where.add_argument("--unix", metavar="PATH", help="listen on a Unix domain socket")
+    where.add_argument("--port", type=int, help="listen on 127.0.0.1:PORT")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="native")
+    parser.add_argument("--max-pending", type=int, default=1024,
+                        help="requests in flight per stream before reading pauses")
+    parser.add_argument("--max-result-bits", type=int, default=MAX_RESULT_BITS)
+    parser.add_argument("--workers", type=int, default=0,
+                        help="evaluate in this many worker processes (0: in the event "
+                             "loop); only worth it when requests are expensive")
+    args = parser.parse_args()
+
+    evaluator = Evaluator(Calculator(backend=args.backend), args.max_result_bits)
+    executor = None
+    if args.workers:
+        executor = ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                       initargs=(args.backend, args.max_result_bits))
+    try:
+        if args.unix is None and args.port is None:
+            asyncio.run(serve_stdio(evaluator, args.max_pending, executor))
+        else:
+            if args.unix is not None and os.path.lexists(args.unix):
+                # Only ever replace a stale socket, never some other file
+                if not stat.S_ISSOCK(os.lstat(args.unix).st_mode):
+                    parser.error(f"{args.unix} exists and is not a socket")
+                os.unlink(args.unix)
+            asyncio.run(serve_socket(evaluator, args.max_pending, executor,
+                                     path=args.unix, port=args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Calculator Server Tests
+Tests for request evaluation, response encoding and streaming in
+calculator_server.
+"""
+
+import asyncio
+import json
+import unittest
+
+from calculator_server import MAX_LINE, Evaluator, encode_response, serve_stream
+from calculator_test import Calculator
+
+
+class ListWriter:
+    """StreamWriter stand-in that keeps everything written to it."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data: bytes):
+        self.chunks.append(data)
+
+    async def drain(self):
+        pass
+
+    def lines(self) -> list:
+        return [json.loads(line) for line in b"".join(self.chunks).splitlines()]
+
+
+def serve_lines(lines: list, evaluator: Evaluator = None, chunk_size: int = None) -> list:
+    """Run serve_stream over request lines and return the decoded responses.
+
+    With chunk_size the input arrives in pieces of that many bytes, as it
+    would from a socket, instead of all at once.
+    """
+    data = "".join(line + "\n" for line in lines).encode()
+    chunk_size = chunk_size or len(data)
+
+    async def feed(reader):
+        for start in range(0, len(data), chunk_size):
+            reader.feed_data(data[start:start + chunk_size])
+            await asyncio.sleep(0)
+        reader.feed_eof()
+
+    async def run():
+        reader = asyncio.StreamReader()
+        writer = ListWriter()
+        feeding = asyncio.create_task(feed(reader))
+        await serve_stream(reader, writer, evaluator or Evaluator())
+        await feeding
+        return writer.lines()
+    return asyncio.run(run())
+
+
+class TestEvaluator(unittest.TestCase):
+    """Test cases for turning request lines into responses."""
+
+    def setUp(self):
+        """Set up an evaluator with the default limits."""
+        self.evaluator = Evaluator()
+
+    def test_requests(self):
+        """Test operation, expression and RPN requests."""
+        handle = self.evaluator.handle
+        self.assertEqual(handle('{"id": 1, "op": "add", "args": [2, 3]}'), {"id": 1, "result": 5})
+        self.assertEqual(handle('{"id": 2, "expr": "a * b", "vars": {"a": 4, "b": 3}}'),
+                         {"id": 2, "result": 12})
+        self.assertEqual(handle("3 4 + 2 ^ sqrt"), {"result": 7.0})
+
+    def test_malformed_expression_requests(self):
+        """Test non-string expressions and non-numeric variables are errors."""
+        handle = self.evaluator.handle
+        for line in ('{"id": 1, "expr": 5}',
+                     '{"id": 1, "expr": ["1 + 2"]}',
+                     '{"id": 1, "expr": "a", "vars": [1]}',
+                     '{"id": 1, "expr": "a", "vars": {"a": "x"}}',
+                     '{"id": 1, "expr": "a * b", "vars": {"a": "ab", "b": 3}}',
+                     '{"id": 1, "expr": "a + 1", "vars": {"a": true}}'):
+            response = handle(line)
+            self.assertEqual(response["id"], 1, line)
+            self.assertIn("error", response, line)
+
+    def test_result_size_limit(self):
+        """Test huge integer results are refused on every request path."""
+        handle = self.evaluator.handle
+        for line in ('{"id": 1, "expr": "a ^ b", "vars": {"a": 3, "b": 30000000}}',
+                     '{"id": 1, "expr": "9 ^ 9 ^ 9"}',
+                     '{"id": 1, "expr": "(2 ^ 10000) * (2 ^ 10000)"}',
+                     '{"id": 1, "op": "power", "args": [3, 30000000]}',
+                     "2 20000 ^"):
+            self.assertEqual(handle(line).get("error"), "Result too large", line)
+
+    def test_result_size_limit_exact_backend(self):
+        """Test integral float operands cannot sneak past the limit in exact backends."""
+        handle = Evaluator(Calculator(backend="fraction")).handle
+        for line in ("3 30000000.0 ^",
+                     "3.5 30000000 ^",
+                     "3 30000000.5 ^",
+                     '{"id": 1, "op": "power", "args": [3, 30000000.0]}',
+                     '{"id": 1, "expr": "a ^ b", "vars": {"a": 3.0, "b": 30000000.0}}'):
+            self.assertEqual(handle(line).get("error"), "Result too large", line)
+        self.assertEqual(handle("2 10.0 ^"), {"result": "1024"})
+
+    def test_deep_nesting(self):
+        """Test deeply nested expressions are an error, not a crash."""
+        text = "(" * 5000 + "1" + ")" * 5000
+        self.assertIn("error", self.evaluator.handle(json.dumps({"expr": text})))
+
+    def test_result_encoding(self):
+        """Test large ints become strings and non-finite results are errors."""
+        handle = self.evaluator.handle
+        self.assertEqual(handle("2 60 ^"), {"result": str(2 ** 60)})
+        self.assertEqual(handle("2 1000 ^"), {"result": str(2 ** 1000)})
+        self.assertIn("error", handle('{"op": "divide", "args": [1e308, 1e-308]}'))
+        self.assertIn("error", handle('{"op": "multiply", "args": [1e308, 10]}'))
+
+    def test_encode_response(self):
+        """Test responses are always one line of strict JSON."""
+        line = encode_response({"id": 1, "result": float("nan")})
+        self.assertTrue(line.endswith(b"\n"))
+        self.assertIn("error", json.loads(line))
+
+
+class TestServeStream(unittest.TestCase):
+    """Test cases for the pipelined stream server."""
+
+    def test_order_and_errors(self):
+        """Test bad requests get error responses in order and the stream goes on."""
+        responses = serve_lines([
+            '{"id": 1, "expr": 5}',
+            "2 20000 ^",
+            '{"id": 2, "op": "divide", "args": [1e308, 1e-308]}',
+            "not json {",
+            '{"id": 3, "op": "add", "args": [1, 2]}',
+        ])
+        self.assertEqual(len(responses), 5)
+        self.assertEqual(responses[0]["id"], 1)
+        self.assertIn("error", responses[0])
+        self.assertIn("error", responses[1])
+        self.assertIn("error", responses[2])
+        self.assertIn("error", responses[3])
+        self.assertEqual(responses[4], {"id": 3, "result": 3})
+
+    def test_long_lines_stay_in_step(self):
+        """Test an overlong line gets exactly one error and the next lines their own answers."""
+        long_line = "1 " * MAX_LINE + "+"
+        lines = [
+            '{"id": 1, "op": "add", "args": [1, 1]}',
+            long_line,
+            '{"id": 2, "op": "add", "args": [2, 2]}',
+            long_line,
+            long_line,
+            '{"id": 3, "op": "add", "args": [3, 3]}',
+        ]
+        for chunk_size in (None, 1000, 70000):
+            responses = serve_lines(lines, chunk_size=chunk_size)
+            self.assertEqual(responses, [
+                {"id": 1, "result": 2},
+                {"error": "Line too long"},
+                {"id": 2, "result": 4},
+                {"error": "Line too long"},
+                {"error": "Line too long"},
+                {"id": 3, "result": 6},
+            ], chunk_size)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,48 +4,820 @@ Calculator Test Module
 A simple calculator with basic arithmetic operations and tests.
 """
 
+import decimal
+import math
+import numbers
+import operator
+import re
+import sys
 import unittest
-from typing import Union
+from array import array
+from collections import OrderedDict
+from fractions import Fraction
+from functools import partial
+from itertools import repeat
+from operator import itemgetter
+from typing import Any, NamedTuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # batch operations fall back to plain Python
+    np = None
+
+DIVIDE_BY_ZERO = "Cannot divide by zero"
+NEGATIVE_SQUARE_ROOT = "Cannot calculate square root of negative number"
+
+
+class BatchResult(NamedTuple):
+    """Element-wise results with a mask of the elements that failed."""
+    values: Any
+    invalid: Any
+
+
+class NativeBackend:
+    """Plain Python arithmetic: ints stay exact, anything else is a float."""
+    name = "native"
+    vectorizable = True
+    add = staticmethod(operator.add)
+    subtract = staticmethod(operator.sub)
+    multiply = staticmethod(operator.mul)
+    divide = staticmethod(operator.truediv)
+    power = staticmethod(operator.pow)
+    
+    @staticmethod
+    def square_root(a):
+        return a ** 0.5
+
+
+class FloatBackend:
+    """Every operand and result is a float; math.pow and math.sqrt are used."""
+    name = "float"
+    vectorizable = True
+    
+    @staticmethod
+    def add(a, b):
+        return float(a) + float(b)
+    
+    @staticmethod
+    def subtract(a, b):
+        return float(a) - float(b)
+    
+    @staticmethod
+    def multiply(a, b):
+        return float(a) * float(b)
+    
+    @staticmethod
+    def divide(a, b):
+        return float(a) / float(b)
+    
+    @staticmethod
+    def power(a, b):
+        return math.pow(a, b)
+    
+    @staticmethod
+    def square_root(a):
+        return math.sqrt(a)
+
+
+class DecimalBackend:
+    """decimal.Decimal arithmetic rounded to a configurable context.
+    
+    Floats are taken at their shortest repr, so 0.1 means one tenth.
+    """
+    name = "decimal"
+    vectorizable = False
+    
+    def __init__(self, context: decimal.Context = None):
+        """Use context (a copy of the current decimal context by default)."""
+        self.context = context if context is not None else decimal.getcontext().copy()
+    
+    def convert(self, value) -> decimal.Decimal:
+        if isinstance(value, decimal.Decimal):
+            return value
+        if isinstance(value, float):
+            return decimal.Decimal(float.__repr__(value))
+        if isinstance(value, Fraction):
+            return self.context.divide(decimal.Decimal(value.numerator), value.denominator)
+        if isinstance(value, numbers.Integral):  # includes NumPy integers
+            return decimal.Decimal(int(value))
+        if isinstance(value, numbers.Real):  # other real scalars, e.g. numpy.float32
+            return decimal.Decimal(float.__repr__(float(value)))
+        return decimal.Decimal(value)
+    
+    def add(self, a, b):
+        return self.context.add(self.convert(a), self.convert(b))
+    
+    def subtract(self, a, b):
+        return self.context.subtract(self.convert(a), self.convert(b))
+    
+    def multiply(self, a, b):
+        return self.context.multiply(self.convert(a), self.convert(b))
+    
+    def divide(self, a, b):
+        return self.context.divide(self.convert(a), self.convert(b))
+    
+    def power(self, a, b):
+        return self.context.power(self.convert(a), self.convert(b))
+    
+    def square_root(self, a):
+        return self.context.sqrt(self.convert(a))
+
+
+class FractionBackend:
+    """Exact fractions.Fraction arithmetic.
+    
+    Floats are taken at their shortest repr. Square roots and fractional
+    powers are exact when the result is rational and otherwise rounded to
+    digits significant digits.
+    """
+    name = "fraction"
+    vectorizable = False
+    
+    def __init__(self, digits: int = 50):
+        """Round irrational results to digits significant digits."""
+        self.context = decimal.Context(prec=digits)
+    
+    @staticmethod
+    def convert(value) -> Fraction:
+        if isinstance(value, Fraction):
+            return value
+        if isinstance(value, float):
+            return Fraction(float.__repr__(value))
+        if isinstance(value, numbers.Integral):  # includes NumPy integers
+            return Fraction(int(value))
+        if isinstance(value, numbers.Real) and not isinstance(value, numbers.Rational):
+            return Fraction(float.__repr__(float(value)))
+        return Fraction(value)
+    
+    def add(self, a, b):
+        return self.convert(a) + self.convert(b)
+    
+    def subtract(self, a, b):
+        return self.convert(a) - self.convert(b)
+    
+    def multiply(self, a, b):
+        return self.convert(a) * self.convert(b)
+    
+    def divide(self, a, b):
+        return self.convert(a) / self.convert(b)
+    
+    def power(self, a, b):
+        a, b = self.convert(a), self.convert(b)
+        if b.denominator == 1:
+            return a ** b.numerator
+        if b.denominator == 2 and a >= 0:
+            return self.square_root(a) ** b.numerator
+        return Fraction(self.context.power(self._decimal(a), self._decimal(b)))
+    
+    def square_root(self, a):
+        a = self.convert(a)
+        numerator, denominator = math.isqrt(a.numerator), math.isqrt(a.denominator)
+        if numerator * numerator == a.numerator and denominator * denominator == a.denominator:
+            return Fraction(numerator, denominator)
+        return Fraction(self.context.sqrt(self._decimal(a)))
+    
+    def _decimal(self, value):
+        return self.context.divide(decimal.Decimal(value.numerator), value.denominator)
+    
+
+
+NATIVE_BACKEND = NativeBackend()
+
+# Backend names accepted by Calculator(backend=...)
+BACKENDS = {
+    "native": NativeBackend,
+    "float": FloatBackend,
+    "decimal": DecimalBackend,
+    "fraction": FractionBackend,
+}
 
 
 class Calculator:
     """A simple calculator class with basic arithmetic operations."""
     
+    def __init__(self, use_numpy: bool = True, backend="native"):
+        """Create a calculator.
+        
+        backend is a name from BACKENDS or a backend instance (for example
+        DecimalBackend(decimal.Context(prec=50))). use_numpy lets batch
+        operations use NumPy for backends that work in machine numbers.
+        """
+        if isinstance(backend, str):
+            if backend not in BACKENDS:
+                raise ValueError(f"Unknown backend {backend!r}")
+            backend = NATIVE_BACKEND if backend == "native" else BACKENDS[backend]()
+        self.backend = backend
+        self.use_numpy = use_numpy and np is not None and backend.vectorizable
+    
     def add(self, a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
         """Add two numbers."""
-        return a + b
+        return self.backend.add(a, b)
     
     def subtract(self, a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
         """Subtract second number from first number."""
-        return a - b
+        return self.backend.subtract(a, b)
     
     def multiply(self, a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
         """Multiply two numbers."""
-        return a * b
+        return self.backend.multiply(a, b)
     
     def divide(self, a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
         """Divide first number by second number."""
         if b == 0:
-            raise ValueError("Cannot divide by zero")
-        return a / b
+            raise ValueError(DIVIDE_BY_ZERO)
+        return self.backend.divide(a, b)
     
     def power(self, a: Union[int, float], b: Union[int, float]) -> Union[int, float]:
         """Raise first number to the power of second number."""
-        return a ** b
+        return self.backend.power(a, b)
     
     def square_root(self, a: Union[int, float]) -> float:
         """Calculate square root of a number."""
         if a < 0:
-            raise ValueError("Cannot calculate square root of negative number")
-        return a ** 0.5
+            raise ValueError(NEGATIVE_SQUARE_ROOT)
+        return self.backend.square_root(a)
+    
+    # Batch operations take sequences, array.array or any buffer-protocol
+    # object (scalars are broadcast) and apply the scalar operation to every
+    # element. on_error="raise" raises the scalar ValueError for the first
+    # failing element; on_error="mask" returns a BatchResult with NaN in the
+    # failed positions instead. Floating-point input goes through NumPy when
+    # it is available and comes back as an ndarray (so power follows IEEE
+    # rules: overflow gives inf rather than raising); everything else,
+    # including Python ints, is computed exactly by the scalar methods and
+    # comes back as a list.
+    
+    def add_many(self, a, b, on_error: str = "raise"):
+        """Add two batches of numbers element-wise."""
+        return self._elementwise("add", (a, b), on_error)
+    
+    def subtract_many(self, a, b, on_error: str = "raise"):
+        """Subtract two batches of numbers element-wise."""
+        return self._elementwise("subtract", (a, b), on_error)
+    
+    def multiply_many(self, a, b, on_error: str = "raise"):
+        """Multiply two batches of numbers element-wise."""
+        return self._elementwise("multiply", (a, b), on_error)
+    
+    def divide_many(self, a, b, on_error: str = "raise"):
+        """Divide two batches of numbers element-wise."""
+        return self._elementwise("divide", (a, b), on_error)
+    
+    def power_many(self, a, b, on_error: str = "raise"):
+        """Raise a batch of numbers to a batch of powers element-wise."""
+        return self._elementwise("power", (a, b), on_error)
+    
+    def square_root_many(self, a, on_error: str = "raise"):
+        """Calculate the square root of every number in a batch."""
+        return self._elementwise("square_root", (a,), on_error)
+    
+    def _elementwise(self, name, operands, on_error):
+        """Apply the scalar operation name across the operands."""
+        if on_error not in ("raise", "mask"):
+            raise ValueError(f"on_error must be 'raise' or 'mask', not {on_error!r}")
+        if all(isinstance(operand, numbers.Number) for operand in operands):
+            raise TypeError("Batch operations need at least one sequence operand")
+        
+        arrays = self._numpy_operands(operands) if self.use_numpy else None
+        if arrays is not None:
+            shapes = {operand.shape for operand in arrays if isinstance(operand, np.ndarray)}
+            if len(shapes) > 1:
+                raise ValueError("Batch operands must have the same length")
+            return _numpy_elementwise(name, arrays, on_error)
+        
+        columns = [repeat(operand) if isinstance(operand, numbers.Number)
+                   else _as_sequence(operand) for operand in operands]
+        lengths = {len(column) for column in columns if not isinstance(column, repeat)}
+        if len(lengths) > 1:
+            raise ValueError("Batch operands must have the same length")
+        
+        operation = getattr(self, name)
+        if on_error == "raise":
+            return list(map(operation, *columns))
+        values = []
+        invalid = []
+        for args in zip(*columns):
+            try:
+                values.append(operation(*args))
+                invalid.append(False)
+            except ValueError:
+                values.append(float("nan"))
+                invalid.append(True)
+        return BatchResult(values, invalid)
+    
+    def _numpy_operands(self, operands):
+        """NumPy arrays for the operands, or None to use the scalar path."""
+        arrays = []
+        for operand in operands:
+            if isinstance(operand, numbers.Number):
+                arrays.append(operand)
+                continue
+            converted = np.asarray(operand)
+            # Callers passing ndarrays have opted into NumPy semantics;
+            # anything else only takes the fast path when it is floating
+            # point, so Python ints stay exact
+            if converted.dtype.kind not in "fiu" or (
+                    converted.dtype.kind != "f" and not isinstance(operand, np.ndarray)):
+                return None
+            arrays.append(converted)
+        return arrays
+
+
+def _as_sequence(operand):
+    """A sized sequence of Python numbers for a batch operand."""
+    if isinstance(operand, (list, tuple, array)):
+        return operand
+    try:
+        return memoryview(operand).tolist()
+    except TypeError:
+        return list(operand)
+
+
+def _numpy_elementwise(name, arrays, on_error):
+    """Vectorized batch operation with the scalar error rules."""
+    if name == "divide":
+        invalid = np.asarray(arrays[1]) == 0
+        message = DIVIDE_BY_ZERO
+    elif name == "square_root":
+        invalid = np.asarray(arrays[0]) < 0
+        message = NEGATIVE_SQUARE_ROOT
+    else:
+        invalid = None
+    if invalid is not None and on_error == "raise" and invalid.any():
+        raise ValueError(message)
+    
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        if name == "add":
+            values = np.add(*arrays)
+        elif name == "subtract":
+            values = np.subtract(*arrays)
+        elif name == "multiply":
+            values = np.multiply(*arrays)
+        elif name == "divide":
+            values = np.true_divide(*arrays)
+        elif name == "power":
+            base, exponent = arrays
+            # NumPy refuses negative integer powers of integers, where the
+            # scalar operation gives a float, so those batches go through
+            # floating point
+            if (np.asarray(base).dtype.kind in "iu" and np.asarray(exponent).dtype.kind == "i"
+                    and (np.asarray(exponent) < 0).any()):
+                base = np.asarray(base, dtype=float)
+            values = np.power(base, exponent)
+        else:
+            values = np.power(arrays[0], 0.5)
+    
+    if on_error == "raise":
+        return values
+    if invalid is None:
+        invalid = np.zeros(values.shape, dtype=bool)
+    else:
+        invalid = np.broadcast_to(invalid, values.shape).copy()
+        values = np.where(invalid, np.nan, values)
+    return BatchResult(values, invalid)
+
+
+class CacheStats(NamedTuple):
+    """Counters of a ResultCache."""
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size: int
+    
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def _cache_key(method: str, args: tuple) -> tuple:
+    """Cache key that keeps 2, 2.0, True and -0.0/0.0 apart."""
+    key = [method]
+    for arg in args:
+        if type(arg) is float:
+            key.append((float, arg, math.copysign(1.0, arg)))
+        else:
+            key.append((type(arg), arg))
+    return tuple(key)
+
+
+class ResultCache:
+    """Bounded LRU of operation results, limited by entries and by bytes.
+    
+    Sizes are estimated with sys.getsizeof over the arguments and result,
+    so a few huge integers are evicted before they crowd out memory;
+    results larger than max_size on their own are never stored.
+    """
+    
+    def __init__(self, max_entries: int = 4096, max_size: int = 64 << 20):
+        """Create an empty cache; max_size is in bytes."""
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.entries = OrderedDict()  # key -> (result, size)
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def call(self, method: str, function, *args):
+        """Return function(*args), computing it only on a cache miss."""
+        key = _cache_key(method, args)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry[0]
+        self.misses += 1
+        result = function(*args)
+        
+        size = sys.getsizeof(result) + sum(sys.getsizeof(arg) for arg in args)
+        if size <= self.max_size and self.max_entries > 0:
+            self.entries[key] = (result, size)
+            self.size += size
+            while len(self.entries) > self.max_entries or self.size > self.max_size:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+        return result
+    
+    def clear(self):
+        """Drop every entry; the hit and miss counters are kept."""
+        self.entries.clear()
+        self.size = 0
+    
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.misses, self.evictions, len(self.entries), self.size)
+
+
+class CachingCalculator(Calculator):
+    """Calculator that memoizes the results of its expensive operations.
+    
+    A drop-in replacement: the methods named in cached (power and
+    square_root by default) go through a ResultCache, which may be shared
+    between calculators. Calls that raise are not cached.
+    """
+    
+    CACHED_METHODS = ("power", "square_root")
+    
+    def __init__(self, cache: ResultCache = None, cached=CACHED_METHODS, **options):
+        """Create a calculator backed by cache (a new ResultCache by default)."""
+        super().__init__(**options)
+        self.cache = cache if cache is not None else ResultCache()
+        for method in cached:
+            setattr(self, method, partial(self.cache.call, (self.backend, method),
+                                          getattr(self, method)))
+    
+    def cache_stats(self) -> CacheStats:
+        """Hit, miss and eviction counters of the cache."""
+        return self.cache.stats()
+
+
+# Expression engine: infix formulas are parsed once into a tree of the
+# nodes below, folded and compiled into nested closures that call the
+# Calculator methods, then evaluated against any number of bindings.
+
+class NumberNode(NamedTuple):
+    value: Union[int, float]
+
+
+class VariableNode(NamedTuple):
+    name: str
+
+
+class UnaryNode(NamedTuple):
+    op: str
+    operand: Any
+
+
+class BinaryNode(NamedTuple):
+    op: str
+    left: Any
+    right: Any
+
+
+class CallNode(NamedTuple):
+    name: str
+    args: tuple
+
+
+# Constant powers whose exact result could pass this many bits are left
+# for evaluation instead of being folded when the expression is compiled
+FOLD_MAX_BITS = 1 << 16
+
+BINARY_OPERATIONS = {"+": "add", "-": "subtract", "*": "multiply", "/": "divide", "^": "power"}
+
+# Function name -> (Calculator method, number of arguments)
+FUNCTIONS = {
+    "sqrt": ("square_root", 1),
+    "square_root": ("square_root", 1),
+    "add": ("add", 2),
+    "subtract": ("subtract", 2),
+    "multiply": ("multiply", 2),
+    "divide": ("divide", 2),
+    "power": ("power", 2),
+    "pow": ("power", 2),
+}
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+        (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+      | (?P<name>[A-Za-z_]\w*)
+      | (?P<op>\*\*|[-+*/^(),])
+    )""", re.VERBOSE)
+
+
+def _tokenize(text):
+    """Split an expression into (kind, text, position) tokens."""
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None:
+            column = len(text) - len(text[position:].lstrip())
+            raise ValueError(f"Unexpected character {text[column]!r} at position {column}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        tokens.append((kind, "^" if value == "**" else value, match.start(kind)))
+        position = match.end()
+    tokens.append(("end", "", len(text)))
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser; ^ binds tightest and is right associative."""
+    
+    def __init__(self, text):
+        self.tokens = _tokenize(text)
+        self.index = 0
+    
+    def peek(self):
+        return self.tokens[self.index]
+    
+    def take(self, value=None):
+        kind, text, position = self.tokens[self.index]
+        if value is not None and text != value:
+            found = f"{text!r}" if kind != "end" else "end of expression"
+            raise ValueError(f"Expected {value!r} at position {position}, found {found}")
+        self.index += 1
+        return kind, text, position
+    
+    def parse(self):
+        node = self.expression()
+        kind, text, position = self.peek()
+        if kind != "end":
+            raise ValueError(f"Unexpected {text!r} at position {position}")
+        return node
+    
+    def expression(self):
+        node = self.term()
+        while self.peek()[1] in ("+", "-") and self.peek()[0] == "op":
+            op = self.take()[1]
+            node = BinaryNode(op, node, self.term())
+        return node
+    
+    def term(self):
+        node = self.unary()
+        while self.peek()[1] in ("*", "/") and self.peek()[0] == "op":
+            op = self.take()[1]
+            node = BinaryNode(op, node, self.unary())
+        return node
+    
+    def unary(self):
+        if self.peek()[1] in ("+", "-") and self.peek()[0] == "op":
+            op = self.take()[1]
+            return UnaryNode(op, self.unary())
+        return self.power()
+    
+    def power(self):
+        node = self.atom()
+        if self.peek()[1] == "^":
+            self.take()
+            node = BinaryNode("^", node, self.unary())
+        return node
+    
+    def atom(self):
+        kind, text, position = self.take()
+        if kind == "number":
+            return NumberNode(float(text) if any(c in text for c in ".eE") else int(text))
+        if kind == "name":
+            if self.peek()[1] != "(":
+                return VariableNode(text)
+            if text not in FUNCTIONS:
+                raise ValueError(f"Unknown function {text!r} at position {position}")
+            self.take("(")
+            args = [self.expression()]
+            while self.peek()[1] == ",":
+                self.take()
+                args.append(self.expression())
+            self.take(")")
+            if len(args) != FUNCTIONS[text][1]:
+                raise ValueError(f"{text}() takes {FUNCTIONS[text][1]} argument(s), "
+                                 f"got {len(args)}")
+            return CallNode(text, tuple(args))
+        if text == "(":
+            node = self.expression()
+            self.take(")")
+            return node
+        found = f"{text!r}" if kind != "end" else "end of expression"
+        raise ValueError(f"Unexpected {found} at position {position}")
+
+
+def parse_expression(text: str):
+    """Parse an infix expression into a tree of expression nodes."""
+    return _Parser(text).parse()
+
+
+def _variables(node):
+    """Names of the variables an expression tree refers to."""
+    if isinstance(node, VariableNode):
+        return {node.name}
+    if isinstance(node, UnaryNode):
+        return _variables(node.operand)
+    if isinstance(node, BinaryNode):
+        return _variables(node.left) | _variables(node.right)
+    if isinstance(node, CallNode):
+        return set().union(*(_variables(arg) for arg in node.args))
+    return set()
+
+
+def _fold(node, operation):
+    """Pre-compute constant subtrees; ones that would raise are left alone.
+    
+    operation(method_name) returns the callable for each Calculator method,
+    as for _compile.
+    """
+    if isinstance(node, UnaryNode):
+        operand = _fold(node.operand, operation)
+        if node.op == "+":
+            return operand
+        node = UnaryNode(node.op, operand)
+        args = [NumberNode(-1), operand]
+        method = "multiply"
+    elif isinstance(node, BinaryNode):
+        node = BinaryNode(node.op, _fold(node.left, operation), _fold(node.right, operation))
+        args = [node.left, node.right]
+        method = BINARY_OPERATIONS[node.op]
+    elif isinstance(node, CallNode):
+        node = CallNode(node.name, tuple(_fold(arg, operation) for arg in node.args))
+        args = node.args
+        method = FUNCTIONS[node.name][0]
+    else:
+        return node
+    if all(isinstance(arg, NumberNode) for arg in args):
+        if method == "power" and _power_too_large(*(arg.value for arg in args)):
+            return node
+        try:
+            return NumberNode(operation(method)(*(arg.value for arg in args)))
+        except (ValueError, ArithmeticError):
+            pass  # raise on every evaluation instead
+    return node
+
+
+def _power_too_large(base, exponent):
+    """Whether an exact base ** exponent could exceed FOLD_MAX_BITS."""
+    try:
+        base, exponent = Fraction(base), abs(Fraction(exponent))
+    except (TypeError, ValueError, OverflowError):  # NaN, infinities
+        return False
+    bits = max(base.numerator.bit_length(), base.denominator.bit_length())
+    return exponent > 1 and bits * exponent > FOLD_MAX_BITS
+
+
+def _compile(node, operation):
+    """Turn an expression tree into a function of a bindings mapping.
+    
+    operation(method_name) returns the callable used for each Calculator
+    method, so the same tree compiles for scalar and batch evaluation.
+    """
+    if isinstance(node, NumberNode):
+        value = node.value
+        return lambda bindings: value
+    if isinstance(node, VariableNode):
+        return itemgetter(node.name)
+    if isinstance(node, UnaryNode):
+        operand = _compile(node.operand, operation)
+        if node.op == "+":
+            return operand
+        multiply = operation("multiply")
+        return lambda bindings: multiply(-1, operand(bindings))
+    if isinstance(node, BinaryNode):
+        apply = operation(BINARY_OPERATIONS[node.op])
+        left = _compile(node.left, operation)
+        right = _compile(node.right, operation)
+        return lambda bindings: apply(left(bindings), right(bindings))
+    apply = operation(FUNCTIONS[node.name][0])
+    args = [_compile(arg, operation) for arg in node.args]
+    if len(args) == 1:
+        (arg,) = args
+        return lambda bindings: apply(arg(bindings))
+    first, second = args
+    return lambda bindings: apply(first(bindings), second(bindings))
+
+
+def _combine_masks(masks):
+    """Element-wise OR of the invalid masks from a batch evaluation."""
+    if np is not None and all(isinstance(mask, np.ndarray) for mask in masks):
+        return np.logical_or.reduce(masks)
+    return [any(flags) for flags in zip(*masks)]
+
+
+class CompiledExpression:
+    """An infix expression parsed once and evaluated with Calculator semantics.
+    
+    Supports + - * / ^ (or **), unary minus, parentheses and the functions
+    in FUNCTIONS, e.g. "(a + b) ^ 2 / sqrt(c)". Evaluation raises the same
+    ValueErrors as the Calculator methods.
+    
+    operation(method_name), if given, returns the callable used in place of
+    each Calculator method for constant folding and scalar evaluation, so
+    callers can wrap operations with their own checks or limits.
+    """
+    
+    def __init__(self, text: str, calculator: "Calculator" = None, operation=None):
+        """Parse and compile text for the given (or a default) calculator."""
+        if not isinstance(text, str):
+            raise TypeError(f"Expression must be a string, not {type(text).__name__}")
+        self.text = text
+        self.calculator = calculator if calculator is not None else Calculator()
+        if operation is None:
+            operation = partial(getattr, self.calculator)
+        self.tree = _fold(parse_expression(text), operation)
+        self.variables = tuple(sorted(_variables(self.tree)))
+        self._evaluate = _compile(self.tree, operation)
+    
+    def evaluate(self, bindings=None, **values):
+        """Evaluate for one set of variable bindings (a mapping or keywords)."""
+        if values:
+            bindings = {**(bindings or {}), **values}
+        try:
+            return self._evaluate(bindings or {})
+        except KeyError as error:
+            raise ValueError(f"Unbound variable: {error.args[0]}") from None
+    
+    __call__ = evaluate
+    
+    def evaluate_many(self, rows) -> list:
+        """Evaluate for every mapping of bindings in rows."""
+        evaluate = self._evaluate
+        try:
+            return [evaluate(row) for row in rows]
+        except KeyError as error:
+            raise ValueError(f"Unbound variable: {error.args[0]}") from None
+    
+    def evaluate_batch(self, columns, on_error: str = "raise"):
+        """Evaluate over columns of values with the Calculator batch operations.
+        
+        columns maps each variable to a sequence, array or scalar. on_error
+        works as for the batch operations; with "mask" the result is a
+        BatchResult flagging every element that failed anywhere in the
+        expression.
+        """
+        if on_error not in ("raise", "mask"):
+            raise ValueError(f"on_error must be 'raise' or 'mask', not {on_error!r}")
+        calculator = self.calculator
+        masks = []
+        
+        def operation(name):
+            scalar = getattr(calculator, name)
+            batch = getattr(calculator, name + "_many")
+            
+            def apply(*args):
+                if all(isinstance(arg, numbers.Number) for arg in args):
+                    return scalar(*args)
+                if on_error == "raise":
+                    return batch(*args)
+                values, invalid = batch(*args, on_error="mask")
+                masks.append(invalid)
+                return values
+            return apply
+        
+        try:
+            values = _compile(self.tree, operation)(columns)
+        except KeyError as error:
+            raise ValueError(f"Unbound variable: {error.args[0]}") from None
+        if on_error == "raise":
+            return values
+        if not masks:
+            size = 1 if isinstance(values, numbers.Number) else len(values)
+            return BatchResult(values, [False] * size)
+        invalid = _combine_masks(masks)
+        if np is not None and isinstance(values, np.ndarray):
+            values = np.where(invalid, np.nan, values)
+        else:
+            values = [float("nan") if flag else value for value, flag in zip(values, invalid)]
+        return BatchResult(values, invalid)
 
 
 class TestCalculator(unittest.TestCase):
     """Test cases for the Calculator class."""
     
+    backend = "native"
+    
     def setUp(self):
         """Set up test fixtures before each test method."""
-        self.calc = Calculator()
+        self.calc = Calculator(backend=self.backend)
     
     def test_add_integers(self):
         """Test addition with integers."""
@@ -56,7 +828,14 @@ class TestCalculator(unittest.TestCase):
     def test_add_floats(self):
         """Test addition with floats."""
         self.assertAlmostEqual(self.calc.add(1.5, 2.5), 4.0)
-        self.assertAlmostEqual(self.calc.add(0.1, 0.2), 0.3, places=10)
+        self.assertAlmostEqual(float(self.calc.add(0.1, 0.2)), 0.3, places=10)
+    
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_numpy_scalars(self):
+        """Test NumPy scalars are accepted like the Python numbers they hold."""
+        self.assertAlmostEqual(float(self.calc.add(np.float64(0.1), 1)), 1.1, places=10)
+        self.assertAlmostEqual(float(self.calc.add(np.float32(0.5), 1)), 1.5)
+        self.assertEqual(self.calc.add(np.int64(2), 3), 5)
     
     def test_subtract(self):
         """Test subtraction."""
@@ -73,7 +852,7 @@ class TestCalculator(unittest.TestCase):
     def test_divide(self):
         """Test division."""
         self.assertEqual(self.calc.divide(10, 2), 5)
-        self.assertEqual(self.calc.divide(7, 3), 7/3)
+        self.assertEqual(float(self.calc.divide(7, 3)), 7/3)
         self.assertEqual(self.calc.divide(-6, 2), -3)
     
     def test_divide_by_zero(self):
@@ -99,6 +878,236 @@ class TestCalculator(unittest.TestCase):
             self.calc.square_root(-1)
 
 
+class TestCalculatorFloat(TestCalculator):
+    """Test cases for the Calculator class with the float backend."""
+    
+    backend = "float"
+    
+    def test_results_are_floats(self):
+        """Test integer operands give float results."""
+        self.assertIs(type(self.calc.add(2, 3)), float)
+        self.assertIs(type(self.calc.power(2, 3)), float)
+
+
+class TestCalculatorDecimal(TestCalculator):
+    """Test cases for the Calculator class with the decimal backend."""
+    
+    backend = "decimal"
+    
+    def test_exact_decimal_fractions(self):
+        """Test decimal fractions add exactly."""
+        self.assertEqual(self.calc.add(0.1, 0.2), decimal.Decimal("0.3"))
+    
+    def test_configurable_context(self):
+        """Test the context sets the precision of inexact results."""
+        calc = Calculator(backend=DecimalBackend(decimal.Context(prec=50)))
+        self.assertEqual(str(calc.divide(7, 3)), "2." + "3" * 49)
+        self.assertEqual(str(calc.square_root(2))[:12], "1.4142135623")
+
+
+class TestCalculatorFraction(TestCalculator):
+    """Test cases for the Calculator class with the fraction backend."""
+    
+    backend = "fraction"
+    
+    def test_exact_results(self):
+        """Test division and rational roots are exact."""
+        self.assertEqual(self.calc.divide(7, 3), Fraction(7, 3))
+        self.assertEqual(self.calc.square_root(Fraction(9, 4)), Fraction(3, 2))
+        self.assertEqual(self.calc.power(Fraction(4, 9), 1.5), Fraction(8, 27))
+        self.assertEqual(self.calc.subtract(0.3, 0.1), Fraction(1, 5))
+    
+    def test_irrational_results(self):
+        """Test irrational results are rounded to the configured digits."""
+        root = Calculator(backend=FractionBackend(digits=30)).square_root(2)
+        self.assertEqual(root, Fraction("1.41421356237309504880168872421"))
+
+
+class TestCalculatorBatch(unittest.TestCase):
+    """Test cases for the Calculator batch operations."""
+    
+    def setUp(self):
+        """Set up a NumPy-backed and a pure Python calculator."""
+        self.calcs = [Calculator(), Calculator(use_numpy=False)]
+    
+    def test_integers_stay_exact(self):
+        """Test integer batches match the scalar methods exactly."""
+        for calc in self.calcs:
+            self.assertEqual(calc.add_many([1, 2, 3], [4, 5, 6]), [5, 7, 9])
+            self.assertEqual(calc.power_many([2, 3], 100), [2 ** 100, 3 ** 100])
+            self.assertEqual(calc.divide_many([7], [3]), [7 / 3])
+    
+    def test_float_buffers(self):
+        """Test array.array and buffer inputs with scalar broadcasting."""
+        prices = array("d", [1.5, 2.0, 4.0])
+        for calc in self.calcs:
+            self.assertEqual(list(calc.multiply_many(prices, 2)), [3.0, 4.0, 8.0])
+            self.assertEqual(list(calc.subtract_many(memoryview(prices), prices)), [0.0] * 3)
+            self.assertEqual(list(calc.square_root_many(prices)), [1.5 ** 0.5, 2.0 ** 0.5, 2.0])
+    
+    def test_divide_by_zero(self):
+        """Test a zero divisor raises or is masked per element."""
+        for calc in self.calcs:
+            with self.assertRaises(ValueError):
+                calc.divide_many(array("d", [1.0, 2.0]), array("d", [1.0, 0.0]))
+            values, invalid = calc.divide_many(array("d", [1.0, 2.0]), array("d", [4.0, 0.0]),
+                                               on_error="mask")
+            self.assertEqual(list(invalid), [False, True])
+            self.assertEqual(values[0], 0.25)
+            self.assertNotEqual(values[1], values[1])  # NaN
+    
+    def test_square_root_negative(self):
+        """Test negative inputs raise or are masked per element."""
+        for calc in self.calcs:
+            with self.assertRaises(ValueError):
+                calc.square_root_many([4.0, -1.0])
+            values, invalid = calc.square_root_many([4.0, -1.0, 9.0], on_error="mask")
+            self.assertEqual(list(invalid), [False, True, False])
+            self.assertEqual([values[0], values[2]], [2.0, 3.0])
+    
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_integer_array_power(self):
+        """Test negative powers of integer ndarrays give floats like the scalar path."""
+        calc = Calculator()
+        bases, exponents = np.array([2, 4, 5]), np.array([-1, 2, -2])
+        expected = [calc.power(2, -1), calc.power(4, 2), calc.power(5, -2)]
+        self.assertEqual(list(calc.power_many(bases, exponents)), expected)
+        values, invalid = calc.power_many(bases, exponents, on_error="mask")
+        self.assertEqual(list(values), expected)
+        self.assertFalse(invalid.any())
+        self.assertEqual(list(calc.power_many(bases, -1)), [0.5, 0.25, 0.2])
+        self.assertEqual(list(calc.power_many(2, np.array([-2, 3]))), [0.25, 8.0])
+        self.assertEqual(calc.power_many(bases, 2).dtype.kind, "i")
+    
+    def test_length_mismatch(self):
+        """Test operands of different lengths are rejected."""
+        for calc in self.calcs:
+            with self.assertRaises(ValueError):
+                calc.add_many([1.0, 2.0], [1.0])
+
+
+class TestCompiledExpression(unittest.TestCase):
+    """Test cases for the expression parser and compiled evaluator."""
+    
+    def test_precedence(self):
+        """Test operator precedence, associativity and unary minus."""
+        self.assertEqual(CompiledExpression("1 + 2 * 3").evaluate(), 7)
+        self.assertEqual(CompiledExpression("2 ^ 3 ^ 2").evaluate(), 512)
+        self.assertEqual(CompiledExpression("-2 ^ 2").evaluate(), -4)
+        self.assertEqual(CompiledExpression("(1 + 2) * -3").evaluate(), -9)
+        self.assertEqual(CompiledExpression("2 ** 10 / 4").evaluate(), 256)
+    
+    def test_variables(self):
+        """Test one compiled expression against many bindings."""
+        expression = CompiledExpression("(a + b) ^ 2 / sqrt(c)")
+        self.assertEqual(expression.variables, ("a", "b", "c"))
+        self.assertEqual(expression.evaluate(a=1, b=2, c=9), 3)
+        rows = [{"a": a, "b": 1, "c": 4} for a in range(3)]
+        self.assertEqual(expression.evaluate_many(rows), [0.5, 2.0, 4.5])
+    
+    def test_calculator_errors(self):
+        """Test evaluation raises the Calculator ValueErrors."""
+        with self.assertRaises(ValueError):
+            CompiledExpression("a / (b - b)").evaluate(a=1, b=2)
+        with self.assertRaises(ValueError):
+            CompiledExpression("sqrt(-4)").evaluate()
+        with self.assertRaises(ValueError):
+            CompiledExpression("a + b").evaluate(a=1)
+    
+    def test_syntax_errors(self):
+        """Test malformed expressions are rejected when parsed."""
+        for text in ("1 +", "(1 + 2", "1 2", "sqrt(1, 2)", "log(3)", "2 $ 3", ""):
+            with self.assertRaises(ValueError):
+                parse_expression(text)
+    
+    def test_huge_constant_powers(self):
+        """Test constant powers too large to fold are left for evaluation."""
+        for calculator in (Calculator(), Calculator(backend="fraction")):
+            expression = CompiledExpression("9 ^ 9 ^ 9", calculator)
+            self.assertIsInstance(expression.tree, BinaryNode)
+            self.assertIsInstance(expression.tree.right, NumberNode)
+            self.assertEqual(expression.tree.right.value, 9 ** 9)
+            expression = CompiledExpression("2 ^ -100000 + 2 ^ 0.5", calculator)
+            self.assertIsInstance(expression.tree.left, BinaryNode)
+        expression = CompiledExpression("2 ^ 1000 * 3")
+        self.assertEqual(expression.tree, NumberNode(3 * 2 ** 1000))
+        self.assertEqual(CompiledExpression("2 ^ 100000").evaluate(), 2 ** 100000)
+    
+    def test_operation_hook(self):
+        """Test a custom operation wraps both folding and evaluation."""
+        calls = []
+
+        def operation(name):
+            method = getattr(Calculator(), name)
+
+            def apply(*args):
+                calls.append(name)
+                return method(*args)
+            return apply
+
+        expression = CompiledExpression("2 ^ 3 + x", operation=operation)
+        self.assertEqual(calls, ["power"])
+        self.assertEqual(expression.evaluate(x=1), 9)
+        self.assertEqual(calls, ["power", "add"])
+        with self.assertRaises(TypeError):
+            CompiledExpression(5)
+
+    def test_evaluate_batch(self):
+        """Test batch evaluation with masked failures."""
+        expression = CompiledExpression("x / y + 1")
+        self.assertEqual(list(expression.evaluate_batch({"x": [2.0, 4.0], "y": 2.0})), [2.0, 3.0])
+        values, invalid = expression.evaluate_batch(
+            {"x": array("d", [1.0, 1.0]), "y": array("d", [0.0, 4.0])}, on_error="mask")
+        self.assertEqual(list(invalid), [True, False])
+        self.assertEqual(values[1], 1.25)
+
+
+class TestCachingCalculator(unittest.TestCase):
+    """Test cases for the memoizing calculator."""
+    
+    def setUp(self):
+        """Set up a caching calculator with a fresh cache."""
+        self.calc = CachingCalculator()
+    
+    def test_hits_and_misses(self):
+        """Test repeated calls are served from the cache."""
+        self.assertEqual(self.calc.power(3, 200), 3 ** 200)
+        self.assertEqual(self.calc.power(3, 200), 3 ** 200)
+        self.assertEqual(self.calc.square_root(16), 4)
+        stats = self.calc.cache_stats()
+        self.assertEqual((stats.hits, stats.misses, stats.entries), (1, 2, 2))
+        self.assertEqual(self.calc.add(1, 2), 3)  # not cached
+        self.assertEqual(self.calc.cache_stats().misses, 2)
+    
+    def test_int_and_float_keys(self):
+        """Test 2 and 2.0 (and -0.0 and 0.0) never share an entry."""
+        self.assertIs(type(self.calc.power(2, 2)), int)
+        self.assertIs(type(self.calc.power(2.0, 2)), float)
+        self.assertIs(type(self.calc.power(2, 2.0)), float)
+        self.assertEqual(str(self.calc.power(-0.0, 3)), "-0.0")
+        self.assertEqual(str(self.calc.power(0.0, 3)), "0.0")
+        self.assertEqual(self.calc.cache_stats().hits, 0)
+    
+    def test_size_aware_eviction(self):
+        """Test huge results are evicted by size, oldest first."""
+        calc = CachingCalculator(ResultCache(max_size=10000))
+        calc.power(7, 10000)  # about 3.6 kB
+        calc.power(7, 10001)
+        calc.power(7, 10002)
+        stats = calc.cache_stats()
+        self.assertEqual((stats.entries, stats.evictions), (2, 1))
+        self.assertLessEqual(stats.size, 10000)
+        calc.power(7, 100000)  # larger than the whole cache
+        self.assertEqual(calc.cache_stats().entries, 2)
+    
+    def test_errors_are_not_cached(self):
+        """Test ValueErrors are raised on every call."""
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                self.calc.square_root(-1)
+        self.assertEqual(self.calc.cache_stats().entries, 0)
+
+
 def main():
     """Main function to run calculator tests and demonstrate functionality."""
     print("Calculator Test Suite")
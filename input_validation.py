@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Input Validation Engine
+Declarative field rules (type, length bounds, character classes, regex)
+compiled once into a validator for whole records and streams of records.
+
+Failed checks return a marker instead of raising, and errors are only
+collected, and their messages only formatted, for the records and fields
+that fail. Where a field has both a character class and length bounds
+they are folded into one regular expression, so the common valid case is a
+type check and a single fullmatch per field.
+"""
+
+import argparse
+import re
+import time
+from collections import namedtuple
+from collections.abc import Mapping
+
+# Named character classes for Field(charset=...); anything else in charset
+# is taken as literal characters
+CHARACTER_CLASSES = {
+    "alpha": "a-zA-Z",
+    "digits": "0-9",
+    "alnum": "a-zA-Z0-9",
+    "hex": "0-9a-fA-F",
+    "lower": "a-z",
+    "upper": "A-Z",
+    "word": r"\w",
+    "space": " ",
+    "printable": r"\x20-\x7e",
+}
+
+MESSAGES = {
+    "missing": "is required",
+    "extra": "is not allowed",
+    "type": "must be {}",
+    "too_short": "must be at least {} characters",
+    "too_long": "must be at most {} characters",
+    "charset": "may only contain {}",
+    "pattern": "must match {}",
+}
+
+
+class FieldError(namedtuple("FieldError", ["field", "code", "detail"])):
+    """One failed check; the message is only formatted when asked for
+
+    field is None when the record as a whole is not a mapping.
+    """
+
+    __slots__ = ()
+
+    @property
+    def message(self):
+        field = "record" if self.field is None else self.field
+        return f"{field} " + MESSAGES[self.code].format(self.detail)
+
+
+class ValidationError(ValueError):
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super().__init__("; ".join(error.message for error in self.errors))
+
+
+class Result(namedtuple("Result", ["value", "errors"])):
+    """A validated record: the cleaned fields and a tuple of FieldErrors"""
+
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def unwrap(self):
+        """The cleaned record, or ValidationError with every failure"""
+        if self.errors:
+            raise ValidationError(self.errors)
+        return self.value
+
+
+class _Failure:
+    """Returned by a compiled field check in place of a cleaned value"""
+
+    __slots__ = ("code", "detail")
+
+    def __init__(self, code, detail=None):
+        self.code = code
+        self.detail = detail
+
+
+_MISSING = object()
+
+
+class Field:
+    """Rules for one field
+
+    type may be a type or a tuple of types (bool never passes for int).
+    min_length and max_length bound len(value); charset names entries of
+    CHARACTER_CLASSES or lists literal characters; pattern must fullmatch.
+    These text rules are only allowed when every type is str.
+    strip removes surrounding whitespace from strings before the other
+    checks. A missing optional field takes default, if one is given.
+    """
+
+    def __init__(self, type=str, min_length=None, max_length=None, charset=None,
+                 pattern=None, strip=False, required=True, default=_MISSING):
+        self.types = type if isinstance(type, tuple) else (type,)
+        text_rules = (min_length, max_length, charset, pattern) != (None, None, None, None)
+        if text_rules and not all(issubclass(t, str) for t in self.types):
+            raise ValueError("Length, charset and pattern rules need a str-only type")
+        self.reject_bool = bool not in self.types and any(issubclass(bool, t) for t in self.types)
+        self.type_name = " or ".join(t.__name__ for t in self.types)
+        self.min_length = min_length
+        self.max_length = max_length
+        self.pattern = re.compile(pattern) if isinstance(pattern, str) else pattern
+        self.strip = strip
+        self.required = required
+        self.default = default
+
+        # A character class and the length bounds become one expression
+        self.charset = None
+        self.combined = None
+        if charset:
+            charset = (charset,) if isinstance(charset, str) else tuple(charset)
+            self.charset = ", ".join(charset)
+            body = "".join(CHARACTER_CLASSES.get(item) or re.escape(item) for item in charset)
+            high = "" if max_length is None else max_length
+            self.combined = re.compile(f"[{body}]{{{min_length or 0},{high}}}")
+
+    def failure(self, value):
+        """(code, detail) of the rule a type-checked, stripped value breaks
+
+        Only called once a value is known to fail, so the checks that
+        share one expression in the fast path are told apart here.
+        """
+        size = len(value)
+        if self.min_length is not None and size < self.min_length:
+            return "too_short", self.min_length
+        if self.max_length is not None and size > self.max_length:
+            return "too_long", self.max_length
+        if self.combined is not None and self.combined.fullmatch(value) is None:
+            return "charset", self.charset
+        return "pattern", self.pattern.pattern
+
+    def compile(self):
+        """A function for single values: the cleaned value or a _Failure"""
+        types, reject_bool, strip = self.types, self.reject_bool, self.strip
+        combined = self.combined.fullmatch if self.combined is not None else None
+        pattern = self.pattern.fullmatch if self.pattern is not None else None
+        low = self.min_length if self.min_length is not None else 0
+        high = self.max_length if self.max_length is not None else float("inf")
+        check_length = combined is None and (self.min_length, self.max_length) != (None, None)
+
+        def check(value):
+            if not isinstance(value, types) or (reject_bool and isinstance(value, bool)):
+                return _Failure("type", self.type_name)
+            if strip and isinstance(value, str):
+                value = value.strip()
+            if ((combined is not None and combined(value) is None)
+                    or (check_length and not low <= len(value) <= high)
+                    or (pattern is not None and pattern(value) is None)):
+                return _Failure(*self.failure(value))
+            return value
+
+        return check
+
+
+def _fail(errors, name, code, detail):
+    error = tuple.__new__(FieldError, (name, code, detail))
+    if errors is None:
+        return [error]
+    errors.append(error)
+    return errors
+
+
+class Validator:
+    """A record schema ({name: Field}) compiled for repeated use
+
+    The schema is compiled into the source of a single function with the
+    checks of every field unrolled, so validating a record costs no loop
+    over rule objects or per-field calls. extra="forbid" reports fields
+    the schema does not know; with the default "ignore" they are dropped
+    from the cleaned record. fail_fast stops at the first failing field of
+    each record.
+    """
+
+    def __init__(self, schema, extra="ignore", fail_fast=False):
+        if extra not in ("ignore", "forbid"):
+            raise ValueError(f"Unknown extra policy {extra!r}")
+        self.schema = dict(schema)
+        self.forbid_extra = extra == "forbid"
+        self.fail_fast = fail_fast
+        self.source, namespace = self._generate()
+        exec(compile(self.source, "<validator>", "exec"), namespace)
+        self.validate = namespace["validate"]
+
+    def _generate(self):
+        """Source of validate(record) and the globals it runs with"""
+        namespace = {"MISSING": _MISSING, "Result": Result, "new": tuple.__new__,
+                     "fail": _fail, "NAMES": frozenset(self.schema), "Mapping": Mapping,
+                     "NOT_A_MAPPING": (FieldError(None, "type", "Mapping"),)}
+        stop = ["    return new(Result, (cleaned, tuple(errors)))"] if self.fail_fast else []
+        lines = ["def validate(record):",
+                 "    if type(record) is not dict and not isinstance(record, Mapping):",
+                 "        return new(Result, ({}, NOT_A_MAPPING))",
+                 "    get = record.get",
+                 "    cleaned = {}",
+                 "    errors = None"]
+        for index, (name, field) in enumerate(self.schema.items()):
+            # Names, types and rules reach the code through the namespace,
+            # never by being pasted into the source
+            namespace.update({f"N{index}": name, f"F{index}": field,
+                              f"T{index}": field.types, f"D{index}": field.default})
+            lines += [f"    value = get(N{index}, MISSING)",
+                      "    if value is MISSING:"]
+            if field.required:
+                lines += [f"        errors = fail(errors, N{index}, 'missing', None)"]
+                lines += ["    " + line for line in stop]
+            elif field.default is not _MISSING:
+                lines += [f"        cleaned[N{index}] = D{index}"]
+            else:
+                lines += ["        pass"]
+            bool_check = " or isinstance(value, bool)" if field.reject_bool else ""
+            lines += [f"    elif not isinstance(value, T{index}){bool_check}:",
+                      f"        errors = fail(errors, N{index}, 'type', F{index}.type_name)"]
+            lines += ["    " + line for line in stop]
+            lines += ["    else:"]
+            if field.strip:
+                if all(issubclass(t, str) for t in field.types):
+                    lines += ["        value = value.strip()"]
+                else:
+                    lines += ["        if isinstance(value, str):",
+                              "            value = value.strip()"]
+
+            conditions = []
+            if field.combined is not None:
+                namespace[f"C{index}"] = field.combined.fullmatch
+                conditions.append(f"C{index}(value) is None")
+            elif field.min_length is not None or field.max_length is not None:
+                namespace[f"L{index}"] = field.min_length if field.min_length is not None else 0
+                namespace[f"H{index}"] = (field.max_length if field.max_length is not None
+                                       else float("inf"))
+                conditions.append(f"not L{index} <= len(value) <= H{index}")
+            if field.pattern is not None:
+                namespace[f"P{index}"] = field.pattern.fullmatch
+                conditions.append(f"P{index}(value) is None")
+            if conditions:
+                lines += [f"        if {' or '.join(conditions)}:",
+                          f"            errors = fail(errors, N{index}, *F{index}.failure(value))"]
+                lines += ["        " + line for line in stop]
+                lines += ["        else:",
+                          f"            cleaned[N{index}] = value"]
+            else:
+                lines += [f"        cleaned[N{index}] = value"]
+
+        if self.forbid_extra:
+            lines += ["    for name in record:",
+                      "        if name not in NAMES:",
+                      "            errors = fail(errors, name, 'extra', None)"]
+            lines += ["        " + line for line in stop]
+        lines += ["    if errors is None:",
+                  "        return new(Result, (cleaned, ()))",
+                  "    return new(Result, (cleaned, tuple(errors)))"]
+        return "\n".join(lines) + "\n", namespace
+
+    def __call__(self, record):
+        """Validate one mapping; returns a Result and never raises
+
+        Anything but a mapping fails as a whole, with a single "type"
+        error for field None.
+        """
+        return self.validate(record)
+
+    def validate_many(self, records):
+        """Lazily yield a Result per record of an iterable or stream"""
+        return map(self.validate, records)
+
+    def split(self, records):
+        """(cleaned valid records, [(index, errors)] for the rest)"""
+        valid, invalid = [], []
+        for index, result in enumerate(map(self.validate, records)):
+            if result[1]:
+                invalid.append((index, result[1]))
+            else:
+                valid.append(result[0])
+        return valid, invalid
+
+
+_INPUT = Field(str, max_length=100).compile()
+
+
+def validate_input(user_input):
+    """Single-value check from the secure coding examples: a str of at most
+    100 characters, returned stripped"""
+    value = _INPUT(user_input)
+    if type(value) is _Failure:
+        if value.code == "type":
+            raise TypeError("Input must be a string")
+        raise ValueError("Input too long")
+    return value.strip()
+
+
+def main():
+    """Validate sample records and compare with per-field exceptions"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--invalid", type=float, default=0.1, help="share of bad records")
+    args = parser.parse_args()
+
+    validator = Validator({
+        "username": Field(str, min_length=3, max_length=32, charset=("alnum", "_-")),
+        "email": Field(str, max_length=254, pattern=r"[^@\s]+@[^@\s]+\.[a-z]{2,}"),
+        "display_name": Field(str, max_length=100, strip=True, required=False),
+        "age": Field(int, required=False),
+    })
+    good = {"username": "alice_01", "email": "alice@example.com",
+            "display_name": "  Alice  ", "age": 30}
+    bad = {"username": "a!", "email": "nope", "age": "30"}
+    step = max(1, round(1 / args.invalid)) if args.invalid > 0 else args.count + 1
+    records = [bad if i % step == 0 else good for i in range(args.count)]
+
+    username = re.compile(r"[a-zA-Z0-9_\-]+")
+    email = re.compile(r"[^@\s]+@[^@\s]+\.[a-z]{2,}")
+
+    def check_username(value):
+        if not isinstance(value, str):
+            raise TypeError("username must be str")
+        if not 3 <= len(value) <= 32:
+            raise ValueError("username has the wrong length")
+        if not username.fullmatch(value):
+            raise ValueError("username has bad characters")
+        return value
+
+    def check_email(value):
+        if not isinstance(value, str):
+            raise TypeError("email must be str")
+        if len(value) > 254 or not email.fullmatch(value):
+            raise ValueError("email is malformed")
+        return value
+
+    def check_display_name(value):
+        if not isinstance(value, str):
+            raise TypeError("display_name must be str")
+        value = value.strip()
+        if len(value) > 100:
+            raise ValueError("display_name is too long")
+        return value
+
+    def check_age(value):
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise TypeError("age must be int")
+        return value
+
+    checks = (("username", check_username, True), ("email", check_email, True),
+              ("display_name", check_display_name, False), ("age", check_age, False))
+
+    def exception_driven(record):
+        # The same rules in the one-value-at-a-time style, raising per field
+        cleaned, errors = {}, []
+        for name, check, required in checks:
+            try:
+                if name in record:
+                    cleaned[name] = check(record[name])
+                elif required:
+                    raise ValueError(f"{name} is required")
+            except (TypeError, ValueError) as error:
+                errors.append(error)
+        return cleaned, errors
+
+    start = time.perf_counter()
+    valid, invalid = validator.split(records)
+    compiled = time.perf_counter() - start
+    start = time.perf_counter()
+    kept, rejected = [], []
+    for index, record in enumerate(records):
+        cleaned, errors = exception_driven(record)
+        if errors:
+            rejected.append((index, errors))
+        else:
+            kept.append(cleaned)
+    baseline = time.perf_counter() - start
+
+    print(f"{len(valid)} valid, {len(invalid)} invalid; first failure:")
+    for error in invalid[0][1] if invalid else ():
+        print(f"  {error.message}")
+    print(f"Compiled validator  {args.count / compiled:>12,.0f} records/s")
+    print(f"Per-field raising   {args.count / baseline:>12,.0f} records/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Input Validation Tests
+Tests for field rules, error reporting and the compiled record validator
+in input_validation.
+"""
+
+import types
+import unittest
+
+from input_validation import (MESSAGES, Field, FieldError, ValidationError, Validator,
+                              validate_input)
+
+
+def codes(result) -> list:
+    """(field, code) of every error in a Result."""
+    return [(error.field, error.code) for error in result.errors]
+
+
+class TestValidator(unittest.TestCase):
+    """Test cases for validating records against a schema."""
+
+    def setUp(self):
+        """Set up a schema that uses every rule."""
+        self.schema = {
+            "username": Field(str, min_length=3, max_length=8, charset=("alnum", "_")),
+            "pin": Field(str, min_length=4, max_length=6),
+            "email": Field(str, pattern=r"[^@\s]+@[^@\s]+"),
+            "name": Field(str, max_length=10, strip=True, required=False),
+            "age": Field(int, required=False, default=0),
+        }
+        self.good = {"username": "alice_1", "pin": "1234", "email": "a@b", "name": " Al "}
+        self.validator = Validator(self.schema)
+
+    def check(self, **changes) -> list:
+        """Error codes for the good record with some fields changed."""
+        record = dict(self.good, **changes)
+        return codes(self.validator(record))
+
+    def test_valid(self):
+        """Test a valid record is cleaned, stripped and given defaults."""
+        result = self.validator(self.good)
+        self.assertTrue(result.ok)
+        self.assertEqual(result.errors, ())
+        self.assertEqual(result.unwrap(), {"username": "alice_1", "pin": "1234",
+                                           "email": "a@b", "name": "Al", "age": 0})
+
+    def test_rule_codes(self):
+        """Test each rule reports its own code and detail."""
+        self.assertEqual(self.check(username=5), [("username", "type")])
+        self.assertEqual(self.check(age=True), [("age", "type")])
+        self.assertEqual(self.check(age="3"), [("age", "type")])
+        self.assertEqual(self.check(username="al"), [("username", "too_short")])
+        self.assertEqual(self.check(username="alice_123"), [("username", "too_long")])
+        self.assertEqual(self.check(username="al!ce"), [("username", "charset")])
+        self.assertEqual(self.check(pin="123"), [("pin", "too_short")])
+        self.assertEqual(self.check(pin="1234567"), [("pin", "too_long")])
+        self.assertEqual(self.check(email="nope"), [("email", "pattern")])
+        self.assertEqual(self.check(name="  a very long name  "), [("name", "too_long")])
+        self.assertEqual(codes(self.validator({"pin": "1234", "email": "a@b"})),
+                         [("username", "missing")])
+
+    def test_messages(self):
+        """Test messages are formatted from the code and detail."""
+        result = self.validator(dict(self.good, username="al!ce", pin="1"))
+        self.assertEqual(result.errors[0].detail, "alnum, _")
+        self.assertEqual([error.message for error in result.errors],
+                         ["username may only contain alnum, _",
+                          "pin must be at least 4 characters"])
+        self.assertEqual(FieldError("age", "type", "int").message, "age must be int")
+        self.assertEqual(set(MESSAGES), {"missing", "extra", "type", "too_short", "too_long",
+                                         "charset", "pattern"})
+
+    def test_all_errors(self):
+        """Test every failing field is reported, in schema order."""
+        result = self.validator({"username": "!", "pin": 1234, "age": "x"})
+        self.assertFalse(result.ok)
+        self.assertEqual(codes(result), [("username", "too_short"), ("pin", "type"),
+                                         ("email", "missing"), ("age", "type")])
+        with self.assertRaises(ValidationError) as caught:
+            result.unwrap()
+        self.assertEqual(caught.exception.errors, list(result.errors))
+        self.assertIsInstance(caught.exception, ValueError)
+
+    def test_fail_fast(self):
+        """Test fail_fast stops at the first failing field."""
+        validator = Validator(self.schema, fail_fast=True)
+        record = {"username": "!", "pin": 1234, "age": "x"}
+        self.assertEqual(codes(validator(record)), [("username", "too_short")])
+        self.assertEqual(codes(validator(dict(self.good, email="x", age="x"))),
+                         [("email", "pattern")])
+        self.assertEqual(codes(validator({})), [("username", "missing")])
+        self.assertTrue(validator(self.good).ok)
+
+    def test_extra_fields(self):
+        """Test unknown fields are dropped, or reported in record order when forbidden."""
+        record = dict(self.good, zeta=1, alpha=2)
+        self.assertEqual(self.validator(record).errors, ())
+        self.assertNotIn("zeta", self.validator(record).value)
+
+        forbid = Validator(self.schema, extra="forbid")
+        self.assertEqual(codes(forbid(record)), [("zeta", "extra"), ("alpha", "extra")])
+        self.assertEqual(forbid(record).errors[0].message, "zeta is not allowed")
+        self.assertEqual(codes(forbid({"b": 1, "username": "!", "a": 2})),
+                         [("username", "too_short"), ("pin", "missing"),
+                          ("email", "missing"), ("b", "extra"), ("a", "extra")])
+        fail_fast = Validator(self.schema, extra="forbid", fail_fast=True)
+        self.assertEqual(codes(fail_fast(record)), [("zeta", "extra")])
+        with self.assertRaises(ValueError):
+            Validator(self.schema, extra="allow")
+
+    def test_not_a_mapping(self):
+        """Test records that are not mappings fail instead of raising."""
+        for record in ([1, 2], None, "username", 5, (("username", "alice"),)):
+            with self.subTest(record=record):
+                result = self.validator(record)
+                self.assertFalse(result.ok)
+                self.assertEqual(result.value, {})
+                self.assertEqual(codes(result), [(None, "type")])
+                self.assertEqual(result.errors[0].message, "record must be Mapping")
+        proxy = types.MappingProxyType(self.good)
+        self.assertTrue(self.validator(proxy).ok)
+
+    def test_many(self):
+        """Test streams of records are validated lazily and split in order."""
+        records = [self.good, {"username": "al"}, self.good, [1]]
+        results = self.validator.validate_many(iter(records))
+        self.assertTrue(next(results).ok)
+        valid, invalid = self.validator.split(records)
+        self.assertEqual(len(valid), 2)
+        self.assertEqual([index for index, _ in invalid], [1, 3])
+
+    def test_field_rules(self):
+        """Test bad field definitions are refused and bool is not an int."""
+        with self.assertRaises(ValueError):
+            Field(int, max_length=3)
+        with self.assertRaises(ValueError):
+            Field((str, bytes), pattern="x")
+        validator = Validator({"flag": Field(bool), "count": Field((int, str))})
+        self.assertTrue(validator({"flag": True, "count": "3"}).ok)
+        self.assertEqual(codes(validator({"flag": 1, "count": False})),
+                         [("flag", "type"), ("count", "type")])
+
+    def test_names_are_not_code(self):
+        """Test field names and details never end up in the generated source."""
+        name = "x'), __import__('os').system('false'), ('"
+        validator = Validator({name: Field(str, pattern="'")})
+        self.assertNotIn("__import__", validator.source)
+        self.assertEqual(codes(validator({name: "a"})), [(name, "pattern")])
+
+    def test_validate_input(self):
+        """Test the single-value wrapper from the secure coding examples."""
+        self.assertEqual(validate_input("  hi  "), "hi")
+        with self.assertRaises(TypeError):
+            validate_input(5)
+        with self.assertRaises(ValueError):
+            validate_input("x" * 101)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Password Hashing Service
+Password hashing and constant-time verification with PBKDF2-SHA256 or
+scrypt, spread over a thread or process pool with batch and asyncio
+interfaces.
+
+Hashes are self-describing strings that carry the algorithm, its cost
+parameters and the salt:
+
+    $pbkdf2-sha256$i=310000$<salt>$<key>
+    $scrypt$n=32768,r=8,p=1$<salt>$<key>
+
+(salt and key in unpadded base64). Costs are calibrated on the host for a
+target latency, and hashes with out-of-date parameters are replaced on
+the next successful login. The raw salt + key bytes written by
+hash_password in the secure coding examples still verify, and always
+count as out of date.
+
+Stored costs are bounded before any work is done, so a tampered or
+corrupt row cannot tie a worker up for minutes or exhaust its memory.
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+SALT_SIZE = 32
+KEY_SIZE = 32            # SHA-256 digest size, pbkdf2_hmac's default key length
+ITERATIONS = 100000      # cost of the legacy salt + key hashes, and the floor
+TARGET_SECONDS = 0.1     # default time budget for hashing one password
+MAX_SCRYPT_MEMORY = 64 << 20  # most memory calibration gives scrypt
+MAX_COST_FACTOR = 8           # stored costs above this multiple of a policy's are refused
+
+
+def b64encode(data):
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def b64decode(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4), validate=True)
+
+
+def best_time(function, repeat=3):
+    """Fastest of a few timed runs, to keep calibration out of the noise"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class Pbkdf2Backend:
+    """PBKDF2-HMAC-SHA256 with a tunable iteration count"""
+
+    name = "pbkdf2-sha256"
+    param_names = ("i",)
+    minimum = {"i": ITERATIONS}
+    maximum = {"i": 100 * ITERATIONS}
+
+    def derive(self, password, salt, params):
+        return hashlib.pbkdf2_hmac("sha256", password, salt, params["i"])
+
+    def calibrate(self, target):
+        """Iterations that take about target seconds on this host"""
+        probe = 20000
+        elapsed = best_time(lambda: self.derive(b"calibrate", bytes(SALT_SIZE), {"i": probe}))
+        iterations = int(target / elapsed * probe) // 1000 * 1000
+        return {"i": min(max(iterations, ITERATIONS), self.maximum["i"])}
+
+
+class ScryptBackend:
+    """scrypt with a tunable memory cost n (a power of two), r and p"""
+
+    name = "scrypt"
+    param_names = ("n", "r", "p")
+    minimum = {"n": 1 << 14, "r": 8, "p": 1}
+    maximum = {"n": 1 << 20, "r": 16, "p": 4}
+
+    def derive(self, password, salt, params):
+        n, r, p = params["n"], params["r"], params["p"]
+        # hashlib raises ValueError past maxmem, so memory is capped as well
+        maxmem = min(128 * r * (n + p + 2) + (1 << 20), MAX_COST_FACTOR * MAX_SCRYPT_MEMORY)
+        return hashlib.scrypt(password, salt=salt, n=n, r=r, p=p, dklen=KEY_SIZE, maxmem=maxmem)
+
+    def calibrate(self, target):
+        """Largest n within MAX_SCRYPT_MEMORY, then enough p, for target seconds"""
+        params = dict(self.minimum)
+        elapsed = best_time(lambda: self.derive(b"calibrate", bytes(SALT_SIZE), params))
+        # Time and memory both grow linearly with n
+        while elapsed * 2 <= target and 128 * params["r"] * params["n"] * 2 <= MAX_SCRYPT_MEMORY:
+            params["n"] *= 2
+            elapsed *= 2
+        params["p"] = min(max(1, int(target / elapsed)), self.maximum["p"])
+        return params
+
+
+BACKENDS = {backend.name: backend for backend in (Pbkdf2Backend(), ScryptBackend())}
+
+
+def format_hash(algorithm, params, salt, key):
+    """Encode a hash as $algorithm$name=value,...$salt$key"""
+    names = BACKENDS[algorithm].param_names
+    encoded = ",".join(f"{name}={params[name]}" for name in names)
+    return f"${algorithm}${encoded}${b64encode(salt)}${b64encode(key)}"
+
+
+def parse_hash(stored, limits=None):
+    """Split a stored hash into (algorithm, params, salt, key)
+
+    Raw salt + key bytes in the legacy layout are read as PBKDF2-SHA256
+    with the legacy iteration count. Parameters above limits[algorithm]
+    (each backend's maximum by default) are a ValueError.
+    """
+    if isinstance(stored, (bytes, bytearray, memoryview)):
+        stored = bytes(stored)
+        if len(stored) != SALT_SIZE + KEY_SIZE:
+            raise ValueError("Malformed password hash")
+        return Pbkdf2Backend.name, {"i": ITERATIONS}, stored[:SALT_SIZE], stored[SALT_SIZE:]
+
+    if not isinstance(stored, str):
+        raise ValueError("Malformed password hash")
+    parts = stored.split("$")
+    if len(parts) != 5 or parts[0] or parts[1] not in BACKENDS:
+        raise ValueError("Malformed password hash")
+    _, algorithm, encoded, salt, key = parts
+    backend = BACKENDS[algorithm]
+    try:
+        params = dict(item.split("=", 1) for item in encoded.split(","))
+        params = {name: int(params[name]) for name in backend.param_names}
+        salt, key = b64decode(salt), b64decode(key)
+    except (ValueError, KeyError):
+        raise ValueError("Malformed password hash") from None
+    if any(value <= 0 for value in params.values()) or not salt or not key:
+        raise ValueError("Malformed password hash")
+    limit = (limits or {}).get(algorithm, backend.maximum)
+    if any(params[name] > limit[name] for name in backend.param_names):
+        raise ValueError("Password hash cost is out of range")
+    return algorithm, params, salt, key
+
+
+def verify_password(password, stored, limits=None):
+    """Check a password against any stored hash in constant time
+
+    Malformed hashes and ones whose cost is out of range (see parse_hash)
+    raise ValueError.
+    """
+    algorithm, params, salt, key = parse_hash(stored, limits)
+    candidate = BACKENDS[algorithm].derive(password.encode("utf-8"), salt, params)
+    return hmac.compare_digest(candidate, key)
+
+
+class PasswordPolicy:
+    """The algorithm and cost new hashes are made with
+
+    Without explicit params the backend is benchmarked when the policy is
+    created and gets the cost that takes about target seconds here, but
+    never less than the backend's minimum. On a mixed fleet, pass the same
+    explicit params everywhere so hosts do not keep upgrading each
+    other's hashes.
+
+    verify() and verify_and_update() never raise for a bad stored hash:
+    malformed ones, and ones costing more than max_cost_factor times the
+    policy (or past the backend maximum, for other algorithms), just fail.
+    """
+
+    def __init__(self, algorithm=Pbkdf2Backend.name, params=None, target=TARGET_SECONDS,
+                 max_cost_factor=MAX_COST_FACTOR):
+        if algorithm not in BACKENDS:
+            raise ValueError(f"Unknown algorithm {algorithm!r}")
+        self.algorithm = algorithm
+        self.backend = BACKENDS[algorithm]
+        self.params = dict(params) if params is not None else self.backend.calibrate(target)
+        if any(self.params[name] > self.backend.maximum[name] for name in self.backend.param_names):
+            raise ValueError(f"Parameters exceed the {algorithm} maximum {self.backend.maximum}")
+        self.limits = {name: backend.maximum for name, backend in BACKENDS.items()}
+        self.limits[algorithm] = {name: min(self.backend.maximum[name], max_cost_factor * value)
+                                  for name, value in self.params.items()}
+
+    def hash(self, password):
+        """Hash a password into a self-describing string"""
+        salt = os.urandom(SALT_SIZE)
+        key = self.backend.derive(password.encode("utf-8"), salt, self.params)
+        return format_hash(self.algorithm, self.params, salt, key)
+
+    def verify(self, password, stored):
+        try:
+            return verify_password(password, stored, self.limits)
+        except ValueError:
+            return False
+
+    def needs_rehash(self, stored):
+        """True for legacy or foreign-algorithm hashes and weaker parameters"""
+        if not isinstance(stored, str):
+            return True
+        algorithm, params, _, _ = parse_hash(stored, self.limits)
+        if algorithm != self.algorithm:
+            return True
+        return any(params[name] < self.params[name] for name in self.backend.param_names)
+
+    def verify_and_update(self, password, stored):
+        """Verify a login; returns (ok, new hash to store or None)"""
+        if not self.verify(password, stored):
+            return False, None
+        if self.needs_rehash(stored):
+            return True, self.hash(password)
+        return True, None
+
+    def __repr__(self):
+        params = ",".join(f"{name}={self.params[name]}" for name in self.backend.param_names)
+        return f"PasswordPolicy({self.algorithm}, {params})"
+
+
+_default_policy = None
+
+
+def default_policy():
+    """The process-wide PBKDF2 policy, calibrated on first use"""
+    global _default_policy
+    if _default_policy is None:
+        _default_policy = PasswordPolicy()
+    return _default_policy
+
+
+def hash_password(password):
+    """Hash a password with the default policy"""
+    return default_policy().hash(password)
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords on a pool of workers
+
+    pbkdf2_hmac and scrypt release the GIL while they run, so the default
+    thread pool already uses every core; kind="process" sidesteps the GIL
+    entirely at the cost of pickling passwords to worker processes. The
+    policy (calibrated here if not given) decides how new hashes are made.
+    """
+
+    def __init__(self, workers=None, kind="thread", policy=None):
+        self.policy = policy if policy is not None else default_policy()
+        workers = workers or os.cpu_count() or 1
+        if kind == "thread":
+            self.executor = ThreadPoolExecutor(max_workers=workers)
+        elif kind == "process":
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            raise ValueError(f"Unknown pool kind {kind!r}")
+        self.workers = workers
+
+    def hash_many(self, passwords):
+        """Hash every password; results are in input order"""
+        passwords = list(passwords)
+        return list(self.executor.map(self.policy.hash, passwords,
+                                      chunksize=self._chunksize(len(passwords))))
+
+    def verify_many(self, pairs):
+        """Verify (password, stored) pairs; returns a bool per pair in order
+
+        A malformed or out-of-range stored hash is False for its own pair
+        and does not affect the rest of the batch.
+        """
+        passwords, stored = self._unzip(pairs)
+        return list(self.executor.map(self.policy.verify, passwords, stored,
+                                      chunksize=self._chunksize(len(passwords))))
+
+    def verify_and_update_many(self, pairs):
+        """verify_and_update for every (password, stored) pair, in order"""
+        passwords, stored = self._unzip(pairs)
+        return list(self.executor.map(self.policy.verify_and_update, passwords, stored,
+                                      chunksize=self._chunksize(len(passwords))))
+
+    async def hash(self, password):
+        """Hash one password without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.policy.hash, password)
+
+    async def verify(self, password, stored):
+        """Verify one password without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.policy.verify, password, stored)
+
+    async def verify_and_update(self, password, stored):
+        """Verify a login and rehash it if needed, without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.policy.verify_and_update,
+                                          password, stored)
+
+    async def hash_many_async(self, passwords):
+        return await asyncio.gather(*(self.hash(password) for password in passwords))
+
+    async def verify_many_async(self, pairs):
+        return await asyncio.gather(*(self.verify(password, stored) for password, stored in pairs))
+
+    @staticmethod
+    def _unzip(pairs):
+        # zip(*pairs) yields nothing at all for an empty batch
+        pairs = list(pairs)
+        return [password for password, _ in pairs], [stored for _, stored in pairs]
+
+    def _chunksize(self, count):
+        # Chunks only matter for process pools, where they amortize pickling
+        if isinstance(self.executor, ThreadPoolExecutor):
+            return 1
+        return max(1, count // (self.workers * 4))
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    """Calibrate, then hash and verify a batch of sample passwords"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--kind", choices=("thread", "process"), default="thread")
+    parser.add_argument("--algorithm", choices=sorted(BACKENDS), default=Pbkdf2Backend.name)
+    parser.add_argument("--target", type=float, default=TARGET_SECONDS,
+                        help="seconds one hash should take on this host")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    policy = PasswordPolicy(args.algorithm, target=args.target)
+    print(f"Calibrated {policy} in {time.perf_counter() - start:.2f}s")
+
+    passwords = [f"password-{i}" for i in range(args.count)]
+    with PasswordHasher(args.workers, args.kind, policy) as hasher:
+        start = time.perf_counter()
+        hashes = hasher.hash_many(passwords)
+        hashed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = hasher.verify_many(zip(passwords, hashes))
+        results += hasher.verify_many([("wrong", hashes[0])])
+        verified = time.perf_counter() - start
+
+    print(f"Hashed {args.count} passwords in {hashed:.2f}s ({args.count / hashed:.1f}/s) "
+          f"on {hasher.workers} {args.kind} workers")
+    print(f"Verified {args.count + 1} in {verified:.2f}s; "
+          f"{sum(results)} matched, {len(results) - sum(results)} rejected")
+    print(f"Example: {hashes[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Password Hashing Tests
+Tests for the hash format, verification, cost limits, rehashing and the
+worker pool interfaces in password_hashing.
+"""
+
+import asyncio
+import hashlib
+import os
+import unittest
+
+from password_hashing import (ITERATIONS, SALT_SIZE, PasswordHasher, PasswordPolicy,
+                              Pbkdf2Backend, ScryptBackend, parse_hash, verify_password)
+
+# The cheapest allowed costs, to keep the tests fast
+PBKDF2 = PasswordPolicy(Pbkdf2Backend.name, Pbkdf2Backend.minimum)
+SCRYPT = PasswordPolicy(ScryptBackend.name, ScryptBackend.minimum)
+
+
+def legacy_hash(password: str) -> bytes:
+    """Raw salt + key bytes as the secure coding examples stored them."""
+    salt = os.urandom(SALT_SIZE)
+    return salt + hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, ITERATIONS)
+
+
+class TestPasswordPolicy(unittest.TestCase):
+    """Test cases for hashing and verifying with a policy."""
+
+    def test_round_trip(self):
+        """Test each algorithm verifies its own hashes and rejects wrong passwords."""
+        for policy in (PBKDF2, SCRYPT):
+            with self.subTest(policy=policy):
+                stored = policy.hash("correct horse")
+                self.assertTrue(stored.startswith(f"${policy.algorithm}$"))
+                self.assertTrue(policy.verify("correct horse", stored))
+                self.assertFalse(policy.verify("correct horse!", stored))
+                self.assertFalse(policy.verify("", stored))
+
+    def test_salted(self):
+        """Test the same password hashes differently every time."""
+        self.assertNotEqual(PBKDF2.hash("password"), PBKDF2.hash("password"))
+
+    def test_cross_algorithm(self):
+        """Test a policy verifies hashes made with the other algorithm."""
+        self.assertTrue(PBKDF2.verify("password", SCRYPT.hash("password")))
+        self.assertTrue(SCRYPT.verify("password", PBKDF2.hash("password")))
+
+    def test_unicode(self):
+        """Test non-ASCII passwords are hashed as UTF-8."""
+        stored = PBKDF2.hash("pässwörd ✓")
+        self.assertTrue(PBKDF2.verify("pässwörd ✓", stored))
+        self.assertFalse(PBKDF2.verify("passwort ✓", stored))
+
+    def test_legacy_hash(self):
+        """Test legacy salt + key bytes verify, need a rehash and get upgraded."""
+        stored = legacy_hash("password")
+        self.assertTrue(PBKDF2.verify("password", stored))
+        self.assertFalse(PBKDF2.verify("wrong", stored))
+        self.assertTrue(PBKDF2.needs_rehash(stored))
+        ok, new_hash = PBKDF2.verify_and_update("password", stored)
+        self.assertTrue(ok)
+        self.assertIsInstance(new_hash, str)
+        self.assertTrue(PBKDF2.verify("password", new_hash))
+        self.assertFalse(PBKDF2.needs_rehash(new_hash))
+        self.assertEqual(PBKDF2.verify_and_update("wrong", stored), (False, None))
+
+    def test_malformed_hashes(self):
+        """Test malformed stored hashes fail verification instead of raising."""
+        good = PBKDF2.hash("password")
+        algorithm, params, salt, key = good.split("$")[1:]
+        for stored in (None, 42, "", "password", b"short", bytes(SALT_SIZE),
+                       "$pbkdf2-sha256$i=100000$salt",
+                       f"$md5${params}${salt}${key}",
+                       f"pbkdf2-sha256${params}${salt}${key}$",
+                       f"${algorithm}$i=abc${salt}${key}",
+                       f"${algorithm}$i=0${salt}${key}",
+                       f"${algorithm}$i=-5${salt}${key}",
+                       f"${algorithm}$n=100000${salt}${key}",
+                       f"${algorithm}${params}$!!!${key}",
+                       f"${algorithm}${params}$${key}",
+                       f"${algorithm}${params}${salt}$"):
+            with self.subTest(stored=stored):
+                self.assertFalse(PBKDF2.verify("password", stored))
+                self.assertEqual(PBKDF2.verify_and_update("password", stored), (False, None))
+                with self.assertRaises(ValueError):
+                    verify_password("password", stored)
+
+    def test_cost_limits(self):
+        """Test stored costs far above the policy are refused before any work."""
+        _, algorithm, _, salt, key = PBKDF2.hash("password").split("$")
+        for iterations in (10 ** 9, 9 * ITERATIONS):
+            stored = f"${algorithm}$i={iterations}${salt}${key}"
+            self.assertFalse(PBKDF2.verify("password", stored))
+        with self.assertRaises(ValueError):
+            parse_hash(f"${algorithm}$i={10 ** 9}${salt}${key}")
+        for params in ("n=1073741824,r=8,p=1", "n=16384,r=1024,p=1", "n=16384,r=8,p=64"):
+            stored = f"$scrypt${params}${salt}${key}"
+            self.assertFalse(SCRYPT.verify("password", stored))
+            self.assertFalse(PBKDF2.verify("password", stored))
+        with self.assertRaises(ValueError):
+            PasswordPolicy(Pbkdf2Backend.name, {"i": 10 ** 9})
+
+    def test_needs_rehash(self):
+        """Test which stored hashes are due for an upgrade."""
+        stronger = PasswordPolicy(Pbkdf2Backend.name, {"i": 2 * ITERATIONS})
+        weak = PBKDF2.hash("password")
+        self.assertFalse(PBKDF2.needs_rehash(weak))
+        self.assertTrue(stronger.needs_rehash(weak))
+        self.assertFalse(PBKDF2.needs_rehash(stronger.hash("password")))
+        self.assertTrue(PBKDF2.needs_rehash(SCRYPT.hash("password")))
+        self.assertTrue(SCRYPT.needs_rehash(weak))
+        bigger_r = PasswordPolicy(ScryptBackend.name, {"n": 1 << 14, "r": 9, "p": 1})
+        self.assertTrue(bigger_r.needs_rehash(SCRYPT.hash("password")))
+
+        ok, new_hash = stronger.verify_and_update("password", weak)
+        self.assertTrue(ok)
+        self.assertEqual(parse_hash(new_hash)[1], {"i": 2 * ITERATIONS})
+        self.assertEqual(stronger.verify_and_update("password", new_hash), (True, None))
+
+
+class TestPasswordHasher(unittest.TestCase):
+    """Test cases for the batch and asyncio pool interfaces."""
+
+    kind = "thread"
+
+    def setUp(self):
+        """Set up a small pool with the cheap PBKDF2 policy."""
+        self.hasher = PasswordHasher(workers=2, kind=self.kind, policy=PBKDF2)
+        self.addCleanup(self.hasher.close)
+        self.passwords = [f"password-{i}" for i in range(6)]
+
+    def test_many_in_order(self):
+        """Test batch results line up with their inputs."""
+        hashes = self.hasher.hash_many(self.passwords)
+        self.assertEqual(len(hashes), len(self.passwords))
+        for password, stored in zip(self.passwords, hashes):
+            self.assertTrue(PBKDF2.verify(password, stored))
+        pairs = list(zip(self.passwords, hashes))
+        pairs[2] = ("wrong", hashes[2])
+        pairs[4] = (self.passwords[4], hashes[3])
+        self.assertEqual(self.hasher.verify_many(pairs),
+                         [True, True, False, True, False, True])
+
+    def test_bad_hash_fails_alone(self):
+        """Test a malformed or over-cost hash fails its own item only."""
+        hashes = self.hasher.hash_many(self.passwords[:3])
+        _, algorithm, _, salt, key = hashes[0].split("$")
+        pairs = [(self.passwords[0], hashes[0]),
+                 (self.passwords[1], "not a hash"),
+                 (self.passwords[1], f"${algorithm}$i={10 ** 9}${salt}${key}"),
+                 (self.passwords[1], None),
+                 (self.passwords[2], hashes[2])]
+        self.assertEqual(self.hasher.verify_many(pairs), [True, False, False, False, True])
+        self.assertEqual(self.hasher.verify_and_update_many(pairs),
+                         [(True, None), (False, None), (False, None), (False, None),
+                          (True, None)])
+
+    def test_verify_and_update_many(self):
+        """Test legacy hashes in a batch come back upgraded."""
+        pairs = [("a", legacy_hash("a")), ("b", PBKDF2.hash("b")), ("c", legacy_hash("x"))]
+        results = self.hasher.verify_and_update_many(pairs)
+        self.assertEqual([ok for ok, _ in results], [True, True, False])
+        self.assertTrue(PBKDF2.verify("a", results[0][1]))
+        self.assertIsNone(results[1][1])
+        self.assertIsNone(results[2][1])
+
+    def test_empty_batches(self):
+        """Test empty batches give empty results."""
+        self.assertEqual(self.hasher.hash_many([]), [])
+        self.assertEqual(self.hasher.verify_many([]), [])
+        self.assertEqual(self.hasher.verify_and_update_many(iter([])), [])
+        self.assertEqual(asyncio.run(self.hasher.hash_many_async([])), [])
+        self.assertEqual(asyncio.run(self.hasher.verify_many_async([])), [])
+
+    def test_async(self):
+        """Test the asyncio interface keeps order and fails bad items alone."""
+        async def run():
+            hashes = await self.hasher.hash_many_async(self.passwords[:3])
+            pairs = list(zip(self.passwords[:3], hashes))
+            pairs.insert(1, (self.passwords[1], "$scrypt$n=3$x$y"))
+            results = await self.hasher.verify_many_async(pairs)
+            single = await self.hasher.verify("wrong", hashes[0])
+            update = await self.hasher.verify_and_update("a", legacy_hash("a"))
+            return results, single, update
+        results, single, update = asyncio.run(run())
+        self.assertEqual(results, [True, False, True, True])
+        self.assertFalse(single)
+        self.assertTrue(update[0])
+        self.assertTrue(PBKDF2.verify("a", update[1]))
+
+
+class TestPasswordHasherProcess(TestPasswordHasher):
+    """Test cases for the pool interfaces on worker processes."""
+
+    kind = "process"
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Path Allowlist
+Checks file paths against many allowed root directories. Roots are
+compiled into a trie keyed by path component, so a check walks the
+components of one path once however many roots there are, and "/srv/a"
+never admits "/srv/ab". Paths are resolved with realpath semantics
+(symlinks and ".." included) before they are matched, and resolutions are
+kept in an LRU cache whose entries expire after a TTL.
+
+A path is checked at one moment and opened at another; the cache widens
+that window to the TTL, so keep it short where tenants control symlinks
+inside their roots.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_SIZE = 4096
+CACHE_TTL = 5.0  # seconds a resolved path is trusted for
+
+_ROOT = ""  # trie key marking the end of an allowed root; never a component
+
+
+def split_path(path):
+    """Components of an absolute, normalized path ("/" has none)"""
+    return [part for part in path.split(os.sep) if part]
+
+
+class PathAllowlist:
+    """An allowlist of root directories with a cached resolver
+
+    Roots are resolved once, when the allowlist is built. Relative paths
+    are taken relative to base (the working directory by default).
+    """
+
+    def __init__(self, roots, cache_size=CACHE_SIZE, ttl=CACHE_TTL, base=None, clock=time.monotonic):
+        self.trie = {}
+        self.roots = []
+        for root in roots:
+            root = os.path.realpath(root)
+            self.roots.append(root)
+            node = self.trie
+            for part in split_path(root):
+                node = node.setdefault(part, {})
+            node[_ROOT] = root
+        self.base = os.path.realpath(base if base is not None else os.getcwd())
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self.clock = clock
+        self.cache = OrderedDict()  # path -> (expires, resolved, root), LRU
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def match(self, resolved):
+        """The allowed root containing a resolved path, or None"""
+        node = self.trie
+        if _ROOT in node:
+            return node[_ROOT]
+        for part in split_path(resolved):
+            node = node.get(part)
+            if node is None:
+                return None
+            if _ROOT in node:
+                return node[_ROOT]
+        return None
+
+    def lookup(self, path):
+        """(resolved path, root) for a path; root is None when it is denied"""
+        path = os.path.join(self.base, path)
+        now = self.clock()
+        with self.lock:
+            entry = self.cache.get(path)
+            if entry is not None and entry[0] > now:
+                self.cache.move_to_end(path)
+                self.hits += 1
+                return entry[1], entry[2]
+            self.misses += 1
+
+        try:
+            resolved = os.path.realpath(path)
+        except (ValueError, OSError):  # embedded NUL, symlink loops on strict systems
+            return None, None
+        root = self.match(resolved)
+
+        with self.lock:
+            self.cache[path] = (now + self.ttl, resolved, root)
+            self.cache.move_to_end(path)
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return resolved, root
+
+    def check(self, path):
+        """The resolved path if it is inside an allowed root, else ValueError"""
+        resolved, root = self.lookup(path)
+        if root is None:
+            raise ValueError("Access denied")
+        return resolved
+
+    def allows(self, path):
+        return self.lookup(path)[1] is not None
+
+    def check_many(self, paths):
+        """Resolved path per input path, or None where access is denied
+
+        Each distinct path is looked up once, and no exception is raised
+        for denied paths.
+        """
+        results = {}
+        out = []
+        for path in paths:
+            if path not in results:
+                resolved, root = self.lookup(path)
+                results[path] = resolved if root is not None else None
+            out.append(results[path])
+        return out
+
+    def invalidate(self):
+        """Forget every cached resolution, e.g. after moving tenant data"""
+        with self.lock:
+            self.cache.clear()
+
+
+def main():
+    """Check paths from the command line or stdin against allowed roots"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--root", action="append", required=True, help="allowed root (repeatable)")
+    parser.add_argument("--ttl", type=float, default=CACHE_TTL)
+    parser.add_argument("paths", nargs="*", help="paths to check (default: one per line on stdin)")
+    args = parser.parse_args()
+
+    allowlist = PathAllowlist(args.root, ttl=args.ttl)
+    paths = args.paths or [line.rstrip("\n") for line in sys.stdin]
+    start = time.perf_counter()
+    results = allowlist.check_many(paths)
+    elapsed = time.perf_counter() - start
+
+    denied = 0
+    for path, resolved in zip(paths, results):
+        if resolved is None:
+            denied += 1
+            print(f"DENY   {path}")
+        else:
+            print(f"ALLOW  {path} -> {resolved}")
+    print(f"{len(paths)} checked against {len(allowlist.roots)} roots in {elapsed * 1e3:.2f} ms, "
+          f"{denied} denied", file=sys.stderr)
+    sys.exit(1 if denied else 0)
+
+
+if __name__ == "__main__":
+    main()
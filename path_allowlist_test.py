@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Path Allowlist Tests
+Tests for root matching, path resolution and the resolution cache in
+path_allowlist.
+"""
+
+import os
+import tempfile
+import unittest
+
+from path_allowlist import PathAllowlist
+
+
+class FakeClock:
+    """A clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestPathAllowlist(unittest.TestCase):
+    """Test cases for checking paths against allowed roots."""
+
+    def setUp(self):
+        """Set up a directory tree with allowed and forbidden parts."""
+        temp = tempfile.TemporaryDirectory()
+        self.addCleanup(temp.cleanup)
+        self.top = os.path.realpath(temp.name)
+        for name in ("a", "ab", "b", "a/sub", "secret"):
+            os.makedirs(self.path(name), exist_ok=True)
+        self.clock = FakeClock()
+        self.allowlist = PathAllowlist([self.path("a"), self.path("b")], ttl=5.0,
+                                       base=self.path("a"), clock=self.clock)
+
+    def path(self, name: str) -> str:
+        """Absolute path of a name in the test tree."""
+        return os.path.join(self.top, name)
+
+    def test_roots(self):
+        """Test paths inside a root are allowed and resolved."""
+        self.assertEqual(self.allowlist.check(self.path("a")), self.path("a"))
+        self.assertEqual(self.allowlist.check(self.path("a/sub/file.txt")),
+                         self.path("a/sub/file.txt"))
+        self.assertTrue(self.allowlist.allows(self.path("b/x")))
+        self.assertFalse(self.allowlist.allows(self.path("secret/x")))
+        self.assertFalse(self.allowlist.allows(self.top))
+        self.assertFalse(self.allowlist.allows("/"))
+
+    def test_sibling_prefix(self):
+        """Test a root does not admit siblings that share its name as a prefix."""
+        self.assertFalse(self.allowlist.allows(self.path("ab")))
+        self.assertFalse(self.allowlist.allows(self.path("ab/file")))
+        with self.assertRaises(ValueError):
+            self.allowlist.check(self.path("ab/file"))
+
+    def test_dotdot_escape(self):
+        """Test ".." is resolved before matching."""
+        self.assertFalse(self.allowlist.allows(self.path("a/../secret/x")))
+        self.assertFalse(self.allowlist.allows(self.path("a/sub/../../ab")))
+        self.assertEqual(self.allowlist.check(self.path("b/../a/sub")), self.path("a/sub"))
+
+    def test_symlink_escape(self):
+        """Test symlinks are followed before matching, in both directions."""
+        os.symlink(self.path("secret"), self.path("a/escape"))
+        os.symlink(self.path("a/sub"), self.path("secret/inside"))
+        self.assertFalse(self.allowlist.allows(self.path("a/escape/x")))
+        self.assertEqual(self.allowlist.check(self.path("secret/inside/x")),
+                         self.path("a/sub/x"))
+
+    def test_symlinked_root(self):
+        """Test roots given through a symlink are resolved once, up front."""
+        os.symlink(self.path("a"), self.path("link"))
+        allowlist = PathAllowlist([self.path("link")])
+        self.assertEqual(allowlist.roots, [self.path("a")])
+        self.assertTrue(allowlist.allows(self.path("a/x")))
+        self.assertTrue(allowlist.allows(self.path("link/x")))
+
+    def test_relative_paths(self):
+        """Test relative paths are resolved against the base."""
+        self.assertEqual(self.allowlist.check("sub/file"), self.path("a/sub/file"))
+        self.assertEqual(self.allowlist.check("."), self.path("a"))
+        self.assertFalse(self.allowlist.allows("../secret"))
+        self.assertTrue(self.allowlist.allows("../b/x"))
+        self.assertFalse(self.allowlist.allows("../ab"))
+
+    def test_bad_paths(self):
+        """Test unresolvable paths are denied, not raised."""
+        self.assertFalse(self.allowlist.allows("sub/\0file"))
+        self.assertEqual(self.allowlist.check_many(["sub/\0file"]), [None])
+
+    def test_check_many(self):
+        """Test check_many keeps order, repeats and denied paths."""
+        paths = ["sub/x", self.path("secret"), "sub/x", self.path("b"), "../ab"]
+        self.assertEqual(self.allowlist.check_many(paths),
+                         [self.path("a/sub/x"), None, self.path("a/sub/x"), self.path("b"), None])
+        self.assertEqual(self.allowlist.misses, 4)
+        self.assertEqual(self.allowlist.check_many([]), [])
+
+    def test_cache_ttl(self):
+        """Test resolutions are cached until they expire."""
+        link = self.path("a/link")
+        os.symlink(self.path("a/sub"), link)
+        self.assertTrue(self.allowlist.allows(link))
+        os.remove(link)
+        os.symlink(self.path("secret"), link)
+
+        self.clock.now = 4.9
+        self.assertTrue(self.allowlist.allows(link))
+        self.assertEqual((self.allowlist.hits, self.allowlist.misses), (1, 1))
+        self.clock.now = 5.0
+        self.assertFalse(self.allowlist.allows(link))
+        self.assertEqual((self.allowlist.hits, self.allowlist.misses), (1, 2))
+
+    def test_invalidate(self):
+        """Test invalidate drops cached resolutions at once."""
+        link = self.path("a/link")
+        os.symlink(self.path("a/sub"), link)
+        self.assertTrue(self.allowlist.allows(link))
+        os.remove(link)
+        os.symlink(self.path("secret"), link)
+        self.allowlist.invalidate()
+        self.assertFalse(self.allowlist.allows(link))
+
+    def test_cache_size(self):
+        """Test the cache keeps only the most recently used paths."""
+        allowlist = PathAllowlist([self.path("a")], cache_size=2, base=self.path("a"))
+        for name in ("x", "y", "x", "z"):
+            allowlist.allows(name)
+        self.assertEqual(list(allowlist.cache), [self.path("a/x"), self.path("a/z")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Tetris Batch Runner
+Plays many independent headless TetrisGame instances across a process pool
+with a pluggable policy and reproducible per-game RNG streams.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from tetris_engine import ACTIONS, HARD_DROP, MOVE_LEFT, MOVE_RIGHT, ROTATE, TetrisGame
+from tetris_headless import VirtualClock, run_headless
+
+# Policies are called once per frame as policy(game, rng) and return an
+# action from tetris_engine.ACTIONS or None to do nothing that frame. They
+# must be module-level functions so they can be sent to worker processes.
+
+
+def idle_policy(game, rng):
+    """Never press anything; pieces fall under gravity only"""
+    return None
+
+
+def random_policy(game, rng):
+    """Press a random key on about one frame in five"""
+    if rng.random() < 0.2:
+        return rng.choice(ACTIONS)
+    return None
+
+
+def scatter_policy(game, rng):
+    """Shift and rotate at random every frame, hard dropping one frame in four"""
+    action = rng.choice((MOVE_LEFT, MOVE_RIGHT, ROTATE, None))
+    if action is None:
+        return HARD_DROP
+    return action
+
+
+POLICIES = {
+    "idle": idle_policy,
+    "random": random_policy,
+    "scatter": scatter_policy,
+}
+
+
+def policy_inputs(policy, game, rng):
+    """Adapt a policy into the per-frame input stream run_headless expects"""
+    while True:
+        action = policy(game, rng)
+        yield () if action is None else (action,)
+
+
+def game_seeds(seed, games):
+    """Split a master seed into one independent seed per game"""
+    master = random.Random(seed)
+    return [master.getrandbits(64) for _ in range(games)]
+
+
+def play_game(policy, seed, max_frames=None):
+    """Play one seeded game and return its statistics as a dict"""
+    piece_rng = random.Random(seed)
+    policy_rng = random.Random(piece_rng.getrandbits(64))
+    game = TetrisGame(rng=piece_rng)
+
+    clock = VirtualClock()
+    run_headless(policy_inputs(policy, game, policy_rng),
+                 game=game, clock=clock, max_frames=max_frames)
+    return {
+        "seed": seed,
+        "score": game.score,
+        "lines_cleared": game.lines_cleared,
+        "pieces_placed": game.pieces_placed,
+        "frames": clock.time // clock.frame_ms,
+        "game_over": game.game_over,
+    }
+
+
+def run_batch(policy, games, seed=0, workers=None, max_frames=None):
+    """Play games in parallel and return (per-game results, elapsed seconds)
+
+    Results come back in seed order, so the same master seed reproduces the
+    same results whatever the number of workers. workers=1 runs in-process.
+    """
+    seeds = game_seeds(seed, games)
+    play = partial(play_game, policy, max_frames=max_frames)
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [play(game_seed) for game_seed in seeds]
+    else:
+        workers = workers or os.cpu_count() or 1
+        chunksize = max(1, games // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(play, seeds, chunksize=chunksize))
+    return results, time.perf_counter() - start
+
+
+def summarize(results, elapsed):
+    """Aggregate per-game results into score, line and throughput statistics
+
+    With no games every statistic is 0.
+    """
+    scores = sorted(result["score"] for result in results) or [0]
+    lines = [result["lines_cleared"] for result in results] or [0]
+    pieces = sum(result["pieces_placed"] for result in results)
+
+    def percentile(p):
+        return scores[min(len(scores) - 1, int(p * len(scores)))]
+
+    def rate(count):
+        return count / elapsed if elapsed else 0.0
+
+    return {
+        "games": len(results),
+        "elapsed": elapsed,
+        "games_per_second": rate(len(results)),
+        "score": {
+            "mean": statistics.fmean(scores),
+            "stdev": statistics.pstdev(scores),
+            "min": scores[0],
+            "p25": percentile(0.25),
+            "median": statistics.median(scores),
+            "p75": percentile(0.75),
+            "p95": percentile(0.95),
+            "max": scores[-1],
+        },
+        "score_histogram": dict(sorted(Counter(scores).items())) if results else {},
+        "lines_cleared": {
+            "total": sum(lines),
+            "mean": statistics.fmean(lines),
+            "max": max(lines),
+        },
+        "lines_per_second": rate(sum(lines)),
+        "pieces_placed": pieces,
+        "pieces_per_second": rate(pieces),
+    }
+
+
+def main():
+    """Run a batch from the command line and print the summary"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="scatter")
+    parser.add_argument("--max-frames", type=int, default=100000)
+    args = parser.parse_args()
+
+    results, elapsed = run_batch(POLICIES[args.policy], args.games, seed=args.seed,
+                                 workers=args.workers, max_frames=args.max_frames)
+    summary = summarize(results, elapsed)
+
+    print(f"Games: {summary['games']} in {elapsed:.2f}s "
+          f"({summary['games_per_second']:,.1f} games/s)")
+    score = summary["score"]
+    print(f"Score: mean {score['mean']:.1f}, median {score['median']}, "
+          f"p95 {score['p95']}, max {score['max']}")
+    print(f"Lines cleared: {summary['lines_cleared']['total']} "
+          f"(mean {summary['lines_cleared']['mean']:.2f} per game, "
+          f"{summary['lines_per_second']:,.1f} lines/s)")
+    print(f"Pieces placed: {summary['pieces_placed']} "
+          f"({summary['pieces_per_second']:,.0f} pieces/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Tetris Benchmark
+Measures moves per second of TetrisGame against the original implementation
+(allocating moves, template-scanning collision checks) on the same seeded
+move sequence.
+"""
+
+import argparse
+import random
+import time
+
+from tetris_engine import (
+    BLACK, GRID_HEIGHT, GRID_WIDTH, TetrisGame, TetrisPiece
+)
+
+
+def legacy_get_cells(piece):
+    """Original get_cells: rescan the 5x5 string template"""
+    cells = []
+    template = piece.get_rotated_piece()
+    for row in range(5):
+        for col in range(5):
+            if template[row][col] == '#':
+                cells.append((piece.x + col, piece.y + row))
+    return cells
+
+
+class LegacyTetrisGame(TetrisGame):
+    """TetrisGame with the original list-of-rows grid, allocating moves and
+    template-scan checks"""
+
+    def __init__(self, rng=None, width=GRID_WIDTH, height=GRID_HEIGHT):
+        super().__init__(rng, width, height)
+        self.grid = [[BLACK for _ in range(width)] for _ in range(height)]
+
+    def move_piece(self, dx, dy):
+        piece = TetrisPiece(self.current_piece.x + dx, self.current_piece.y + dy)
+        piece.piece_type = self.current_piece.piece_type
+        piece.rotation = self.current_piece.rotation
+        piece.color = self.current_piece.color
+
+        if not self.check_collision(piece):
+            self.current_piece = piece
+            return True
+        return False
+
+    def rotate_piece(self):
+        piece = TetrisPiece(self.current_piece.x, self.current_piece.y)
+        piece.piece_type = self.current_piece.piece_type
+        piece.rotation = self.current_piece.rotation + 1
+        piece.color = self.current_piece.color
+
+        if not self.check_collision(piece):
+            self.current_piece = piece
+            return True
+        return False
+
+    def hard_drop(self):
+        while self.drop_piece():
+            pass
+
+    def check_collision(self, piece):
+        for x, y in legacy_get_cells(piece):
+            if (x < 0 or x >= self.width or
+                    y >= self.height or
+                    (y >= 0 and self.grid[y][x] != BLACK)):
+                return True
+        return False
+
+    def place_piece(self):
+        for x, y in legacy_get_cells(self.current_piece):
+            if 0 <= y < self.height and 0 <= x < self.width:
+                self.grid[y][x] = self.current_piece.color
+
+    def clear_lines(self):
+        lines_to_clear = []
+        for y in range(self.height):
+            if all(self.grid[y][x] != BLACK for x in range(self.width)):
+                lines_to_clear.append(y)
+
+        for y in lines_to_clear:
+            del self.grid[y]
+            self.grid.insert(0, [BLACK for _ in range(self.width)])
+
+        if lines_to_clear:
+            self.lines_cleared += len(lines_to_clear)
+            self.score += len(lines_to_clear) * 100 * (len(lines_to_clear) + 1)
+            self.fall_speed = max(50, self.fall_speed - 10)
+
+
+def run_moves(game_class, moves, seed, width=GRID_WIDTH, height=GRID_HEIGHT):
+    """Play a seeded random move sequence and return (elapsed, games, grid)"""
+    actions = random.Random(seed).choices(range(4), weights=[3, 3, 3, 1], k=moves)
+    # Pieces come from their own stream so both implementations see the same
+    # sequence even though the legacy one burns global random draws per move
+    piece_rng = random.Random(seed)
+
+    game = game_class(piece_rng, width, height)
+    games = 1
+    start = time.perf_counter()
+    for action in actions:
+        if game.game_over:
+            game = game_class(piece_rng, width, height)
+            games += 1
+        if action == 0:
+            game.move_piece(-1, 0)
+        elif action == 1:
+            game.move_piece(1, 0)
+        elif action == 2:
+            game.rotate_piece()
+        else:
+            game.drop_piece()
+    elapsed = time.perf_counter() - start
+    return elapsed, games, [list(row) for row in game.grid]
+
+
+def main():
+    """Run both implementations and print moves per second"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--moves", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--width", type=int, default=GRID_WIDTH)
+    parser.add_argument("--height", type=int, default=GRID_HEIGHT)
+    args = parser.parse_args()
+
+    print("Tetris Benchmark")
+    print("=" * 50)
+
+    results = {}
+    final_grids = []
+    for name, game_class in (("legacy", LegacyTetrisGame), ("current", TetrisGame)):
+        elapsed, games, grid = run_moves(game_class, args.moves, args.seed,
+                                       args.width, args.height)
+        results[name] = args.moves / elapsed
+        final_grids.append(grid)
+        print(f"{name:>10}: {results[name]:12,.0f} moves/s  ({games} games)")
+
+    if final_grids[0] != final_grids[1]:
+        print("WARNING: implementations diverged on the same move sequence")
+    print(f"{'speedup':>10}: {results['current'] / results['legacy']:12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
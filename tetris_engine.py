@@ -0,0 +1,461 @@
+"""
+Tetris Engine
+Game rules and state for Tetris with no pygame dependency, shared by the
+pygame front end in tetris_tetris.py and the headless simulators.
+"""
+
+import random
+from collections import namedtuple
+
+# Constants
+GRID_WIDTH = 10
+GRID_HEIGHT = 20
+
+# Colors
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+CYAN = (0, 255, 255)
+BLUE = (0, 0, 255)
+ORANGE = (255, 165, 0)
+YELLOW = (255, 255, 0)
+GREEN = (0, 255, 0)
+PURPLE = (128, 0, 128)
+RED = (255, 0, 0)
+GRAY = (128, 128, 128)
+
+# Player actions, shared by keyboard input and scripted input streams
+MOVE_LEFT = 0
+MOVE_RIGHT = 1
+SOFT_DROP = 2
+ROTATE = 3
+HARD_DROP = 4
+ACTIONS = (MOVE_LEFT, MOVE_RIGHT, SOFT_DROP, ROTATE, HARD_DROP)
+GRAVITY = 5  # the timed fall driven by update(), never a player input
+
+# Tetris pieces (tetrominoes)
+PIECES = [
+    # I piece
+    [['.....',
+      '..#..',
+      '..#..',
+      '..#..',
+      '..#..'],
+     ['.....',
+      '.....',
+      '####.',
+      '.....',
+      '.....']],
+    
+    # O piece
+    [['.....',
+      '.....',
+      '.##..',
+      '.##..',
+      '.....']],
+    
+    # T piece
+    [['.....',
+      '.....',
+      '.#...',
+      '###..',
+      '.....'],
+     ['.....',
+      '.....',
+      '.#...',
+      '.##..',
+      '.#...'],
+     ['.....',
+      '.....',
+      '.....',
+      '###..',
+      '.#...'],
+     ['.....',
+      '.....',
+      '.#...',
+      '##...',
+      '.#...']],
+    
+    # S piece
+    [['.....',
+      '.....',
+      '.##..',
+      '##...',
+      '.....'],
+     ['.....',
+      '.#...',
+      '.##..',
+      '..#..',
+      '.....']],
+    
+    # Z piece
+    [['.....',
+      '.....',
+      '##...',
+      '.##..',
+      '.....'],
+     ['.....',
+      '..#..',
+      '.##..',
+      '.#...',
+      '.....']],
+    
+    # J piece
+    [['.....',
+      '.#...',
+      '.#...',
+      '##...',
+      '.....'],
+     ['.....',
+      '.....',
+      '#....',
+      '###..',
+      '.....'],
+     ['.....',
+      '.##..',
+      '.#...',
+      '.#...',
+      '.....'],
+     ['.....',
+      '.....',
+      '###..',
+      '..#..',
+      '.....']],
+    
+    # L piece
+    [['.....',
+      '..#..',
+      '..#..',
+      '.##..',
+      '.....'],
+     ['.....',
+      '.....',
+      '###..',
+      '#....',
+      '.....'],
+     ['.....',
+      '##...',
+      '.#...',
+      '.#...',
+      '.....'],
+     ['.....',
+      '.....',
+      '..#..',
+      '###..',
+      '.....']]
+]
+
+PIECE_COLORS = [CYAN, YELLOW, PURPLE, GREEN, RED, BLUE, ORANGE]
+
+# Precompiled piece shape: cell offsets plus per-row bitmasks shifted so the
+# leftmost filled column is bit 0 (left/right are that column range), and the
+# lowest row offset of every occupied column for skyline drops
+PieceShape = namedtuple('PieceShape', ['cells', 'left', 'right', 'rows', 'bottoms'])
+
+def compile_piece(template):
+    cells = tuple((col, row)
+                  for row in range(5)
+                  for col in range(5)
+                  if template[row][col] == '#')
+    left = min(col for col, _ in cells)
+    right = max(col for col, _ in cells)
+    masks = {}
+    bottoms = {}
+    for col, row in cells:
+        masks[row] = masks.get(row, 0) | (1 << (col - left))
+        bottoms[col] = max(bottoms.get(col, row), row)
+    return PieceShape(cells, left, right, tuple(sorted(masks.items())),
+                      tuple(sorted(bottoms.items())))
+
+# PIECE_SHAPES[piece_type][rotation] mirrors PIECES
+PIECE_SHAPES = [[compile_piece(template) for template in rotations]
+                for rotations in PIECES]
+
+class TetrisPiece:
+    __slots__ = ('x', 'y', 'piece_type', 'rotation', 'color')
+    
+    def __init__(self, x, y, rng=random):
+        self.x = x
+        self.y = y
+        self.piece_type = rng.randint(0, len(PIECES) - 1)
+        self.rotation = 0
+        self.color = PIECE_COLORS[self.piece_type]
+    
+    def get_rotated_piece(self):
+        return PIECES[self.piece_type][self.rotation % len(PIECES[self.piece_type])]
+    
+    def get_shape(self):
+        shapes = PIECE_SHAPES[self.piece_type]
+        return shapes[self.rotation % len(shapes)]
+    
+    def get_cells(self):
+        x, y = self.x, self.y
+        return [(x + col, y + row) for col, row in self.get_shape().cells]
+
+class TetrisGrid:
+    # Rows are kept in a ring buffer: logical row y (0 is the top) lives in
+    # slot head + y, with head in (-height, 0] so Python's negative indexing
+    # does the wrap-around. Each row has its colors and an int bitmask in
+    # which bit x is set when column x is occupied.
+    
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT):
+        self.width = width
+        self.height = height
+        self.full_row = (1 << width) - 1
+        self.colors = [[BLACK for _ in range(width)] for _ in range(height)]
+        self.masks = [0] * height
+        self.head = 0
+    
+    def __len__(self):
+        return self.height
+    
+    def __getitem__(self, y):
+        if y < 0:
+            y += self.height
+        return self.colors[self.head + y]
+    
+    def __iter__(self):
+        for y in range(self.height):
+            yield self.colors[self.head + y]
+    
+    def mask(self, y):
+        return self.masks[self.head + y]
+    
+    def is_full(self, y):
+        return self.masks[self.head + y] == self.full_row
+    
+    def fill(self, x, y, color):
+        self.colors[self.head + y][x] = color
+        self.masks[self.head + y] |= 1 << x
+    
+    def clear_rows(self, cleared):
+        # Remove the sorted logical rows in cleared in one compaction pass.
+        # Rotating head back by k moves every row above the topmost cleared
+        # one down k rows for free; only the rows from there to the bottom
+        # are shuffled, and the k recycled rows come back empty on top.
+        k = len(cleared)
+        height, head = self.height, self.head
+        colors, masks = self.colors, self.masks
+        skip = set(cleared)
+        write = head + cleared[0]
+        for y in range(cleared[0], height):
+            if y in skip:
+                continue
+            read = head + y
+            if read != write:
+                colors[write], colors[read] = colors[read], colors[write]
+                masks[write] = masks[read]
+            write += 1
+        
+        # The last k slots now hold the cleared rows; they become the new top
+        for slot in range(head + height - k, head + height):
+            row = colors[slot]
+            for x in range(self.width):
+                row[x] = BLACK
+            masks[slot] = 0
+        head -= k
+        if head <= -height:
+            head += height
+        self.head = head
+
+class TetrisGame:
+    def __init__(self, rng=None, width=GRID_WIDTH, height=GRID_HEIGHT, recorder=None):
+        # Pieces are drawn from rng (a random.Random) so games can be seeded;
+        # the module-level random functions are used when none is given
+        self.rng = rng if rng is not None else random
+        # Optional session recorder (see tetris_replay.SessionLog) that is
+        # told about every piece drawn and every action applied
+        self.recorder = recorder
+        self.width = width
+        self.height = height
+        self.grid = TetrisGrid(width, height)
+        # Skyline: height of the highest filled cell and number of filled
+        # cells per column, kept up to date by place_piece and clear_lines
+        self.column_heights = [0] * width
+        self.column_cells = [0] * width
+        self.placed_rows = ()  # rows touched by the last placed piece
+        self.current_piece = None
+        self.next_piece = None
+        self.score = 0
+        self.lines_cleared = 0
+        self.pieces_placed = 0
+        self.elapsed = 0  # game clock in milliseconds
+        self.fall_time = 0
+        self.fall_speed = 500  # milliseconds
+        self.game_over = False
+        self.spawn_new_piece()
+    
+    def new_piece(self):
+        piece = TetrisPiece(self.width // 2 - 2, 0, self.rng)
+        if self.recorder is not None:
+            self.recorder.record_piece(piece.piece_type)
+        return piece
+    
+    def spawn_new_piece(self):
+        if self.next_piece is None:
+            self.next_piece = self.new_piece()
+        
+        self.current_piece = self.next_piece
+        self.next_piece = self.new_piece()
+        
+        # Check if game is over
+        if self.check_collision(self.current_piece):
+            self.game_over = True
+    
+    def check_collision(self, piece):
+        return self.collides(piece.get_shape(), piece.x, piece.y)
+    
+    def collides(self, shape, x, y):
+        # Walls first, then one AND per piece row against the bitboard
+        left = x + shape.left
+        if left < 0 or x + shape.right >= self.width:
+            return True
+        height = self.height
+        masks = self.grid.masks
+        head = self.grid.head
+        for dy, mask in shape.rows:
+            row = y + dy
+            if row >= height:
+                return True
+            if row >= 0 and masks[head + row] & (mask << left):
+                return True
+        return False
+    
+    def fits(self, dx=0, dy=0, turns=0):
+        # Would the current piece fit if shifted and rotated? Mutates nothing
+        piece = self.current_piece
+        shapes = PIECE_SHAPES[piece.piece_type]
+        shape = shapes[(piece.rotation + turns) % len(shapes)]
+        return not self.collides(shape, piece.x + dx, piece.y + dy)
+    
+    def move_piece(self, dx, dy):
+        # Moves and rotations update the current piece in place once the
+        # target position is known to be free, so nothing is allocated
+        if not self.fits(dx, dy):
+            return False
+        self.current_piece.x += dx
+        self.current_piece.y += dy
+        return True
+    
+    def rotate_piece(self):
+        if not self.fits(turns=1):
+            return False
+        piece = self.current_piece
+        piece.rotation = (piece.rotation + 1) % len(PIECE_SHAPES[piece.piece_type])
+        return True
+    
+    def drop_piece(self):
+        if self.move_piece(0, 1):
+            return True
+        else:
+            self.place_piece()
+            self.clear_lines()
+            self.spawn_new_piece()
+            return False
+    
+    def drop_distance(self):
+        # Rows the current piece can fall, read off the skyline in one pass
+        piece = self.current_piece
+        shape = piece.get_shape()
+        heights = self.column_heights
+        distance = self.height
+        for col, bottom in shape.bottoms:
+            gap = self.height - heights[piece.x + col] - 1 - (piece.y + bottom)
+            if gap < distance:
+                distance = gap
+        if distance < 0:
+            # Piece was slid under an overhang: step down through the bitboard
+            distance = 0
+            while not self.collides(shape, piece.x, piece.y + distance + 1):
+                distance += 1
+        return distance
+    
+    def ghost_position(self):
+        return self.current_piece.x, self.current_piece.y + self.drop_distance()
+    
+    def hard_drop(self):
+        self.current_piece.y += self.drop_distance()
+        self.drop_piece()
+    
+    def aggregate_height(self):
+        return sum(self.column_heights)
+    
+    def holes(self):
+        # Every empty cell under a column's highest filled cell is a hole
+        return sum(self.column_heights) - sum(self.column_cells)
+    
+    def place_piece(self):
+        piece = self.current_piece
+        height = self.height
+        placed_rows = []
+        for x, y in piece.get_cells():
+            if 0 <= y < height and 0 <= x < self.width:
+                self.grid.fill(x, y, piece.color)
+                if y not in placed_rows:
+                    placed_rows.append(y)
+                self.column_cells[x] += 1
+                if height - y > self.column_heights[x]:
+                    self.column_heights[x] = height - y
+        self.placed_rows = placed_rows
+        self.pieces_placed += 1
+    
+    def clear_lines(self):
+        # Only rows the last piece landed in can have become full
+        lines_to_clear = sorted(y for y in self.placed_rows if self.grid.is_full(y))
+        self.placed_rows = ()
+        
+        if lines_to_clear:
+            self.grid.clear_rows(lines_to_clear)
+            self.update_skyline(lines_to_clear)
+            self.lines_cleared += len(lines_to_clear)
+            self.score += len(lines_to_clear) * 100 * (len(lines_to_clear) + 1)
+            # Increase speed
+            self.fall_speed = max(50, self.fall_speed - 10)
+    
+    def update_skyline(self, cleared):
+        # A full row covers every column, so each column loses exactly one
+        # cell per cleared row. A column whose top cell was itself cleared is
+        # rescanned from its new upper bound; every other one just drops.
+        count = len(cleared)
+        height = self.height
+        cleared = set(cleared)
+        for x in range(self.width):
+            self.column_cells[x] -= count
+            column_height = self.column_heights[x]
+            if height - column_height not in cleared:
+                self.column_heights[x] = column_height - count
+                continue
+            bit = 1 << x
+            column_height = 0
+            for y in range(height - self.column_heights[x] + count, height):
+                if self.grid.mask(y) & bit:
+                    column_height = height - y
+                    break
+            self.column_heights[x] = column_height
+    
+    def apply_action(self, action):
+        if self.game_over:
+            return False
+        if self.recorder is not None:
+            self.recorder.record_action(self.elapsed, action)
+        if action == MOVE_LEFT:
+            return self.move_piece(-1, 0)
+        elif action == MOVE_RIGHT:
+            return self.move_piece(1, 0)
+        elif action == SOFT_DROP or action == GRAVITY:
+            return self.drop_piece()
+        elif action == ROTATE:
+            return self.rotate_piece()
+        elif action == HARD_DROP:
+            self.hard_drop()
+            return False
+        raise ValueError(f"Unknown action: {action}")
+    
+    def update(self, dt):
+        if self.game_over:
+            return
+        
+        self.elapsed += dt
+        self.fall_time += dt
+        if self.fall_time >= self.fall_speed:
+            self.apply_action(GRAVITY)
+            self.fall_time = 0
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tetris Engine Tests
+Tests that the bitboard TetrisGame plays exactly like the original
+list-of-rows implementation kept in tetris_benchmark, and that its
+skyline stays in step with the grid.
+"""
+
+import random
+import unittest
+
+from tetris_benchmark import LegacyTetrisGame
+from tetris_engine import (
+    BLACK, HARD_DROP, MOVE_LEFT, MOVE_RIGHT, ROTATE, SOFT_DROP, TetrisGame
+)
+
+ACTION_WEIGHTS = {MOVE_LEFT: 3, MOVE_RIGHT: 3, ROTATE: 3, SOFT_DROP: 4, HARD_DROP: 1}
+BOARD_SIZES = [(10, 20), (5, 12), (6, 8), (8, 30), (13, 16)]
+
+
+def skyline(grid, width: int, height: int) -> tuple:
+    """(column heights, filled cells per column) counted from scratch."""
+    heights, cells = [0] * width, [0] * width
+    for y in range(height):
+        for x in range(width):
+            if grid[y][x] != BLACK:
+                cells[x] += 1
+                heights[x] = max(heights[x], height - y)
+    return heights, cells
+
+
+class TestAgainstLegacy(unittest.TestCase):
+    """Test cases playing both implementations through the same moves."""
+
+    def play(self, seed: int, width: int, height: int, moves: int = 400) -> int:
+        """Play both games in lockstep, comparing after every move; returns lines cleared."""
+        actions = random.Random(seed).choices(list(ACTION_WEIGHTS),
+                                               weights=list(ACTION_WEIGHTS.values()), k=moves)
+        current_rng, legacy_rng = random.Random(seed), random.Random(seed)
+        current = TetrisGame(current_rng, width, height)
+        legacy = LegacyTetrisGame(legacy_rng, width, height)
+        lines = 0
+        for step, action in enumerate(actions):
+            if current.game_over:
+                lines += current.lines_cleared
+                current = TetrisGame(current_rng, width, height)
+                legacy = LegacyTetrisGame(legacy_rng, width, height)
+            self.assertEqual(current.apply_action(action), legacy.apply_action(action))
+            where = f"seed {seed}, {width}x{height}, move {step}"
+            self.assertEqual([list(row) for row in current.grid], legacy.grid, where)
+            self.assertEqual(sorted(current.current_piece.get_cells()),
+                             sorted(legacy.current_piece.get_cells()), where)
+            self.assertEqual(current.next_piece.piece_type, legacy.next_piece.piece_type, where)
+            self.assertEqual((current.score, current.lines_cleared, current.game_over),
+                             (legacy.score, legacy.lines_cleared, legacy.game_over), where)
+            self.assertEqual((current.column_heights, current.column_cells),
+                             skyline(legacy.grid, width, height), where)
+            for y in range(height):
+                mask = sum(1 << x for x in range(width) if legacy.grid[y][x] != BLACK)
+                self.assertEqual(current.grid.mask(y), mask, where)
+        return lines + current.lines_cleared
+
+    def test_default_board(self):
+        """Test many seeds on the standard board."""
+        for seed in range(40):
+            self.play(seed, 10, 20)
+
+    def test_board_sizes(self):
+        """Test other board sizes, where lines are cleared far more often."""
+        lines = 0
+        for width, height in BOARD_SIZES:
+            for seed in range(12):
+                lines += self.play(seed, width, height)
+        self.assertGreater(lines, 0)
+
+    def test_ghost_and_holes(self):
+        """Test the skyline shortcuts agree with stepping and counting cells."""
+        for width, height in BOARD_SIZES:
+            for seed in range(10):
+                game = TetrisGame(random.Random(seed), width, height)
+                actions = random.Random(seed).choices(list(ACTION_WEIGHTS), k=300)
+                for action in actions:
+                    if game.game_over:
+                        break
+                    piece = game.current_piece
+                    distance = 0
+                    while game.fits(dy=distance + 1):
+                        distance += 1
+                    self.assertEqual(game.ghost_position(), (piece.x, piece.y + distance))
+                    empty_below = sum(
+                        1 for x in range(width) for y in range(height - game.column_heights[x],
+                                                                height)
+                        if game.grid[y][x] == BLACK)
+                    self.assertEqual(game.holes(), empty_below)
+                    self.assertEqual(game.aggregate_height(), sum(game.column_heights))
+                    game.apply_action(action)
+
+
+if __name__ == "__main__":
+    unittest.main()
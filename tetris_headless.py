@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Headless Tetris
+Drives TetrisGame on a virtual clock from a scripted or seeded input stream.
+Nothing here imports pygame, so games run as fast as the CPU allows.
+"""
+
+import argparse
+import random
+import time
+
+from tetris_engine import ACTIONS, TetrisGame
+
+# clock.tick(60) in the pygame loop advances the game by about 16ms a frame
+FRAME_MS = 1000 // 60
+
+
+class VirtualClock:
+    """Stand-in for pygame.time.Clock that advances a fixed step per tick"""
+
+    def __init__(self, frame_ms=FRAME_MS):
+        self.frame_ms = frame_ms
+        self.time = 0
+
+    def tick(self):
+        """Advance one frame and return the elapsed milliseconds"""
+        self.time += self.frame_ms
+        return self.frame_ms
+
+
+def scripted_inputs(script):
+    """Turn (frame, action) pairs into a per-frame input stream
+
+    Each item of the stream is the tuple of actions to apply on that frame.
+    The stream ends after the last scripted frame.
+    """
+    by_frame = {}
+    for frame, action in script:
+        by_frame.setdefault(frame, []).append(action)
+    last_frame = max(by_frame, default=-1)
+    for frame in range(last_frame + 1):
+        yield tuple(by_frame.get(frame, ()))
+
+
+def seeded_inputs(seed, rate=0.2, actions=ACTIONS):
+    """Endless per-frame input stream with a random action on ~rate of frames"""
+    rng = random.Random(seed)
+    while True:
+        if rng.random() < rate:
+            yield (rng.choice(actions),)
+        else:
+            yield ()
+
+
+def run_headless(inputs, game=None, clock=None, max_frames=None, seed=None):
+    """Play a game from an input stream and return the finished TetrisGame
+
+    Without a game, a new one is made whose pieces are drawn from
+    random.Random(seed), so a seeded run is reproducible; with no seed
+    either, the pieces come from the global random module.
+    Stops when the game is over, the input stream runs out or max_frames
+    frames have been simulated, whichever comes first.
+    """
+    if game is None:
+        game = TetrisGame(random.Random(seed) if seed is not None else None)
+    if clock is None:
+        clock = VirtualClock()
+
+    for frame, actions in enumerate(inputs):
+        if game.game_over or (max_frames is not None and frame >= max_frames):
+            break
+        for action in actions:
+            game.apply_action(action)
+        game.update(clock.tick())
+    return game
+
+
+def main():
+    """Run a batch of seeded headless games and report throughput"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-frames", type=int, default=100000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    total_frames = 0
+    scores = []
+    for i in range(args.games):
+        clock = VirtualClock()
+        game = run_headless(seeded_inputs(args.seed + i), clock=clock,
+                            max_frames=args.max_frames, seed=args.seed + i)
+        total_frames += clock.time // clock.frame_ms
+        scores.append(game.score)
+    elapsed = time.perf_counter() - start
+
+    print(f"Games: {args.games}")
+    print(f"Frames simulated: {total_frames} "
+          f"({total_frames / elapsed:,.0f} frames/s, "
+          f"{total_frames / elapsed / 60:,.0f}x real time)")
+    print(f"Best score: {max(scores)}")
+
+
+if __name__ == "__main__":
+    main()
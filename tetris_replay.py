@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Tetris Replay
+Records a TetrisGame session as a compact binary log (seed, piece sequence,
+timestamped inputs and final state) and replays logs headlessly at full
+speed to check that the final score and grid still come out the same.
+"""
+
+import argparse
+import hashlib
+import random
+import struct
+import sys
+import time
+from array import array
+
+from tetris_engine import (
+    BLACK, GRID_HEIGHT, GRID_WIDTH, PIECE_COLORS, TetrisGame
+)
+from tetris_headless import run_headless, seeded_inputs
+
+# File layout (little-endian):
+#   header  magic, version, width, height, seed
+#   pieces  count, then one byte per piece type in draw order
+#   events  count, then per event a varint time delta (ms since the previous
+#           event) followed by one action byte
+#   footer  score, lines cleared, pieces placed, grid digest
+MAGIC = b"TTRP"
+VERSION = 1
+HEADER = struct.Struct("<4sBHHQ")
+COUNT = struct.Struct("<I")
+FOOTER = struct.Struct("<QII16s")
+
+COLOR_CODES = {color: code for code, color in enumerate(PIECE_COLORS)}
+EMPTY_CODE = 255
+
+
+def grid_digest(grid):
+    """Hash the colors of every cell of a TetrisGrid in logical row order"""
+    digest = hashlib.blake2b(digest_size=16)
+    for row in grid:
+        digest.update(bytes(EMPTY_CODE if color == BLACK else COLOR_CODES[color]
+                            for color in row))
+    return digest.digest()
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class RecordedPieces:
+    """rng stand-in that hands out a recorded piece sequence in order"""
+
+    def __init__(self, pieces):
+        self.pieces = iter(pieces)
+
+    def randint(self, a, b):
+        try:
+            return next(self.pieces)
+        except StopIteration:
+            raise ValueError("Replay drew more pieces than were recorded") from None
+
+
+class SessionLog:
+    """A recorded session; also the recorder passed to TetrisGame"""
+
+    def __init__(self, seed, width=GRID_WIDTH, height=GRID_HEIGHT):
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.pieces = bytearray()
+        self.times = array("Q")
+        self.actions = bytearray()
+        self.score = None
+        self.lines_cleared = None
+        self.pieces_placed = None
+        self.digest = None
+
+    # Recorder hooks called by TetrisGame
+
+    def record_piece(self, piece_type):
+        self.pieces.append(piece_type)
+
+    def record_action(self, time_ms, action):
+        self.times.append(time_ms)
+        self.actions.append(action)
+
+    def finish(self, game):
+        """Store the final state of the recorded game for later verification"""
+        self.score = game.score
+        self.lines_cleared = game.lines_cleared
+        self.pieces_placed = game.pieces_placed
+        self.digest = grid_digest(game.grid)
+
+    def new_game(self):
+        """Start a seeded TetrisGame that records into this log"""
+        return TetrisGame(random.Random(self.seed), self.width, self.height, recorder=self)
+
+    # Serialization
+
+    def to_bytes(self):
+        if self.digest is None:
+            raise ValueError("Session has not been finished")
+        out = bytearray(HEADER.pack(MAGIC, VERSION, self.width, self.height, self.seed))
+        out += COUNT.pack(len(self.pieces))
+        out += self.pieces
+        out += COUNT.pack(len(self.actions))
+        previous = 0
+        for time_ms, action in zip(self.times, self.actions):
+            write_varint(out, time_ms - previous)
+            out.append(action)
+            previous = time_ms
+        out += FOOTER.pack(self.score, self.lines_cleared, self.pieces_placed, self.digest)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        data = memoryview(data)
+        magic, version, width, height, seed = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a Tetris session log")
+        log = cls(seed, width, height)
+        offset = HEADER.size
+
+        (count,) = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        log.pieces = bytearray(data[offset:offset + count])
+        offset += count
+
+        (count,) = COUNT.unpack_from(data, offset)
+        offset += COUNT.size
+        time_ms = 0
+        for _ in range(count):
+            delta, offset = read_varint(data, offset)
+            time_ms += delta
+            log.times.append(time_ms)
+            log.actions.append(data[offset])
+            offset += 1
+
+        (log.score, log.lines_cleared, log.pieces_placed,
+         log.digest) = FOOTER.unpack_from(data, offset)
+        return log
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+def replay(log, use_seed=True):
+    """Re-run a session log as fast as possible and return the final game
+
+    With use_seed the pieces come from the recorded seed (and are checked
+    against the recorded sequence by verify); otherwise the recorded piece
+    sequence is fed back directly, which does not depend on random's
+    algorithm.
+    """
+    rng = random.Random(log.seed) if use_seed else RecordedPieces(log.pieces)
+    check = SessionLog(log.seed, log.width, log.height)
+    game = TetrisGame(rng, log.width, log.height, recorder=check)
+    for action in log.actions:
+        game.apply_action(action)
+    check.finish(game)
+    return game, check
+
+
+def verify(log, use_seed=True):
+    """Replay a log and return a list of mismatches (empty when it matches)"""
+    game, check = replay(log, use_seed)
+    problems = []
+    if check.pieces != log.pieces:
+        problems.append("piece sequence differs")
+    if check.actions != log.actions:
+        problems.append("not every recorded action could be applied")
+    for field in ("score", "lines_cleared", "pieces_placed", "digest"):
+        expected, actual = getattr(log, field), getattr(check, field)
+        if field == "digest":
+            expected, actual = expected.hex(), actual.hex()
+        if expected != actual:
+            problems.append(f"{field}: recorded {expected!r}, replayed {actual!r}")
+    return problems
+
+
+def record_headless(seed, max_frames=100000):
+    """Record a headless game driven by a seeded random input stream"""
+    log = SessionLog(seed)
+    game = run_headless(seeded_inputs(seed), game=log.new_game(), max_frames=max_frames)
+    log.finish(game)
+    return log
+
+
+def main():
+    """Record sample sessions or verify session logs from the command line"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="record seeded headless sessions")
+    record.add_argument("prefix", help="logs are written to PREFIX-<seed>.ttr")
+    record.add_argument("--games", type=int, default=1)
+    record.add_argument("--seed", type=int, default=0)
+
+    check = commands.add_parser("verify", help="replay logs and compare results")
+    check.add_argument("paths", nargs="+")
+    check.add_argument("--pieces", action="store_true",
+                       help="feed the recorded pieces instead of the seed")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        for seed in range(args.seed, args.seed + args.games):
+            path = f"{args.prefix}-{seed}.ttr"
+            log = record_headless(seed)
+            log.save(path)
+            print(f"{path}: score {log.score}, {len(log.actions)} events")
+        return
+
+    failures = 0
+    events = 0
+    start = time.perf_counter()
+    for path in args.paths:
+        log = SessionLog.load(path)
+        events += len(log.actions)
+        problems = verify(log, use_seed=not args.pieces)
+        if problems:
+            failures += 1
+            print(f"{path}: MISMATCH - " + "; ".join(problems))
+    elapsed = time.perf_counter() - start
+    print(f"Replayed {len(args.paths)} sessions ({events} events) in {elapsed:.2f}s, "
+          f"{failures} mismatched")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
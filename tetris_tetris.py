@@ -1,257 +1,42 @@
+import argparse
+import os
 import pygame
 import random
 import sys
+import time
+
+from tetris_engine import (
+    BLACK, GRAY, GRID_HEIGHT, GRID_WIDTH, HARD_DROP, MOVE_LEFT, MOVE_RIGHT,
+    RED, ROTATE, SOFT_DROP, WHITE, TetrisGame
+)
+from tetris_replay import SessionLog
 
 # Initialize Pygame
 pygame.init()
 
 # Constants
-GRID_WIDTH = 10
-GRID_HEIGHT = 20
 CELL_SIZE = 30
 GRID_X_OFFSET = 50
 GRID_Y_OFFSET = 50
 
-# Colors
-BLACK = (0, 0, 0)
-WHITE = (255, 255, 255)
-CYAN = (0, 255, 255)
-BLUE = (0, 0, 255)
-ORANGE = (255, 165, 0)
-YELLOW = (255, 255, 0)
-GREEN = (0, 255, 0)
-PURPLE = (128, 0, 128)
-RED = (255, 0, 0)
-GRAY = (128, 128, 128)
+# Keyboard controls
+KEY_ACTIONS = {
+    pygame.K_a: MOVE_LEFT,   # Move left
+    pygame.K_d: MOVE_RIGHT,  # Move right
+    pygame.K_s: SOFT_DROP,   # Soft drop
+    pygame.K_w: ROTATE,      # Rotate
+    pygame.K_SPACE: HARD_DROP,  # Hard drop
+}
 
-# Tetris pieces (tetrominoes)
-PIECES = [
-    # I piece
-    [['.....',
-      '..#..',
-      '..#..',
-      '..#..',
-      '..#..'],
-     ['.....',
-      '.....',
-      '####.',
-      '.....',
-      '.....']],
-    
-    # O piece
-    [['.....',
-      '.....',
-      '.##..',
-      '.##..',
-      '.....']],
-    
-    # T piece
-    [['.....',
-      '.....',
-      '.#...',
-      '###..',
-      '.....'],
-     ['.....',
-      '.....',
-      '.#...',
-      '.##..',
-      '.#...'],
-     ['.....',
-      '.....',
-      '.....',
-      '###..',
-      '.#...'],
-     ['.....',
-      '.....',
-      '.#...',
-      '##...',
-      '.#...']],
-    
-    # S piece
-    [['.....',
-      '.....',
-      '.##..',
-      '##...',
-      '.....'],
-     ['.....',
-      '.#...',
-      '.##..',
-      '..#..',
-      '.....']],
-    
-    # Z piece
-    [['.....',
-      '.....',
-      '##...',
-      '.##..',
-      '.....'],
-     ['.....',
-      '..#..',
-      '.##..',
-      '.#...',
-      '.....']],
-    
-    # J piece
-    [['.....',
-      '.#...',
-      '.#...',
-      '##...',
-      '.....'],
-     ['.....',
-      '.....',
-      '#....',
-      '###..',
-      '.....'],
-     ['.....',
-      '.##..',
-      '.#...',
-      '.#...',
-      '.....'],
-     ['.....',
-      '.....',
-      '###..',
-      '..#..',
-      '.....']],
-    
-    # L piece
-    [['.....',
-      '..#..',
-      '..#..',
-      '.##..',
-      '.....'],
-     ['.....',
-      '.....',
-      '###..',
-      '#....',
-      '.....'],
-     ['.....',
-      '##...',
-      '.#...',
-      '.#...',
-      '.....'],
-     ['.....',
-      '.....',
-      '..#..',
-      '###..',
-      '.....']]
+CONTROLS = [
+    "Controls:",
+    "A/D - Move left/right",
+    "S - Soft drop",
+    "W - Rotate",
+    "SPACE - Hard drop",
+    "R - Restart"
 ]
 
-PIECE_COLORS = [CYAN, YELLOW, PURPLE, GREEN, RED, BLUE, ORANGE]
-
-class TetrisPiece:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.piece_type = random.randint(0, len(PIECES) - 1)
-        self.rotation = 0
-        self.color = PIECE_COLORS[self.piece_type]
-    
-    def get_rotated_piece(self):
-        return PIECES[self.piece_type][self.rotation % len(PIECES[self.piece_type])]
-    
-    def get_cells(self):
-        cells = []
-        piece = self.get_rotated_piece()
-        for row in range(5):
-            for col in range(5):
-                if piece[row][col] == '#':
-                    cells.append((self.x + col, self.y + row))
-        return cells
-
-class TetrisGame:
-    def __init__(self):
-        self.grid = [[BLACK for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-        self.current_piece = None
-        self.next_piece = None
-        self.score = 0
-        self.lines_cleared = 0
-        self.fall_time = 0
-        self.fall_speed = 500  # milliseconds
-        self.game_over = False
-        self.spawn_new_piece()
-    
-    def spawn_new_piece(self):
-        if self.next_piece is None:
-            self.next_piece = TetrisPiece(GRID_WIDTH // 2 - 2, 0)
-        
-        self.current_piece = self.next_piece
-        self.next_piece = TetrisPiece(GRID_WIDTH // 2 - 2, 0)
-        
-        # Check if game is over
-        if self.check_collision(self.current_piece):
-            self.game_over = True
-    
-    def check_collision(self, piece):
-        cells = piece.get_cells()
-        for x, y in cells:
-            if (x < 0 or x >= GRID_WIDTH or 
-                y >= GRID_HEIGHT or 
-                (y >= 0 and self.grid[y][x] != BLACK)):
-                return True
-        return False
-    
-    def move_piece(self, dx, dy):
-        piece = TetrisPiece(self.current_piece.x + dx, self.current_piece.y + dy)
-        piece.piece_type = self.current_piece.piece_type
-        piece.rotation = self.current_piece.rotation
-        piece.color = self.current_piece.color
-        
-        if not self.check_collision(piece):
-            self.current_piece = piece
-            return True
-        return False
-    
-    def rotate_piece(self):
-        piece = TetrisPiece(self.current_piece.x, self.current_piece.y)
-        piece.piece_type = self.current_piece.piece_type
-        piece.rotation = self.current_piece.rotation + 1
-        piece.color = self.current_piece.color
-        
-        if not self.check_collision(piece):
-            self.current_piece = piece
-            return True
-        return False
-    
-    def drop_piece(self):
-        if self.move_piece(0, 1):
-            return True
-        else:
-            self.place_piece()
-            self.clear_lines()
-            self.spawn_new_piece()
-            return False
-    
-    def place_piece(self):
-        cells = self.current_piece.get_cells()
-        for x, y in cells:
-            if 0 <= y < GRID_HEIGHT and 0 <= x < GRID_WIDTH:
-                self.grid[y][x] = self.current_piece.color
-    
-    def clear_lines(self):
-        lines_to_clear = []
-        for y in range(GRID_HEIGHT):
-            if all(self.grid[y][x] != BLACK for x in range(GRID_WIDTH)):
-                lines_to_clear.append(y)
-        
-        for y in lines_to_clear:
-            del self.grid[y]
-            self.grid.insert(0, [BLACK for _ in range(GRID_WIDTH)])
-        
-        if lines_to_clear:
-            self.lines_cleared += len(lines_to_clear)
-            self.score += len(lines_to_clear) * 100 * (len(lines_to_clear) + 1)
-            # Increase speed
-            self.fall_speed = max(50, self.fall_speed - 10)
-    
-    def update(self, dt):
-        if self.game_over:
-            return
-        
-        self.fall_time += dt
-        if self.fall_time >= self.fall_speed:
-            self.drop_piece()
-            self.fall_time = 0
-
 class TetrisRenderer:
     def __init__(self):
         self.screen_width = GRID_WIDTH * CELL_SIZE + 2 * GRID_X_OFFSET + 200
@@ -260,6 +45,32 @@ class TetrisRenderer:
         pygame.display.set_caption("Tetris")
         self.font = pygame.font.Font(None, 36)
         self.small_font = pygame.font.Font(None, 24)
+        
+        # Side panel layout
+        self.panel_x = GRID_X_OFFSET + GRID_WIDTH * CELL_SIZE + 20
+        self.next_rect = pygame.Rect(self.panel_x, GRID_Y_OFFSET + 50, 5 * 20, 5 * 20)
+        self.info_rect = pygame.Rect(self.panel_x, GRID_Y_OFFSET + 200, 160, 50)
+        
+        # Static text is rendered once and only blitted afterwards
+        self.next_label = self.small_font.render("Next:", True, WHITE)
+        self.control_texts = [
+            self.small_font.render(control, True, WHITE if i == 0 else GRAY)
+            for i, control in enumerate(CONTROLS)
+        ]
+        self.game_over_text = self.font.render("GAME OVER", True, RED)
+        self.restart_text = self.small_font.render("Press R to restart", True, WHITE)
+        
+        self.invalidate()
+    
+    def invalidate(self):
+        # Forget what is on screen so the next render redraws everything
+        self.drawn_game = None
+        self.drawn_grid = [[None] * GRID_WIDTH for _ in range(GRID_HEIGHT)]
+        self.drawn_cells = [[None] * GRID_WIDTH for _ in range(GRID_HEIGHT)]
+        self.drawn_piece_cells = set()
+        self.drawn_next = None
+        self.drawn_info = None
+        self.drawn_game_over = False
     
     def draw_cell(self, x, y, color):
         rect = pygame.Rect(
@@ -270,94 +81,132 @@ class TetrisRenderer:
         )
         pygame.draw.rect(self.screen, color, rect)
         pygame.draw.rect(self.screen, WHITE, rect, 1)
+        return rect
     
     def draw_grid(self, game):
-        # Draw background grid
+        # Cells worth checking: whole rows that changed in the grid plus
+        # wherever the current piece was last frame and is now
+        candidates = set(self.drawn_piece_cells)
         for y in range(GRID_HEIGHT):
-            for x in range(GRID_WIDTH):
-                self.draw_cell(x, y, game.grid[y][x])
+            row = game.grid[y]
+            if row != self.drawn_grid[y]:
+                candidates.update((x, y) for x in range(GRID_WIDTH))
+                self.drawn_grid[y] = list(row)
         
-        # Draw current piece
+        piece_cells = set()
         if game.current_piece:
-            cells = game.current_piece.get_cells()
-            for x, y in cells:
+            for x, y in game.current_piece.get_cells():
                 if 0 <= y < GRID_HEIGHT and 0 <= x < GRID_WIDTH:
-                    self.draw_cell(x, y, game.current_piece.color)
+                    piece_cells.add((x, y))
+            candidates |= piece_cells
+        
+        # Only redraw cells whose on-screen color actually changes
+        dirty = []
+        for x, y in candidates:
+            if (x, y) in piece_cells:
+                color = game.current_piece.color
+            else:
+                color = game.grid[y][x]
+            if self.drawn_cells[y][x] != color:
+                dirty.append(self.draw_cell(x, y, color))
+                self.drawn_cells[y][x] = color
+        self.drawn_piece_cells = piece_cells
+        return dirty
     
     def draw_next_piece(self, game):
-        if game.next_piece:
-            next_x = GRID_X_OFFSET + GRID_WIDTH * CELL_SIZE + 20
-            next_y = GRID_Y_OFFSET + 50
-            
-            # Draw "Next:" label
-            text = self.small_font.render("Next:", True, WHITE)
-            self.screen.blit(text, (next_x, next_y - 30))
-            
-            # Draw next piece
-            piece = game.next_piece.get_rotated_piece()
-            for row in range(5):
-                for col in range(5):
-                    if piece[row][col] == '#':
-                        rect = pygame.Rect(
-                            next_x + col * 20,
-                            next_y + row * 20,
-                            20,
-                            20
-                        )
-                        pygame.draw.rect(self.screen, game.next_piece.color, rect)
-                        pygame.draw.rect(self.screen, WHITE, rect, 1)
+        if not game.next_piece:
+            return []
+        key = (game.next_piece.piece_type, game.next_piece.rotation)
+        if key == self.drawn_next:
+            return []
+        self.drawn_next = key
+        
+        # Draw next piece
+        self.screen.fill(BLACK, self.next_rect)
+        for col, row in game.next_piece.get_shape().cells:
+            rect = pygame.Rect(
+                self.next_rect.x + col * 20,
+                self.next_rect.y + row * 20,
+                20,
+                20
+            )
+            pygame.draw.rect(self.screen, game.next_piece.color, rect)
+            pygame.draw.rect(self.screen, WHITE, rect, 1)
+        return [self.next_rect]
     
     def draw_info(self, game):
-        info_x = GRID_X_OFFSET + GRID_WIDTH * CELL_SIZE + 20
-        info_y = GRID_Y_OFFSET + 200
-        
-        # Score
-        score_text = self.small_font.render(f"Score: {game.score}", True, WHITE)
-        self.screen.blit(score_text, (info_x, info_y))
+        dirty = []
         
-        # Lines cleared
-        lines_text = self.small_font.render(f"Lines: {game.lines_cleared}", True, WHITE)
-        self.screen.blit(lines_text, (info_x, info_y + 30))
+        # Score and lines cleared are re-rendered only when they change
+        info = (game.score, game.lines_cleared)
+        if info != self.drawn_info:
+            self.drawn_info = info
+            self.screen.fill(BLACK, self.info_rect)
+            score_text = self.small_font.render(f"Score: {game.score}", True, WHITE)
+            self.screen.blit(score_text, self.info_rect.topleft)
+            lines_text = self.small_font.render(f"Lines: {game.lines_cleared}", True, WHITE)
+            self.screen.blit(lines_text, (self.info_rect.x, self.info_rect.y + 30))
+            dirty.append(self.info_rect)
         
         # Game over
-        if game.game_over:
-            game_over_text = self.font.render("GAME OVER", True, RED)
-            text_rect = game_over_text.get_rect(center=(self.screen_width // 2, self.screen_height // 2))
-            self.screen.blit(game_over_text, text_rect)
+        if game.game_over and not self.drawn_game_over:
+            self.drawn_game_over = True
+            text_rect = self.game_over_text.get_rect(center=(self.screen_width // 2, self.screen_height // 2))
+            self.screen.blit(self.game_over_text, text_rect)
             
-            restart_text = self.small_font.render("Press R to restart", True, WHITE)
-            restart_rect = restart_text.get_rect(center=(self.screen_width // 2, self.screen_height // 2 + 40))
-            self.screen.blit(restart_text, restart_rect)
+            restart_rect = self.restart_text.get_rect(center=(self.screen_width // 2, self.screen_height // 2 + 40))
+            self.screen.blit(self.restart_text, restart_rect)
+            dirty.extend([text_rect, restart_rect])
+        return dirty
     
     def draw_controls(self):
-        controls_x = GRID_X_OFFSET + GRID_WIDTH * CELL_SIZE + 20
         controls_y = GRID_Y_OFFSET + 300
         
-        controls = [
-            "Controls:",
-            "A/D - Move left/right",
-            "S - Soft drop",
-            "W - Rotate",
-            "SPACE - Hard drop",
-            "R - Restart"
-        ]
-        
-        for i, control in enumerate(controls):
-            color = WHITE if i == 0 else GRAY
-            text = self.small_font.render(control, True, color)
-            self.screen.blit(text, (controls_x, controls_y + i * 20))
+        self.screen.blit(self.next_label, (self.panel_x, self.next_rect.y - 30))
+        for i, text in enumerate(self.control_texts):
+            self.screen.blit(text, (self.panel_x, controls_y + i * 20))
     
     def render(self, game):
-        self.screen.fill(BLACK)
-        self.draw_grid(game)
-        self.draw_next_piece(game)
-        self.draw_info(game)
-        self.draw_controls()
-        pygame.display.flip()
+        # A new game (restart) or an invalidated screen gets a full redraw
+        if game is not self.drawn_game:
+            self.invalidate()
+            self.drawn_game = game
+            self.screen.fill(BLACK)
+            self.draw_controls()
+            self.draw_grid(game)
+            self.draw_next_piece(game)
+            self.draw_info(game)
+            pygame.display.flip()
+            return
+        
+        dirty = self.draw_grid(game)
+        dirty += self.draw_next_piece(game)
+        dirty += self.draw_info(game)
+        if dirty:
+            pygame.display.update(dirty)
+
+def new_game(record_dir):
+    if record_dir is None:
+        return TetrisGame()
+    return SessionLog(random.SystemRandom().getrandbits(64)).new_game()
+
+def save_recording(game, record_dir):
+    if record_dir is None or not game.pieces_placed:
+        return
+    log = game.recorder
+    log.finish(game)
+    log.save(os.path.join(record_dir, f"tetris-{int(time.time())}-{log.seed:016x}.ttr"))
 
 def main():
+    parser = argparse.ArgumentParser(description="Tetris")
+    parser.add_argument("--record", metavar="DIR",
+                        help="save a replay log of every game to DIR")
+    args = parser.parse_args()
+    if args.record is not None:
+        os.makedirs(args.record, exist_ok=True)
+    
     clock = pygame.time.Clock()
-    game = TetrisGame()
+    game = new_game(args.record)
     renderer = TetrisRenderer()
     
     running = True
@@ -368,26 +217,21 @@ def main():
             if event.type == pygame.QUIT:
                 running = False
             
+            elif event.type == pygame.VIDEOEXPOSE:
+                renderer.invalidate()
+            
             elif event.type == pygame.KEYDOWN:
                 if game.game_over:
                     if event.key == pygame.K_r:
-                        game = TetrisGame()
-                else:
-                    if event.key == pygame.K_a:  # Move left
-                        game.move_piece(-1, 0)
-                    elif event.key == pygame.K_d:  # Move right
-                        game.move_piece(1, 0)
-                    elif event.key == pygame.K_s:  # Soft drop
-                        game.drop_piece()
-                    elif event.key == pygame.K_w:  # Rotate
-                        game.rotate_piece()
-                    elif event.key == pygame.K_SPACE:  # Hard drop
-                        while game.drop_piece():
-                            pass
+                        save_recording(game, args.record)
+                        game = new_game(args.record)
+                elif event.key in KEY_ACTIONS:
+                    game.apply_action(KEY_ACTIONS[event.key])
         
         game.update(dt)
         renderer.render(game)
     
+    save_recording(game, args.record)
     pygame.quit()
     sys.exit()
 
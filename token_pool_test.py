@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Token Pool Tests
+Tests for token shape, uniqueness across threads and forks, and batch
+sizes in token_pool.
+"""
+
+import os
+import string
+import threading
+import unittest
+
+from token_pool import TOKEN_BYTES, TokenPool, generate_token, generate_tokens
+
+HEX_DIGITS = set(string.hexdigits.lower())
+URLSAFE = set(string.ascii_letters + string.digits + "-_")
+
+
+class TestTokenPool(unittest.TestCase):
+    """Test cases for handing out tokens from a pool."""
+
+    def setUp(self):
+        """Set up a pool with a small block so refills happen often."""
+        self.pool = TokenPool(block_size=100)
+
+    def test_token_shapes(self):
+        """Test each token kind has the requested size and alphabet."""
+        for nbytes in (0, 1, 16, 32, 99, 100, 101, 1000):
+            with self.subTest(nbytes=nbytes):
+                token = self.pool.token_hex(nbytes)
+                self.assertEqual(len(token), 2 * nbytes)
+                self.assertLessEqual(set(token), HEX_DIGITS)
+                self.assertEqual(len(self.pool.token_bytes(nbytes)), nbytes)
+                token = self.pool.token_urlsafe(nbytes)
+                self.assertEqual(len(token), -(-4 * nbytes // 3))
+                self.assertLessEqual(set(token), URLSAFE)
+        self.assertEqual(len(generate_token()), 2 * TOKEN_BYTES)
+
+    def test_invalid_sizes(self):
+        """Test negative sizes are refused."""
+        for function in (self.pool.token_hex, self.pool.token_bytes, self.pool.token_urlsafe):
+            with self.assertRaises(ValueError):
+                function(-1)
+        with self.assertRaises(ValueError):
+            self.pool.generate_tokens(3, -1)
+        with self.assertRaises(ValueError):
+            TokenPool(block_size=0)
+
+    def test_batch_sizes(self):
+        """Test generate_tokens gives count tokens of nbytes for any batch size."""
+        for count in (0, 1, 2, 3, 49, 50, 51, 500):
+            for nbytes in (0, 1, 2, 7, 32, 100, 101):
+                with self.subTest(count=count, nbytes=nbytes):
+                    tokens = self.pool.generate_tokens(count, nbytes)
+                    self.assertEqual(len(tokens), count)
+                    self.assertTrue(all(len(token) == 2 * nbytes for token in tokens))
+                    self.assertLessEqual(set("".join(tokens)), HEX_DIGITS)
+                    if nbytes >= 7:
+                        self.assertEqual(len(set(tokens)), count)
+        self.assertEqual(self.pool.generate_tokens(-5), [])
+        self.assertEqual(len(generate_tokens(10)), 10)
+
+    def test_unique(self):
+        """Test tokens from single calls and batches never repeat."""
+        tokens = [self.pool.token_hex(16) for _ in range(2000)]
+        tokens += self.pool.generate_tokens(2000, 16)
+        self.assertEqual(len(set(tokens)), len(tokens))
+
+    def test_unique_across_threads(self):
+        """Test threads sharing a pool never hand out the same token."""
+        results = []
+        barrier = threading.Barrier(8)
+
+        def work():
+            barrier.wait()
+            tokens = [self.pool.token_hex(8) for _ in range(500)]
+            tokens += self.pool.generate_tokens(500, 8)
+            results.append(tokens)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        tokens = [token for batch in results for token in batch]
+        self.assertEqual(len(tokens), 8 * 1000)
+        self.assertEqual(len(set(tokens)), len(tokens))
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs os.fork")
+    def test_reset_after_fork(self):
+        """Test a forked child does not reuse the bytes its parent still holds."""
+        pool = TokenPool()
+        pool.token_hex(8)
+        pool.token_bytes(8)  # leave partly used blocks behind in the parent
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.close(read_end)
+                tokens = pool.generate_tokens(100, 8) + [pool.token_hex(8) for _ in range(100)]
+                os.write(write_end, " ".join(tokens).encode())
+            finally:
+                os._exit(0)
+        os.close(write_end)
+        with os.fdopen(read_end, "rb") as pipe:
+            child = pipe.read().decode().split()
+        os.waitpid(pid, 0)
+        parent = pool.generate_tokens(100, 8) + [pool.token_hex(8) for _ in range(100)]
+        self.assertEqual(len(child), 200)
+        self.assertFalse(set(child) & set(parent))
+
+
+if __name__ == "__main__":
+    unittest.main()